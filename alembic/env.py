@@ -5,6 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.agriculture.user.database import Base
+from app.agriculture.user import models  # noqa: F401  registra las tablas en Base.metadata
 from app.agriculture.user import config as config_env
 
 # this is the Alembic Config object, which provides
@@ -28,11 +29,7 @@ target_metadata = Base.metadata
 # ... etc.
 
 def get_url():
-    db_user = config_env.DATABASE_USERNAME
-    db_password = config_env.DATABASE_PASSWORD
-    db_host = config_env.DATABASE_HOST
-    db_name = config_env.DATABASE_NAME
-    return f"postgresql://{db_user}:{db_password}@{db_host}/{db_name}"
+    return config_env.DATABASE_URL
 
 
 def run_migrations_offline():
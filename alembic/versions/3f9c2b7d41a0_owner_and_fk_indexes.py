@@ -0,0 +1,51 @@
+"""owner and foreign key indexes
+
+Revision ID: 3f9c2b7d41a0
+Revises: 7a497025eebc
+Create Date: 2026-10-18 09:12:05.481920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2b7d41a0'
+down_revision: Union[str, None] = '7a497025eebc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, tabla, columnas): compuestos (user_id, fecha/pk) para los listados y claves foráneas
+INDEXES = [
+    ('ix_cultivo_user_id_id', 'cultivo', ['user_id', 'ID_Cultivo']),
+    ('ix_cultivo_user_id_fecha', 'cultivo', ['user_id', 'Fecha_siembra', 'ID_Cultivo']),
+    ('ix_cosecha_user_id_id', 'cosecha', ['user_id', 'ID_Cosecha']),
+    ('ix_cosecha_user_id_fecha', 'cosecha', ['user_id', 'Fecha_cosecha', 'ID_Cosecha']),
+    ('ix_cosecha_ID_Cultivo', 'cosecha', ['ID_Cultivo']),
+    ('ix_silo_user_id_id', 'silo', ['user_id', 'ID_Silo']),
+    ('ix_silo_ID_Cosecha', 'silo', ['ID_Cosecha']),
+    ('ix_punto_venta_user_id_id', 'punto_venta', ['user_id', 'ID_Punto_Venta']),
+    ('ix_venta_user_id_fecha', 'venta', ['user_id', 'Fecha', 'ID_Venta']),
+    ('ix_venta_ID_Punto_Venta', 'venta', ['ID_Punto_Venta']),
+    ('ix_vehiculo_user_id_id', 'vehiculo', ['user_id', 'ID_Vehiculo']),
+    ('ix_vehiculo_ID_Cosecha', 'vehiculo', ['ID_Cosecha']),
+    ('ix_encargo_user_id_id', 'encargo', ['user_id', 'ID_Encargo']),
+    ('ix_encargo_user_id_fecha', 'encargo', ['user_id', 'Fecha', 'ID_Encargo']),
+    ('ix_encargo_ID_Vehiculo', 'encargo', ['ID_Vehiculo']),
+    ('ix_encargo_Punto_Venta_ID', 'encargo', ['Punto_Venta_ID']),
+]
+
+
+# CONCURRENTLY evita bloquear las escrituras en tablas grandes; debe ejecutarse fuera de una transacción
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
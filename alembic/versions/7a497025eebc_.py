@@ -1,7 +1,7 @@
-"""empty message
+"""initial schema
 
 Revision ID: 7a497025eebc
-Revises: 
+Revises:
 Create Date: 2024-09-30 02:31:40.362730
 
 """
@@ -18,21 +18,117 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+# Esquema que creaba `Base.metadata.create_all` en app.py.
+# Las bases existentes creadas de esa forma se marcan con `alembic stamp 7a497025eebc`.
 def upgrade() -> None:
-    # ### commands auto generated by Alembic - please adjust! ###
     op.create_table('users',
-                            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
-                            sa.Column('first_name', sa.String(length=20), nullable=True),
-                            sa.Column('last_aame', sa.String(length=20), nullable=False),
-                            sa.Column('email', sa.String(length=20), nullable=False),
-                            sa.Column('phone', sa.String(length=20), nullable=False),
-                            sa.Column('hashed_password', sa.String(length=20), nullable=False),
-                            sa.PrimaryKeyConstraint('id')
-                            )
-    # ### end Alembic commands ###
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('first_name', sa.String(), nullable=False),
+                    sa.Column('last_name', sa.String(), nullable=False),
+                    sa.Column('email', sa.String(), nullable=False),
+                    sa.Column('phone', sa.String(), nullable=True),
+                    sa.Column('hashed_password', sa.String(), nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table('cultivo',
+                    sa.Column('ID_Cultivo', sa.Integer(), nullable=False),
+                    sa.Column('Tipo', sa.String(length=50), nullable=False),
+                    sa.Column('Area_cultivada', sa.Float(), nullable=False),
+                    sa.Column('Fecha_siembra', sa.Date(), nullable=False),
+                    sa.Column('Fecha_cosecha', sa.Date(), nullable=True),
+                    sa.Column('Estado_crecimiento', sa.String(), nullable=False),
+                    sa.Column('Necesidades_tratamiento', sa.Text(), nullable=True),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('ID_Cultivo')
+                    )
+    op.create_index('ix_cultivo_ID_Cultivo', 'cultivo', ['ID_Cultivo'])
+
+    op.create_table('punto_venta',
+                    sa.Column('ID_Punto_Venta', sa.Integer(), nullable=False),
+                    sa.Column('Nombre', sa.String(length=50), nullable=False),
+                    sa.Column('Direccion', sa.String(length=100), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('ID_Punto_Venta')
+                    )
+    op.create_index('ix_punto_venta_ID_Punto_Venta', 'punto_venta', ['ID_Punto_Venta'])
+
+    op.create_table('cosecha',
+                    sa.Column('ID_Cosecha', sa.Integer(), nullable=False),
+                    sa.Column('Fecha_cosecha', sa.Date(), nullable=False),
+                    sa.Column('Cantidad_cosecha', sa.Float(), nullable=False),
+                    sa.Column('Area', sa.Float(), nullable=False),
+                    sa.Column('ID_Cultivo', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['ID_Cultivo'], ['cultivo.ID_Cultivo']),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('ID_Cosecha')
+                    )
+    op.create_index('ix_cosecha_ID_Cosecha', 'cosecha', ['ID_Cosecha'])
+
+    op.create_table('venta',
+                    sa.Column('ID_Venta', sa.Integer(), nullable=False),
+                    sa.Column('Fecha', sa.Date(), nullable=False),
+                    sa.Column('Cantidad_vendida', sa.Float(), nullable=False),
+                    sa.Column('Precio', sa.DECIMAL(precision=10, scale=2), nullable=False),
+                    sa.Column('ID_Punto_Venta', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['ID_Punto_Venta'], ['punto_venta.ID_Punto_Venta']),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('ID_Venta')
+                    )
+    op.create_index('ix_venta_ID_Venta', 'venta', ['ID_Venta'])
+
+    op.create_table('silo',
+                    sa.Column('ID_Silo', sa.Integer(), nullable=False),
+                    sa.Column('Nombre', sa.String(length=50), nullable=False),
+                    sa.Column('Capacidad', sa.Float(), nullable=False),
+                    sa.Column('Contenido', sa.Float(), nullable=False),
+                    sa.Column('ID_Cosecha', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['ID_Cosecha'], ['cosecha.ID_Cosecha']),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('ID_Silo')
+                    )
+    op.create_index('ix_silo_ID_Silo', 'silo', ['ID_Silo'])
+
+    op.create_table('vehiculo',
+                    sa.Column('ID_Vehiculo', sa.Integer(), nullable=False),
+                    sa.Column('Matricula', sa.String(length=50), nullable=False),
+                    sa.Column('Capacidad_Carga', sa.Float(), nullable=False),
+                    sa.Column('ID_Cosecha', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['ID_Cosecha'], ['cosecha.ID_Cosecha']),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('ID_Vehiculo')
+                    )
+    op.create_index('ix_vehiculo_ID_Vehiculo', 'vehiculo', ['ID_Vehiculo'])
+
+    op.create_table('encargo',
+                    sa.Column('ID_Encargo', sa.Integer(), nullable=False),
+                    sa.Column('Fecha', sa.Date(), nullable=False),
+                    sa.Column('Cantidad_producto', sa.Float(), nullable=False),
+                    sa.Column('ID_Vehiculo', sa.Integer(), nullable=False),
+                    sa.Column('Punto_Venta_ID', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['ID_Vehiculo'], ['vehiculo.ID_Vehiculo']),
+                    sa.ForeignKeyConstraint(['Punto_Venta_ID'], ['punto_venta.ID_Punto_Venta']),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('ID_Encargo')
+                    )
+    op.create_index('ix_encargo_ID_Encargo', 'encargo', ['ID_Encargo'])
 
 
 def downgrade() -> None:
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
+    op.drop_table('encargo')
+    op.drop_table('vehiculo')
+    op.drop_table('silo')
+    op.drop_table('venta')
+    op.drop_table('cosecha')
+    op.drop_table('punto_venta')
+    op.drop_table('cultivo')
+    op.drop_table('users')
@@ -0,0 +1,38 @@
+"""harvest forecasts
+
+Revision ID: a6c3e9f1d2b8
+Revises: f2b9d4e7a3c5
+Create Date: 2026-10-18 16:31:05.427716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c3e9f1d2b8'
+down_revision: Union[str, None] = 'f2b9d4e7a3c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Se llena con la tarea de fondo o con `python -m agriculture.user.forecast`
+def upgrade() -> None:
+    op.create_table('pronostico_cosecha',
+                    sa.Column('ID_Cultivo', sa.Integer(), nullable=False),
+                    sa.Column('Fecha_esperada', sa.Date(), nullable=False),
+                    sa.Column('Cantidad_esperada', sa.Float(), nullable=False),
+                    sa.Column('Modelo', sa.String(length=50), nullable=False),
+                    sa.Column('Muestras', sa.Integer(), nullable=False),
+                    sa.Column('Calculado', sa.DateTime(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['ID_Cultivo'], ['cultivo.ID_Cultivo'], ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('ID_Cultivo')
+                    )
+
+
+def downgrade() -> None:
+    op.drop_table('pronostico_cosecha')
@@ -0,0 +1,45 @@
+"""cascade crop dependencies
+
+Revision ID: b5d1e8a2c9f3
+Revises: 3f9c2b7d41a0
+Create Date: 2026-10-18 11:40:27.915304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d1e8a2c9f3'
+down_revision: Union[str, None] = '3f9c2b7d41a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Nombre que PostgreSQL da por defecto a una clave foránea; en SQLite las claves no tienen nombre y el
+# modo batch (que recrea la tabla) se lo asigna al reflejarlas con esta convención
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+# (nombre de la restricción, tabla, columna, tabla referida, columna referida)
+FOREIGN_KEYS = [
+    ('cosecha_ID_Cultivo_fkey', 'cosecha', 'ID_Cultivo', 'cultivo', 'ID_Cultivo'),
+    ('silo_ID_Cosecha_fkey', 'silo', 'ID_Cosecha', 'cosecha', 'ID_Cosecha'),
+    ('vehiculo_ID_Cosecha_fkey', 'vehiculo', 'ID_Cosecha', 'cosecha', 'ID_Cosecha'),
+    ('encargo_ID_Vehiculo_fkey', 'encargo', 'ID_Vehiculo', 'vehiculo', 'ID_Vehiculo'),
+]
+
+
+def replace_foreign_keys(ondelete):
+    for name, table, column, referred, referred_column in FOREIGN_KEYS:
+        with op.batch_alter_table(table, recreate='auto', naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referred, [column], [referred_column], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    replace_foreign_keys('CASCADE')
+
+
+def downgrade() -> None:
+    replace_foreign_keys(None)
@@ -0,0 +1,35 @@
+"""revoked sessions
+
+Revision ID: c7e2a9d4f1b3
+Revises: a6c3e9f1d2b8
+Create Date: 2026-10-18 18:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2a9d4f1b3'
+down_revision: Union[str, None] = 'a6c3e9f1d2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Logouts compartidos entre workers; las filas se borran al vencer el token
+def upgrade() -> None:
+    op.create_table('sesion_revocada',
+                    sa.Column('ID', sa.Integer(), autoincrement=True, nullable=False),
+                    sa.Column('JTI', sa.String(length=32), nullable=False),
+                    sa.Column('Expira', sa.Float(), nullable=False),
+                    sa.PrimaryKeyConstraint('ID'),
+                    sa.UniqueConstraint('JTI')
+                    )
+    op.create_index(op.f('ix_sesion_revocada_Expira'), 'sesion_revocada', ['Expira'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_sesion_revocada_Expira'), table_name='sesion_revocada')
+    op.drop_table('sesion_revocada')
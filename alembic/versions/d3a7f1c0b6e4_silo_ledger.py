@@ -0,0 +1,47 @@
+"""silo ledger
+
+Revision ID: d3a7f1c0b6e4
+Revises: b5d1e8a2c9f3
+Create Date: 2026-10-18 13:05:52.307114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7f1c0b6e4'
+down_revision: Union[str, None] = 'b5d1e8a2c9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# El contenido actual de cada silo se registra como su saldo de apertura en el libro
+def upgrade() -> None:
+    op.create_table('movimiento_silo',
+                    sa.Column('ID_Movimiento', sa.Integer(), nullable=False),
+                    sa.Column('ID_Silo', sa.Integer(), nullable=False),
+                    sa.Column('Fecha', sa.DateTime(), nullable=False),
+                    sa.Column('Tipo', sa.String(length=20), nullable=False),
+                    sa.Column('Cantidad', sa.Float(), nullable=False),
+                    sa.Column('ID_Cosecha', sa.Integer(), nullable=True),
+                    sa.Column('ID_Encargo', sa.Integer(), nullable=True),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['ID_Silo'], ['silo.ID_Silo'], ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['ID_Cosecha'], ['cosecha.ID_Cosecha'], ondelete='SET NULL'),
+                    sa.ForeignKeyConstraint(['ID_Encargo'], ['encargo.ID_Encargo'], ondelete='SET NULL'),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('ID_Movimiento')
+                    )
+    op.create_index('ix_movimiento_silo_ID_Movimiento', 'movimiento_silo', ['ID_Movimiento'])
+    op.create_index('ix_movimiento_silo_silo_fecha', 'movimiento_silo', ['ID_Silo', 'Fecha'])
+    op.execute(
+        'INSERT INTO movimiento_silo ("ID_Silo", "Fecha", "Tipo", "Cantidad", user_id) '
+        'SELECT "ID_Silo", CURRENT_TIMESTAMP, \'saldo\', "Contenido", user_id FROM silo'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('movimiento_silo')
@@ -0,0 +1,52 @@
+"""yield summaries
+
+Revision ID: e8c4b2a6d1f7
+Revises: d3a7f1c0b6e4
+Create Date: 2026-10-18 14:22:09.640218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c4b2a6d1f7'
+down_revision: Union[str, None] = 'd3a7f1c0b6e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Se llena a partir de las cosechas existentes (lo mismo que `python -m agriculture.user.summaries`)
+def upgrade() -> None:
+    op.create_table('resumen_rendimiento',
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('Tipo', sa.String(length=50), nullable=False),
+                    sa.Column('Anio', sa.Integer(), nullable=False),
+                    sa.Column('Mes', sa.Integer(), nullable=False),
+                    sa.Column('Cantidad_total', sa.Float(), nullable=False),
+                    sa.Column('Area_total', sa.Float(), nullable=False),
+                    sa.Column('Cosechas', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+                    sa.PrimaryKeyConstraint('user_id', 'Tipo', 'Anio', 'Mes')
+                    )
+    # Con sa.extract cada dialecto genera su propia función de fecha (EXTRACT en PostgreSQL, strftime en SQLite)
+    cosecha = sa.table('cosecha', sa.column('user_id'), sa.column('ID_Cultivo'), sa.column('Fecha_cosecha'),
+                       sa.column('Cantidad_cosecha'), sa.column('Area'))
+    cultivo = sa.table('cultivo', sa.column('ID_Cultivo'), sa.column('Tipo'))
+    resumen = sa.table('resumen_rendimiento', sa.column('user_id'), sa.column('Tipo'), sa.column('Anio'),
+                       sa.column('Mes'), sa.column('Cantidad_total'), sa.column('Area_total'), sa.column('Cosechas'))
+    anio = sa.extract('year', cosecha.c.Fecha_cosecha)
+    mes = sa.extract('month', cosecha.c.Fecha_cosecha)
+    resumenes = (
+        sa.select(cosecha.c.user_id, cultivo.c.Tipo, anio, mes, sa.func.sum(cosecha.c.Cantidad_cosecha),
+                  sa.func.sum(cosecha.c.Area), sa.func.count())
+        .join_from(cosecha, cultivo, cultivo.c.ID_Cultivo == cosecha.c.ID_Cultivo)
+        .group_by(cosecha.c.user_id, cultivo.c.Tipo, anio, mes)
+    )
+    op.execute(resumen.insert().from_select([column.name for column in resumen.c], resumenes))
+
+
+def downgrade() -> None:
+    op.drop_table('resumen_rendimiento')
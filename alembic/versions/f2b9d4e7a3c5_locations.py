@@ -0,0 +1,33 @@
+"""locations for points of sale and farms
+
+Revision ID: f2b9d4e7a3c5
+Revises: e8c4b2a6d1f7
+Create Date: 2026-10-18 15:47:31.182604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9d4e7a3c5'
+down_revision: Union[str, None] = 'e8c4b2a6d1f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('punto_venta', 'cultivo')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('Latitud', sa.Float(), nullable=True))
+        op.add_column(table, sa.Column('Longitud', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_column(table, 'Longitud')
+        op.drop_column(table, 'Latitud')
@@ -0,0 +1,125 @@
+import numpy as np
+from sqlalchemy import select
+from . import config
+from .models import PuntoVenta, Venta
+from .session import TTLCache
+
+PERIODS = {"day": "datetime64[D]", "week": "datetime64[W]", "month": "datetime64[M]", "year": "datetime64[Y]"}
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Resultados por (usuario, parámetros). Se invalida al registrar una venta; el TTL acota lo
+# desactualizado que puede estar en los otros workers.
+analytics_cache = TTLCache(config.ANALYTICS_CACHE_SIZE, config.ANALYTICS_CACHE_TTL)
+
+
+# Ventas del usuario como columnas NumPy, en una sola consulta
+class SalesColumns:
+    def __init__(self, dates, quantities, prices, points):
+        self.dates = dates
+        self.quantities = quantities
+        self.prices = prices
+        self.points = points
+        self.revenue = quantities * prices
+
+    @classmethod
+    def from_rows(cls, rows):
+        if not rows:
+            return cls(np.array([], dtype="datetime64[D]"), np.array([]), np.array([]), np.array([], dtype=np.int64))
+        dates, quantities, prices, points = zip(*rows)
+        return cls(
+            np.array(dates, dtype="datetime64[D]"),
+            np.array(quantities, dtype=np.float64),
+            np.array(prices, dtype=np.float64),
+            np.array(points, dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+
+async def load_sales(db, user_id):
+    result = await db.execute(
+        select(Venta.Fecha, Venta.Cantidad_vendida, Venta.Precio, Venta.ID_Punto_Venta)
+        .where(Venta.user_id == user_id)
+    )
+    return SalesColumns.from_rows(result.all())
+
+
+# Ingresos por período (día, semana, mes o año)
+def revenue_series(sales, period="month"):
+    if not len(sales):
+        return []
+    buckets, index = np.unique(sales.dates.astype(PERIODS[period]), return_inverse=True)
+    revenue = np.bincount(index, weights=sales.revenue)
+    quantity = np.bincount(index, weights=sales.quantities)
+    return [
+        {"period": str(bucket), "revenue": round(float(r), 2), "quantity": float(q)}
+        for bucket, r, q in zip(buckets, revenue, quantity)
+    ]
+
+
+# Promedio móvil de los ingresos diarios (los días sin ventas cuentan como cero)
+def rolling_revenue(sales, window=7):
+    if not len(sales):
+        return []
+    start = sales.dates.min()
+    offsets = (sales.dates - start).astype(np.int64)
+    daily = np.bincount(offsets, weights=sales.revenue)
+    cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+    ends = np.arange(1, len(daily) + 1)
+    starts = np.maximum(ends - window, 0)
+    averages = (cumulative[ends] - cumulative[starts]) / (ends - starts)
+    days = start + np.arange(len(daily))
+    return [{"date": str(day), "revenue": round(float(d), 2), "average": round(float(a), 2)}
+            for day, d, a in zip(days, daily, averages)]
+
+
+# Puntos de venta ordenados por ingresos
+def point_ranking(sales, names=None):
+    if not len(sales):
+        return []
+    points, index = np.unique(sales.points, return_inverse=True)
+    revenue = np.bincount(index, weights=sales.revenue)
+    quantity = np.bincount(index, weights=sales.quantities)
+    count = np.bincount(index)
+    order = np.argsort(-revenue, kind="stable")
+    names = names or {}
+    return [
+        {"point_of_sale": int(points[i]), "name": names.get(int(points[i])), "revenue": round(float(revenue[i]), 2),
+         "quantity": float(quantity[i]), "sales": int(count[i]),
+         "share": round(float(revenue[i] / revenue.sum()), 4) if revenue.sum() else None}
+        for i in order
+    ]
+
+
+def price_percentiles(sales, percentiles=PERCENTILES):
+    if not len(sales):
+        return {}
+    values = np.percentile(sales.prices, percentiles)
+    return {f"p{p}": round(float(v), 2) for p, v in zip(percentiles, values)}
+
+
+async def sales_analytics(db, user_id, period="month", window=7):
+    key = (user_id, period, window)
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+
+    sales = await load_sales(db, user_id)
+    names = dict((await db.execute(
+        select(PuntoVenta.ID_Punto_Venta, PuntoVenta.Nombre).where(PuntoVenta.user_id == user_id)
+    )).all()) if len(sales) else {}
+    result = {
+        "sales": len(sales),
+        "revenue": round(float(sales.revenue.sum()), 2),
+        "series": revenue_series(sales, period),
+        "rolling": rolling_revenue(sales, window),
+        "points_of_sale": point_ranking(sales, names),
+        "price_percentiles": price_percentiles(sales),
+    }
+    analytics_cache.set(key, result)
+    return result
+
+
+def invalidate(user_id):
+    analytics_cache.invalidate_where(lambda key: key[0] == user_id)
@@ -0,0 +1,179 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import create_model
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import schemas
+from .batch import ATOMIC, BATCHES, BatchRequest, write_batch
+from .database import get_async_db, get_read_db
+from .metrics import query_budget
+from .models import (Cultivo, Cosecha, Silo, PuntoVenta, Venta, Vehiculo, Encargo, MovimientoSilo,
+                     ResumenRendimiento, PronosticoCosecha)
+from .pagination import PageParams, paginate
+from .session import get_session, get_user
+
+router = APIRouter(prefix="/api/v1", tags=["api"])
+
+
+# Entidad expuesta en la API: modelo de respuesta, columna de cada campo, clave (o claves) de
+# paginación, dueño y columna de fecha para los filtros date_from/date_to
+@dataclass
+class Resource:
+    schema: type
+    columns: dict
+    pk: object
+    owner: object
+    date_column: object = None
+
+
+RESOURCES = {
+    "crops": Resource(schemas.Crop, {
+        "id": Cultivo.ID_Cultivo, "crop_type": Cultivo.Tipo, "area": Cultivo.Area_cultivada,
+        "planting_date": Cultivo.Fecha_siembra, "harvest_date": Cultivo.Fecha_cosecha,
+        "growing_state": Cultivo.Estado_crecimiento, "needs": Cultivo.Necesidades_tratamiento,
+        "latitude": Cultivo.Latitud, "longitude": Cultivo.Longitud,
+    }, Cultivo.ID_Cultivo, Cultivo.user_id, Cultivo.Fecha_siembra),
+    "harvests": Resource(schemas.Harvest, {
+        "id": Cosecha.ID_Cosecha, "harvest_date": Cosecha.Fecha_cosecha, "quantity": Cosecha.Cantidad_cosecha,
+        "area": Cosecha.Area, "crop_id": Cosecha.ID_Cultivo,
+    }, Cosecha.ID_Cosecha, Cosecha.user_id, Cosecha.Fecha_cosecha),
+    "silos": Resource(schemas.Silo, {
+        "id": Silo.ID_Silo, "name": Silo.Nombre, "capacity": Silo.Capacidad, "content": Silo.Contenido,
+        "harvest_id": Silo.ID_Cosecha,
+    }, Silo.ID_Silo, Silo.user_id),
+    "points_of_sale": Resource(schemas.PointOfSale, {
+        "id": PuntoVenta.ID_Punto_Venta, "name": PuntoVenta.Nombre, "address": PuntoVenta.Direccion,
+        "latitude": PuntoVenta.Latitud, "longitude": PuntoVenta.Longitud,
+    }, PuntoVenta.ID_Punto_Venta, PuntoVenta.user_id),
+    "sales": Resource(schemas.Sale, {
+        "id": Venta.ID_Venta, "date": Venta.Fecha, "quantity": Venta.Cantidad_vendida, "price": Venta.Precio,
+        "point_of_sale_id": Venta.ID_Punto_Venta,
+    }, Venta.ID_Venta, Venta.user_id, Venta.Fecha),
+    "vehicles": Resource(schemas.Vehicle, {
+        "id": Vehiculo.ID_Vehiculo, "plate": Vehiculo.Matricula, "capacity": Vehiculo.Capacidad_Carga,
+        "harvest_id": Vehiculo.ID_Cosecha,
+    }, Vehiculo.ID_Vehiculo, Vehiculo.user_id),
+    "assignments": Resource(schemas.Assignment, {
+        "id": Encargo.ID_Encargo, "date": Encargo.Fecha, "quantity": Encargo.Cantidad_producto,
+        "vehicle_id": Encargo.ID_Vehiculo, "point_of_sale_id": Encargo.Punto_Venta_ID,
+    }, Encargo.ID_Encargo, Encargo.user_id, Encargo.Fecha),
+    "silo_movements": Resource(schemas.SiloMovement, {
+        "id": MovimientoSilo.ID_Movimiento, "silo_id": MovimientoSilo.ID_Silo, "date": MovimientoSilo.Fecha,
+        "kind": MovimientoSilo.Tipo, "quantity": MovimientoSilo.Cantidad, "harvest_id": MovimientoSilo.ID_Cosecha,
+        "assignment_id": MovimientoSilo.ID_Encargo,
+    }, MovimientoSilo.ID_Movimiento, MovimientoSilo.user_id, MovimientoSilo.Fecha),
+    "yield_summaries": Resource(schemas.YieldSummary, {
+        "crop_type": ResumenRendimiento.Tipo, "year": ResumenRendimiento.Anio, "month": ResumenRendimiento.Mes,
+        "quantity": ResumenRendimiento.Cantidad_total, "area": ResumenRendimiento.Area_total,
+        "harvests": ResumenRendimiento.Cosechas,
+    }, (ResumenRendimiento.Tipo, ResumenRendimiento.Anio, ResumenRendimiento.Mes), ResumenRendimiento.user_id),
+    "forecasts": Resource(schemas.Forecast, {
+        "crop_id": PronosticoCosecha.ID_Cultivo, "expected_date": PronosticoCosecha.Fecha_esperada,
+        "expected_quantity": PronosticoCosecha.Cantidad_esperada, "model": PronosticoCosecha.Modelo,
+        "samples": PronosticoCosecha.Muestras, "computed_at": PronosticoCosecha.Calculado,
+    }, PronosticoCosecha.ID_Cultivo, PronosticoCosecha.user_id, PronosticoCosecha.Fecha_esperada),
+}
+
+
+# La API responde 401 en JSON en lugar de redirigir a /login
+def current_user_id(request: Request):
+    claims = get_session(request)
+    if not claims:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return claims["id"]
+
+
+# ?fields=id,quantity -> campos en el orden del modelo; sin fields, todos
+def selected_fields(resource, fields):
+    names = list(resource.schema.model_fields)
+    if not fields:
+        return tuple(names)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(names)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in names if name in requested)
+
+
+# Modelo con solo los campos pedidos (y el de la página que lo contiene), creados una vez por combinación
+@lru_cache(maxsize=256)
+def item_model(schema, fields):
+    if fields == tuple(schema.model_fields):
+        return schema
+    return create_model(schema.__name__, **{name: (schema.model_fields[name].annotation, ...) for name in fields})
+
+
+@lru_cache(maxsize=256)
+def page_model(schema, fields):
+    return create_model(f"{schema.__name__}Page", items=(list[item_model(schema, fields)], ...),
+                        next_cursor=(Optional[str], None))
+
+
+# La validación y el JSON los hace pydantic-core, sin pasar por jsonable_encoder ni json.dumps
+def json_response(model, **values):
+    return Response(model(**values).model_dump_json(), media_type="application/json")
+
+
+def add_resource_routes(name, resource):
+    every_field = tuple(resource.schema.model_fields)
+
+    # Solo se consultan las columnas de los campos pedidos
+    @query_budget(1)
+    async def list_items(params: PageParams = Depends(), fields: Optional[str] = None,
+                         user_id: int = Depends(current_user_id), db: AsyncSession = Depends(get_read_db)):
+        names = selected_fields(resource, fields)
+        page = await paginate(db, [resource.columns[field] for field in names], resource.pk, resource.owner,
+                              user_id, params, date_column=resource.date_column)
+        return json_response(page_model(resource.schema, names),
+                             items=[dict(zip(names, row)) for row in page.rows], next_cursor=page.next_cursor)
+
+    router.add_api_route(f"/{name}", list_items, methods=["GET"], name=f"api_list_{name}",
+                         response_model=page_model(resource.schema, every_field))
+
+    # Los registros de otros usuarios responden 404, igual que los que no existen
+    @query_budget(1)
+    async def get_item(item_id: int, fields: Optional[str] = None,
+                       user_id: int = Depends(current_user_id), db: AsyncSession = Depends(get_read_db)):
+        names = selected_fields(resource, fields)
+        row = (await db.execute(
+            select(*[resource.columns[field] for field in names])
+            .where(resource.pk == item_id, resource.owner == user_id)
+        )).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        return json_response(item_model(resource.schema, names), **dict(zip(names, row)))
+
+    if not isinstance(resource.pk, tuple):
+        router.add_api_route(f"/{name}/{{item_id}}", get_item, methods=["GET"], name=f"api_get_{name}",
+                             response_model=resource.schema)
+
+
+for resource_name, resource_spec in RESOURCES.items():
+    add_resource_routes(resource_name, resource_spec)
+
+
+@router.get("/me", response_model=schemas.UserProfile)
+@query_budget(1)
+async def me(user_id: int = Depends(current_user_id), db: AsyncSession = Depends(get_read_db)):
+    record = await get_user(db, user_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return json_response(schemas.UserProfile, **record)
+
+
+# Alta de varios registros en una transacción (un INSERT de varias filas); devuelve los ids generados
+# en el orden recibido. En modo atomic, si algún registro falla responde 422 y no inserta ninguno.
+@router.post("/{entity}/batch")
+async def write_records(entity: str, batch: BatchRequest, user_id: int = Depends(current_user_id),
+                        db: AsyncSession = Depends(get_async_db)):
+    spec = BATCHES.get(entity)
+    if not spec:
+        raise HTTPException(status_code=404, detail=f"Unknown batch type. Use {', '.join(repr(name) for name in BATCHES)}.")
+
+    result = await write_batch(db, spec, batch.records, user_id, batch.mode)
+    status_code = 422 if batch.mode == ATOMIC and result.errors else 200
+    return JSONResponse(result.to_dict(), status_code=status_code)
@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from . import config
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional; sin él solo se generan variantes gzip
+    brotli = None
+
+# Carpetas servidas como estáticos (relativas a app/)
+ASSET_DIRS = ("styles", "images")
+COMPRESSIBLE = {".css", ".js", ".svg", ".html", ".json", ".txt"}
+# Orden de preferencia de las variantes precomprimidas
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+FINGERPRINT = re.compile(r"\.[0-9a-f]{12}\.[^.]+$")
+MANIFEST = "manifest.json"
+
+
+def write_if_changed(path, data):
+    if os.path.exists(path):
+        with open(path, "rb") as current:
+            if current.read() == data:
+                return False
+    with open(path, "wb") as target:
+        target.write(data)
+    return True
+
+
+def write_variants(path, data):
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            write_if_changed(path + suffix, compressed)
+
+
+# Copia cada estático con su nombre original y con el hash del contenido en el nombre
+# (styles3.css -> styles3.1a2b3c4d5e6f.css), más variantes .gz/.br para los textos.
+# Es idempotente: se puede ejecutar en el build de la imagen o en cada arranque.
+def build_assets(source_root=".", output=None, dirs=ASSET_DIRS):
+    output = output or config.STATIC_BUILD_DIR
+    manifest = {}
+    for directory in dirs:
+        source_dir = os.path.join(source_root, directory)
+        output_dir = os.path.join(output, directory)
+        os.makedirs(output_dir, exist_ok=True)
+        for name in sorted(os.listdir(source_dir)):
+            source = os.path.join(source_dir, name)
+            if not os.path.isfile(source):
+                continue
+            with open(source, "rb") as asset:
+                data = asset.read()
+            stem, extension = os.path.splitext(name)
+            hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+            for target in (name, hashed):
+                path = os.path.join(output_dir, target)
+                # Comprimir (brotli nivel 11) es lo caro: solo se hace si el archivo cambió
+                changed = write_if_changed(path, data)
+                if extension.lower() in COMPRESSIBLE and (changed or not os.path.exists(path + ".gz")):
+                    write_variants(path, data)
+            manifest[f"/{directory}/{name}"] = f"/{directory}/{hashed}"
+    write_if_changed(os.path.join(output, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return AssetManifest(manifest)
+
+
+class AssetManifest:
+    def __init__(self, mapping):
+        self.mapping = mapping
+
+    # Helper de Jinja: {{ asset_url('/styles/styles3.css') }}
+    def url(self, path):
+        return self.mapping.get("/" + path.lstrip("./"), path)
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+# StaticFiles que entrega la variante .br/.gz si el cliente la acepta, y marca como
+# inmutables los archivos con hash en el nombre
+class PrecompressedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        full_path = os.fspath(full_path)
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        response = None
+        for encoding, suffix in ENCODINGS:
+            variant = full_path + suffix
+            if encoding in accepted and os.path.isfile(variant):
+                media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+                response = FileResponse(variant, status_code=status_code, stat_result=os.stat(variant),
+                                        media_type=media_type, headers={"Content-Encoding": encoding})
+                break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE if FINGERPRINT.search(full_path) else "no-cache"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    manifest = build_assets()
+    print(f"{len(manifest.mapping)} assets written to {config.STATIC_BUILD_DIR}")
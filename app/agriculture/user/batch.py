@@ -0,0 +1,214 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Literal, Optional
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from sqlalchemy import insert, select
+from . import config
+from .bulk_import import HarvestRow, validation_message
+from .geo import pos_indexes, valid_coordinates
+from .models import Cultivo, Cosecha, PuntoVenta, Vehiculo, Encargo
+from .summaries import record_imported_harvests
+
+ATOMIC = "atomic"
+PARTIAL = "partial"
+
+
+# Esquemas de cada registro; los nombres son los mismos de los formularios
+class VehicleRow(BaseModel):
+    matricula: str = Field(max_length=50)
+    capacidad_carga: float = Field(gt=0)
+    id_cosecha: int
+
+    def to_record(self, user_id):
+        return {"Matricula": self.matricula, "Capacidad_Carga": self.capacidad_carga,
+                "ID_Cosecha": self.id_cosecha, "user_id": user_id}
+
+
+class PointOfSaleRow(BaseModel):
+    nombre: str = Field(max_length=50)
+    direccion: str = Field(max_length=100)
+    latitud: Optional[float] = None
+    longitud: Optional[float] = None
+
+    @model_validator(mode="after")
+    def check_location(self):
+        if (self.latitud is None) != (self.longitud is None) or (
+                self.latitud is not None and not valid_coordinates(self.latitud, self.longitud)):
+            raise ValueError("Latitude and longitude must be given together, in decimal degrees.")
+        return self
+
+    def to_record(self, user_id):
+        return {"Nombre": self.nombre, "Direccion": self.direccion, "Latitud": self.latitud,
+                "Longitud": self.longitud, "user_id": user_id}
+
+
+class AssignmentRow(BaseModel):
+    fecha: date
+    cantidad_producto: float = Field(gt=0)
+    id_vehiculo: int
+    punto_venta_id: int
+
+    def to_record(self, user_id):
+        return {"Fecha": self.fecha, "Cantidad_producto": self.cantidad_producto, "ID_Vehiculo": self.id_vehiculo,
+                "Punto_Venta_ID": self.punto_venta_id, "user_id": user_id}
+
+
+# Columna del registro que debe apuntar a un registro del mismo usuario
+@dataclass
+class Parent:
+    column: object
+    pk: object
+    owner: object
+    name: str
+
+
+@dataclass
+class BatchSpec:
+    model: type
+    schema: type
+    pk: object
+    parents: tuple = ()
+    # Se llama con (db, user_id, registros) después del INSERT, en la misma transacción
+    on_insert: Optional[Callable] = None
+    # Se llama con (user_id, registros con su id) después del commit
+    after_commit: Optional[Callable] = None
+
+
+def index_points_of_sale(user_id, records):
+    for record in records:
+        if record["Latitud"] is not None:
+            pos_indexes.add(user_id, record["ID_Punto_Venta"], record["Latitud"], record["Longitud"], record["Nombre"])
+
+
+BATCHES = {
+    "harvests": BatchSpec(Cosecha, HarvestRow, Cosecha.ID_Cosecha,
+                          parents=(Parent(Cosecha.ID_Cultivo, Cultivo.ID_Cultivo, Cultivo.user_id, "Crop"),),
+                          on_insert=record_imported_harvests),
+    "vehicles": BatchSpec(Vehiculo, VehicleRow, Vehiculo.ID_Vehiculo,
+                          parents=(Parent(Vehiculo.ID_Cosecha, Cosecha.ID_Cosecha, Cosecha.user_id, "Harvest"),)),
+    "points_of_sale": BatchSpec(PuntoVenta, PointOfSaleRow, PuntoVenta.ID_Punto_Venta,
+                                after_commit=index_points_of_sale),
+    "assignments": BatchSpec(Encargo, AssignmentRow, Encargo.ID_Encargo, parents=(
+        Parent(Encargo.ID_Vehiculo, Vehiculo.ID_Vehiculo, Vehiculo.user_id, "Vehicle"),
+        Parent(Encargo.Punto_Venta_ID, PuntoVenta.ID_Punto_Venta, PuntoVenta.user_id, "Point of sale"),
+    )),
+}
+
+
+class BatchRequest(BaseModel):
+    # atomic: si un registro falla no se inserta ninguno; partial: se insertan los válidos
+    mode: Literal["atomic", "partial"] = ATOMIC
+    records: list[dict] = Field(min_length=1, max_length=config.BATCH_MAX_RECORDS)
+
+
+@dataclass
+class BatchResult:
+    mode: str
+    # Id generado de cada registro, en el orden recibido (None si no se insertó)
+    ids: list
+    errors: list = field(default_factory=list)
+
+    @property
+    def inserted(self):
+        return sum(1 for record_id in self.ids if record_id is not None)
+
+    def fail(self, index, error):
+        self.errors.append({"index": index, "error": error})
+
+    def to_dict(self):
+        return {"mode": self.mode, "inserted": self.inserted, "ids": self.ids,
+                "errors": sorted(self.errors, key=lambda error: -1 if error["index"] is None else error["index"])}
+
+
+# Valida todos los registros juntos: esquema, ids repetidos y dueño de cada referencia, con una
+# consulta por tabla referenciada (no una por registro). Devuelve [(índice, registro)] aceptados.
+async def validate_batch(db, spec, rows, user_id, result):
+    valid = []
+    for index, data in enumerate(rows):
+        try:
+            valid.append((index, spec.schema.model_validate(data).to_record(user_id)))
+        except ValidationError as e:
+            result.fail(index, validation_message(e))
+
+    pk = spec.pk.key
+    ids = [record[pk] for _, record in valid if pk in record]
+    existing = set((await db.scalars(select(spec.pk).where(spec.pk.in_(ids)))).all()) if ids else set()
+    owned = {}
+    for parent in spec.parents:
+        parent_ids = {record[parent.column.key] for _, record in valid}
+        owned[parent.column.key] = set((await db.scalars(
+            select(parent.pk).where(parent.owner == user_id, parent.pk.in_(parent_ids))
+        )).all()) if parent_ids else set()
+
+    accepted = []
+    for index, record in valid:
+        if pk in record and record[pk] in existing:
+            result.fail(index, f"{pk} {record[pk]} already exists")
+            continue
+        missing = next((parent for parent in spec.parents if record[parent.column.key] not in owned[parent.column.key]),
+                       None)
+        if missing is not None:
+            result.fail(index, f"{missing.name} {record[missing.column.key]} not found or unauthorized access.")
+            continue
+        if pk in record:
+            existing.add(record[pk])
+        accepted.append((index, record))
+    return accepted
+
+
+# Un INSERT de varias filas con RETURNING por cada grupo de columnas (p. ej. cosechas con y sin id);
+# los ids vuelven en el orden de los registros
+async def insert_returning(db, spec, records):
+    groups = defaultdict(list)
+    for position, record in enumerate(records):
+        groups[tuple(record)].append(position)
+    ids = [None] * len(records)
+    for positions in groups.values():
+        statement = insert(spec.model).returning(spec.pk, sort_by_parameter_order=True)
+        generated = (await db.scalars(statement, [records[position] for position in positions])).all()
+        for position, record_id in zip(positions, generated):
+            ids[position] = record_id
+    return ids
+
+
+async def insert_accepted(db, spec, user_id, accepted):
+    records = [record for _, record in accepted]
+    ids = await insert_returning(db, spec, records)
+    if spec.on_insert is not None:
+        await spec.on_insert(db, user_id, records)
+    await db.commit()
+    for record, record_id in zip(records, ids):
+        record[spec.pk.key] = record_id
+    if spec.after_commit is not None:
+        spec.after_commit(user_id, records)
+    return ids
+
+
+# Inserta los registros en una transacción. En modo atomic cualquier error descarta el lote; en
+# modo partial se insertan los válidos, y si el INSERT falla (p. ej. una inserción concurrente con
+# el mismo id) se reintenta registro por registro para reportar cuáles fallan.
+async def write_batch(db, spec, rows, user_id, mode=ATOMIC):
+    result = BatchResult(mode, [None] * len(rows))
+    accepted = await validate_batch(db, spec, rows, user_id, result)
+    if not accepted or (mode == ATOMIC and result.errors):
+        await db.rollback()
+        return result
+    try:
+        ids = await insert_accepted(db, spec, user_id, accepted)
+        for (index, _), record_id in zip(accepted, ids):
+            result.ids[index] = record_id
+    except Exception as e:
+        await db.rollback()
+        if mode == ATOMIC:
+            # Error de todo el lote, sin índice
+            result.fail(None, str(e).splitlines()[0])
+            return result
+        for index, record in accepted:
+            try:
+                result.ids[index] = (await insert_accepted(db, spec, user_id, [(index, record)]))[0]
+            except Exception as error:
+                await db.rollback()
+                result.fail(index, str(error).splitlines()[0])
+    return result
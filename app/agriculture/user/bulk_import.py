@@ -0,0 +1,225 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import islice
+from typing import Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import insert, select
+from .models import Cultivo, Cosecha
+from .replicas import mark_write
+from .summaries import record_imported_harvests
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+# Esquemas de Pydantic para validar cada fila; los nombres son los mismos de los formularios
+class CropRow(BaseModel):
+    id_crop: int
+    crop_type: str = Field(max_length=50)
+    area: float = Field(gt=0)
+    planting_date: date
+    growing_state: str
+    needs: Optional[str] = None
+
+    def to_record(self, user_id):
+        return {
+            "ID_Cultivo": self.id_crop,
+            "Tipo": self.crop_type,
+            "Area_cultivada": self.area,
+            "Fecha_siembra": self.planting_date,
+            "Estado_crecimiento": self.growing_state,
+            "Necesidades_tratamiento": self.needs,
+            "user_id": user_id,
+        }
+
+
+class HarvestRow(BaseModel):
+    id_harvest: Optional[int] = None
+    id_crop: int
+    harvest_date: date
+    quantity: float = Field(ge=0)
+    area: float = Field(gt=0)
+
+    def to_record(self, user_id):
+        record = {
+            "Fecha_cosecha": self.harvest_date,
+            "Cantidad_cosecha": self.quantity,
+            "Area": self.area,
+            "ID_Cultivo": self.id_crop,
+            "user_id": user_id,
+        }
+        if self.id_harvest is not None:
+            record["ID_Cosecha"] = self.id_harvest
+        return record
+
+
+@dataclass
+class ImportSpec:
+    model: type
+    schema: type
+    pk: object
+    # Columna que debe apuntar a un registro del mismo usuario (p. ej. el cultivo de una cosecha)
+    parent: Optional[object] = None
+    parent_owner: Optional[object] = None
+    parent_name: str = ""
+    # Se llama con (db, user_id, registros) después de insertar cada bloque, en la misma transacción
+    on_insert: Optional[Callable] = None
+
+
+IMPORTS = {
+    "crops": ImportSpec(Cultivo, CropRow, Cultivo.ID_Cultivo),
+    "harvests": ImportSpec(Cosecha, HarvestRow, Cosecha.ID_Cosecha,
+                           parent=Cultivo.ID_Cultivo, parent_owner=Cultivo.user_id, parent_name="Crop",
+                           on_insert=record_imported_harvests),
+}
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def fail(self, line, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def to_dict(self):
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def detect_format(filename, requested=None):
+    fmt = (requested or "").lower()
+    if fmt in ("csv", "ndjson"):
+        return fmt
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+# Lee el archivo fila por fila sin cargarlo completo en memoria: (línea, datos, error)
+def read_rows(file, fmt):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}, None
+        return
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if isinstance(data, dict):
+            yield line_number, data, None
+        else:
+            yield line_number, None, "Each line must be a JSON object"
+
+
+def validation_message(error):
+    return "; ".join(f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors())
+
+
+async def bulk_insert(db, model, records):
+    connection = await db.connection()
+    # Las filas se agrupan por columnas presentes (p. ej. cosechas con y sin id)
+    groups = defaultdict(list)
+    for record in records:
+        groups[tuple(record)].append(record)
+    for columns, rows in groups.items():
+        if connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg":
+            # COPY ... FROM STDIN a través de asyncpg; no pasa por el cursor, así que se marca la escritura aquí
+            mark_write()
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                model.__tablename__, columns=list(columns), records=[tuple(row[c] for c in columns) for row in rows]
+            )
+        else:
+            # executemany
+            await db.execute(insert(model), rows)
+
+
+async def import_chunk(db, spec, chunk, user_id, report):
+    valid = []
+    for line, data, error in chunk:
+        if error:
+            report.fail(line, error)
+            continue
+        try:
+            valid.append((line, spec.schema.model_validate(data).to_record(user_id)))
+        except ValidationError as e:
+            report.fail(line, validation_message(e))
+
+    # Claves ya existentes o repetidas dentro del archivo
+    pk = spec.pk.key
+    ids = [record[pk] for _, record in valid if pk in record]
+    existing = set((await db.scalars(select(spec.pk).where(spec.pk.in_(ids)))).all()) if ids else set()
+    owned = None
+    if spec.parent is not None:
+        parent_ids = {record[spec.parent.key] for _, record in valid}
+        owned = set((await db.scalars(
+            select(spec.parent).where(spec.parent_owner == user_id, spec.parent.in_(parent_ids))
+        )).all()) if parent_ids else set()
+
+    accepted = []
+    for line, record in valid:
+        if pk in record and record[pk] in existing:
+            report.fail(line, f"{pk} {record[pk]} already exists")
+            continue
+        if owned is not None and record[spec.parent.key] not in owned:
+            report.fail(line, f"{spec.parent_name} {record[spec.parent.key]} not found or unauthorized access.")
+            continue
+        if pk in record:
+            existing.add(record[pk])
+        accepted.append((line, record))
+
+    if not accepted:
+        return
+    try:
+        records = [record for _, record in accepted]
+        await bulk_insert(db, spec.model, records)
+        if spec.on_insert is not None:
+            await spec.on_insert(db, user_id, records)
+        await db.commit()
+        report.inserted += len(accepted)
+    except Exception:
+        await db.rollback()
+        # Si el bloque falla (p. ej. una inserción concurrente), se reintenta fila por fila para reportar cuáles fallan
+        for line, record in accepted:
+            try:
+                await db.execute(insert(spec.model), [record])
+                if spec.on_insert is not None:
+                    await spec.on_insert(db, user_id, [record])
+                await db.commit()
+                report.inserted += 1
+            except Exception as e:
+                await db.rollback()
+                report.fail(line, str(e).splitlines()[0])
+
+
+# Valida e inserta por bloques de CHUNK_SIZE filas; cada bloque se confirma por separado,
+# así un error solo descarta sus filas y el resto del archivo se carga igual.
+async def import_file(db, spec, file, fmt, user_id):
+    report = ImportReport()
+    rows = read_rows(file, fmt)
+    while True:
+        chunk = await run_in_threadpool(lambda: list(islice(rows, CHUNK_SIZE)))
+        if not chunk:
+            report.errors.sort(key=lambda error: error["line"])
+            return report
+        await import_chunk(db, spec, chunk, user_id, report)
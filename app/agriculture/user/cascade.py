@@ -0,0 +1,38 @@
+from sqlalchemy import delete, select, update
+from .models import Cultivo, Cosecha, Silo, Vehiculo, Encargo, MovimientoSilo, PronosticoCosecha
+from .summaries import record_harvests_where
+
+
+# Elimina los cultivos indicados del usuario y todo lo que depende de ellos (cosechas, silos y su
+# libro de movimientos, vehículos y sus encargos, pronósticos) con un DELETE por tabla, de las hojas hacia la
+# raíz, en una sola transacción. Las claves foráneas también tienen ON DELETE CASCADE; hacerlo explícito mantiene
+# el mismo comportamiento en bases sin migrar o sin claves foráneas activas (SQLite) y da los conteos.
+# Los ids que no existen o son de otro usuario se ignoran. Devuelve las filas borradas por tabla.
+async def delete_crops(db, user_id, crop_ids):
+    crops = select(Cultivo.ID_Cultivo).where(Cultivo.user_id == user_id, Cultivo.ID_Cultivo.in_(set(crop_ids)))
+    harvests = select(Cosecha.ID_Cosecha).where(Cosecha.ID_Cultivo.in_(crops))
+    vehicles = select(Vehiculo.ID_Vehiculo).where(Vehiculo.ID_Cosecha.in_(harvests))
+    silos = select(Silo.ID_Silo).where(Silo.ID_Cosecha.in_(harvests))
+    assignments = select(Encargo.ID_Encargo).where(Encargo.ID_Vehiculo.in_(vehicles))
+
+    await record_harvests_where(db, Cosecha.ID_Cultivo.in_(crops), sign=-1)
+
+    # Los movimientos de otros silos conservan la cantidad pero pierden la referencia (ON DELETE SET NULL)
+    await db.execute(update(MovimientoSilo).where(MovimientoSilo.ID_Cosecha.in_(harvests))
+                     .values(ID_Cosecha=None).execution_options(synchronize_session=False))
+    await db.execute(update(MovimientoSilo).where(MovimientoSilo.ID_Encargo.in_(assignments))
+                     .values(ID_Encargo=None).execution_options(synchronize_session=False))
+
+    deleted = {}
+    for table, statement in (
+        ("movimiento_silo", delete(MovimientoSilo).where(MovimientoSilo.ID_Silo.in_(silos))),
+        ("encargo", delete(Encargo).where(Encargo.ID_Vehiculo.in_(vehicles))),
+        ("vehiculo", delete(Vehiculo).where(Vehiculo.ID_Cosecha.in_(harvests))),
+        ("silo", delete(Silo).where(Silo.ID_Cosecha.in_(harvests))),
+        ("pronostico_cosecha", delete(PronosticoCosecha).where(PronosticoCosecha.ID_Cultivo.in_(crops))),
+        ("cosecha", delete(Cosecha).where(Cosecha.ID_Cultivo.in_(crops))),
+        ("cultivo", delete(Cultivo).where(Cultivo.ID_Cultivo.in_(crops))),
+    ):
+        result = await db.execute(statement.execution_options(synchronize_session=False))
+        deleted[table] = result.rowcount
+    return deleted
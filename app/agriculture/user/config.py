@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 APP_ENV = os.getenv('APP_ENV', 'development')
 DATABASE_USERNAME = os.getenv('DATABASE_USERNAME', 'adm')
@@ -6,3 +7,105 @@ DATABASE_PASSWORD = os.getenv('DATABASE_PASSWORD', '12345')
 DATABASE_HOST = os.getenv('DATABASE_HOST', 'postgresql')
 DATABASE_NAME = os.getenv('DATABASE_NAME', 'agriculture')
 TEST_DATABASE_NAME = os.getenv('DATABASE_NAME', 'agriculture_test')
+
+# URL completa de la base de datos (docker-compose la define); si no existe se arma con los datos anteriores
+DATABASE_URL = os.getenv('DATABASE_URL', f"postgresql://{DATABASE_USERNAME}:{DATABASE_PASSWORD}@{DATABASE_HOST}/{DATABASE_NAME}")
+# URL para el motor asíncrono; vacía significa derivarla de DATABASE_URL (asyncpg / aiosqlite)
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL', '')
+
+# Pool de conexiones (por proceso worker)
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', '100'))
+# Si no se definen, se calculan repartiendo DB_MAX_CONNECTIONS entre los workers
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '0'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '-1'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+# Milisegundos; 0 desactiva el límite (solo PostgreSQL)
+DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', '0'))
+# Segundos de espera por una conexión a partir de los cuales se registra una advertencia
+DB_POOL_SLOW_WAIT = float(os.getenv('DB_POOL_SLOW_WAIT', '0.5'))
+
+# Sesiones firmadas. La clave de desarrollo es pública: fuera de APP_ENV=development SECRET_KEY es obligatoria
+DEV_SECRET_KEY = 'dev-secret-key-change-me'
+SECRET_KEY = os.getenv('SECRET_KEY', '')
+SESSION_MAX_AGE = int(os.getenv('SESSION_MAX_AGE', '28800'))
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '1024'))
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '300'))
+# Cada cuántos segundos cada worker copia de la base los tokens revocados por logout en cualquier worker
+SESSION_REVOCATION_SYNC = float(os.getenv('SESSION_REVOCATION_SYNC', '2'))
+# Encabezado X-Internal-Token que piden los endpoints /internal/*; vacío los desactiva (responden 404)
+INTERNAL_TOKEN = os.getenv('INTERNAL_TOKEN', '')
+
+# Hash de contraseñas (argon2id); memoria en KiB
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', '3'))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', '65536'))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', '1'))
+# Hilos dedicados al hash y cuántas operaciones pueden esperar antes de rechazar nuevas. 0 reparte
+# las CPUs entre los WEB_CONCURRENCY workers (ver hash_threads_per_worker)
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', '0'))
+HASH_QUEUE_LIMIT = int(os.getenv('HASH_QUEUE_LIMIT', '64'))
+
+# Directorio del caché de bytecode de Jinja (compartido entre workers y reinicios)
+TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'agriculture-jinja'))
+
+# Directorio donde se generan los estáticos con hash y sus variantes gzip/brotli
+STATIC_BUILD_DIR = os.getenv('STATIC_BUILD_DIR', 'static_build')
+
+# Arranque: verificación de la versión del esquema contra Alembic ('off', 'warn' o 'strict')
+SCHEMA_CHECK = os.getenv('SCHEMA_CHECK', 'warn')
+ALEMBIC_SCRIPT_LOCATION = os.getenv(
+    'ALEMBIC_SCRIPT_LOCATION', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'alembic'))
+)
+# Segundos que se reintenta conectar mientras PostgreSQL termina de arrancar
+DB_STARTUP_TIMEOUT = float(os.getenv('DB_STARTUP_TIMEOUT', '60'))
+# Conexiones que se abren en paralelo al arrancar; 0 las abre a demanda
+DB_POOL_WARM = int(os.getenv('DB_POOL_WARM', '0'))
+# Con varios workers, segundos entre el arranque del pool de un worker y el del siguiente
+DB_POOL_STAGGER = float(os.getenv('DB_POOL_STAGGER', '0.5'))
+# Posición de este proceso entre los workers (la asigna serve.py; 0 con un solo proceso)
+WORKER_INDEX = int(os.getenv('WORKER_INDEX', '0'))
+
+# Libro de movimientos de silos: cada cuántos segundos se compacta y cuántos días se conservan en detalle
+LEDGER_COMPACT_INTERVAL = int(os.getenv('LEDGER_COMPACT_INTERVAL', '3600'))
+LEDGER_RETENTION_DAYS = int(os.getenv('LEDGER_RETENTION_DAYS', '90'))
+
+# Caché de analítica de ventas (resultados por usuario; se invalida al registrar una venta)
+ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', '256'))
+ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', '600'))
+
+# Tiempo máximo (ms) de mejora local del planificador de cargas, después de first-fit decreasing
+PLANNER_TIME_BUDGET_MS = float(os.getenv('PLANNER_TIME_BUDGET_MS', '200'))
+
+# Índice geográfico de puntos de venta: tamaño de celda en grados y segundos antes de recargarlo
+GEO_CELL_DEGREES = float(os.getenv('GEO_CELL_DEGREES', '0.1'))
+GEO_INDEX_TTL = int(os.getenv('GEO_INDEX_TTL', '300'))
+
+# Pronóstico de cosechas: cada cuántos segundos se recalcula y cosechas mínimas para la curva de un tipo
+FORECAST_INTERVAL = int(os.getenv('FORECAST_INTERVAL', '21600'))
+FORECAST_MIN_SAMPLES = int(os.getenv('FORECAST_MIN_SAMPLES', '5'))
+
+# Registros por solicitud en los endpoints de escritura por lotes (/api/v1/<entidad>/batch)
+BATCH_MAX_RECORDS = int(os.getenv('BATCH_MAX_RECORDS', '5000'))
+
+# Métricas por ruta (latencia, consultas SQL, render de plantillas) expuestas en /metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Presupuesto de consultas por ruta (@query_budget): 'off', 'log' o 'raise' (pruebas)
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'log')
+# Cargas perezosas del ORM durante el render de plantillas: 'off', 'warn' o 'strict' (lanza LazyLoadError)
+LAZY_LOAD_CHECK = os.getenv('LAZY_LOAD_CHECK', 'warn')
+
+# Réplicas de lectura (URLs separadas por comas, mismo formato que DATABASE_URL); vacío lee del primario
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+# Cada cuántos segundos se verifica cada réplica y cuánto se espera su respuesta
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', '10'))
+REPLICA_CHECK_TIMEOUT = float(os.getenv('REPLICA_CHECK_TIMEOUT', '2'))
+# Segundos que las lecturas de un usuario van al primario después de que escribe (leer sus propias escrituras)
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+
+# Servidor de producción (serve.py): solicitudes antes de reciclar un worker (0 nunca), variación
+# aleatoria para que no se reciclen todos a la vez y segundos para terminar las solicitudes en curso al apagar
+WORKER_MAX_REQUESTS = int(os.getenv('WORKER_MAX_REQUESTS', '10000'))
+WORKER_MAX_REQUESTS_JITTER = int(os.getenv('WORKER_MAX_REQUESTS_JITTER', '1000'))
+WORKER_GRACEFUL_TIMEOUT = int(os.getenv('WORKER_GRACEFUL_TIMEOUT', '25'))
@@ -1,7 +1,12 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from starlette.requests import Request
 from . import config
+from .pool import pool_size_per_worker, TimedQueuePool, TimedAsyncQueuePool
+from .replicas import ReplicaSet, reads_from_primary, track_writes
 
 DATABASE_USERNAME = config.DATABASE_USERNAME
 DATABASE_PASSWORD = config.DATABASE_PASSWORD
@@ -9,16 +14,74 @@ DATABASE_HOST = config.DATABASE_HOST
 DATABASE_NAME = config.DATABASE_NAME
 
 # URL de la base de datos PostgreSQL
-SQLALCHEMY_DATABASE_URL = f"postgresql://{DATABASE_USERNAME}:{DATABASE_PASSWORD}@{DATABASE_HOST}/{DATABASE_NAME}"
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+# Driver asíncrono que corresponde a cada motor síncrono
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_url(url):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+SQLALCHEMY_ASYNC_DATABASE_URL = config.ASYNC_DATABASE_URL or get_async_url(SQLALCHEMY_DATABASE_URL)
+
+# Opciones del pool tomadas de config.py; sin valores explícitos se reparten las conexiones entre workers
+def get_engine_options(url, asynchronous=False):
+    url = make_url(url)
+    pool_size, max_overflow = pool_size_per_worker(config.DB_MAX_CONNECTIONS, config.WEB_CONCURRENCY)
+    options = {
+        "poolclass": TimedAsyncQueuePool if asynchronous else TimedQueuePool,
+        "pool_size": config.DB_POOL_SIZE or pool_size,
+        "max_overflow": max_overflow if config.DB_MAX_OVERFLOW < 0 else config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    if config.DB_STATEMENT_TIMEOUT and url.get_backend_name() == "postgresql":
+        if asynchronous:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(config.DB_STATEMENT_TIMEOUT)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT}"}
+    return options
 
 # Configurar SQLAlchemy
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# El motor síncrono solo lo usan scripts y migraciones, así que su pool normalmente queda vacío
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **get_engine_options(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Motor y sesiones asíncronas para los endpoints `async def`
+# expire_on_commit=False evita recargas perezosas (no permitidas en asyncio) al renderizar después del commit
+async_engine = create_async_engine(
+    SQLALCHEMY_ASYNC_DATABASE_URL, **get_engine_options(SQLALCHEMY_ASYNC_DATABASE_URL, asynchronous=True)
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+# Las escrituras en el primario mandan las siguientes lecturas del mismo usuario al primario
+track_writes(async_engine.sync_engine)
+
+# Réplicas de lectura (DATABASE_REPLICA_URLS); cada una con su pool, del mismo tamaño que el del primario
+replicas = ReplicaSet(
+    create_async_engine(get_async_url(url), **get_engine_options(get_async_url(url), asynchronous=True))
+    for url in config.DATABASE_REPLICA_URLS
+)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Para handlers de solo lectura: sesión de una réplica sana (round-robin), o del primario si no hay
+# réplicas sanas o si este usuario escribió hace menos de REPLICA_STICKY_SECONDS
+async def get_read_db(request: Request):
+    session_factory = None if reads_from_primary(request) else replicas.session_factory()
+    async with (session_factory or AsyncSessionLocal)() as db:
+        yield db
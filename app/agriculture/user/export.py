@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from .database import AsyncSessionLocal
+from .models import Cosecha, Venta, Encargo
+
+# Filas que se piden al cursor del servidor en cada lote
+YIELD_PER = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+@dataclass
+class ExportSpec:
+    columns: tuple
+    pk: object
+    owner: object
+    date_column: object
+
+
+EXPORTS = {
+    "harvests": ExportSpec(
+        (Cosecha.ID_Cosecha, Cosecha.Fecha_cosecha, Cosecha.Cantidad_cosecha, Cosecha.Area, Cosecha.ID_Cultivo),
+        Cosecha.ID_Cosecha, Cosecha.user_id, Cosecha.Fecha_cosecha
+    ),
+    "sales": ExportSpec(
+        (Venta.ID_Venta, Venta.Fecha, Venta.Cantidad_vendida, Venta.Precio, Venta.ID_Punto_Venta),
+        Venta.ID_Venta, Venta.user_id, Venta.Fecha
+    ),
+    "assignments": ExportSpec(
+        (Encargo.ID_Encargo, Encargo.Fecha, Encargo.Cantidad_producto, Encargo.ID_Vehiculo, Encargo.Punto_Venta_ID),
+        Encargo.ID_Encargo, Encargo.user_id, Encargo.Fecha
+    ),
+}
+
+
+def export_query(spec, user_id, date_from=None, date_to=None):
+    query = select(*spec.columns).where(spec.owner == user_id)
+    if date_from:
+        query = query.where(spec.date_column >= date_from)
+    if date_to:
+        query = query.where(spec.date_column <= date_to)
+    return query.order_by(spec.pk).execution_options(yield_per=YIELD_PER)
+
+
+def format_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def format_ndjson(names, rows):
+    # default=str: fechas en ISO 8601 y DECIMAL como texto para no perder precisión
+    return "".join(json.dumps(dict(zip(names, row)), default=str) + "\n" for row in rows).encode()
+
+
+# Genera el archivo por lotes desde un cursor del lado del servidor (stream_results),
+# con memoria constante. La sesión es propia porque la de `get_async_db` se cierra al volver el handler.
+async def export_rows(spec, user_id, fmt, date_from=None, date_to=None):
+    names = [column.key for column in spec.columns]
+    if fmt == "csv":
+        # La cabecera sale antes de ejecutar la consulta
+        yield format_csv([names])
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(export_query(spec, user_id, date_from, date_to))
+        async for rows in result.partitions():
+            yield format_csv(rows) if fmt == "csv" else format_ndjson(names, rows)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import delete, exists, func, insert, select
+from . import config
+from .database import AsyncSessionLocal
+from .models import Cultivo, Cosecha, PronosticoCosecha
+
+logger = logging.getLogger(__name__)
+
+GENERAL = "general"
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Curvas por tipo de cultivo, ajustadas con sumas agrupadas (bincount) sobre el historial:
+# días de siembra a cosecha (promedio) y rendimiento por unidad de área como recta en función
+# de esos días (mínimos cuadrados). Los tipos con menos de min_samples cosechas usan la curva
+# general de todos los tipos.
+class YieldCurves:
+    def __init__(self, types, samples, days, intercept, slope, min_samples):
+        self.types = types
+        self.samples = samples
+        self.days = days
+        self.intercept = intercept
+        self.slope = slope
+        # Nombre del modelo usado por cada curva (el tipo, o "general" si tiene pocas cosechas)
+        self.models = [str(t) if count >= min_samples else GENERAL for t, count in zip(types, samples)] + [GENERAL]
+        # Cosechas en las que se basa cada curva
+        self.model_samples = [int(count if model != GENERAL else samples[-1])
+                              for model, count in zip(self.models, samples)]
+
+    @classmethod
+    def fit(cls, crop_types, days, yields, min_samples=None):
+        min_samples = min_samples or config.FORECAST_MIN_SAMPLES
+        types, index = np.unique(np.asarray(crop_types, dtype=object).astype(str), return_inverse=True)
+        # El último grupo es la curva general (todas las cosechas)
+        groups = np.concatenate([index, np.full(len(index), len(types))])
+        x = np.concatenate([days, days]).astype(np.float64)
+        y = np.concatenate([yields, yields]).astype(np.float64)
+        size = len(types) + 1
+
+        n = np.bincount(groups, minlength=size).astype(np.float64)
+        sx = np.bincount(groups, weights=x, minlength=size)
+        sy = np.bincount(groups, weights=y, minlength=size)
+        sxx = np.bincount(groups, weights=x * x, minlength=size)
+        sxy = np.bincount(groups, weights=x * y, minlength=size)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_x, mean_y = sx / n, sy / n
+            variance = sxx / n - mean_x ** 2
+            slope = np.where(variance > 1e-9, (sxy / n - mean_x * mean_y) / variance, 0.0)
+        intercept = mean_y - slope * mean_x
+
+        # Tipos con pocas cosechas: curva general
+        sparse = n[:-1] < min_samples
+        mean_x[:-1][sparse] = mean_x[-1]
+        slope[:-1][sparse] = slope[-1]
+        intercept[:-1][sparse] = intercept[-1]
+        return cls(types, n, mean_x, intercept, slope, min_samples)
+
+    # Índice de curva para cada tipo (la general si el tipo no tiene historial)
+    def lookup(self, crop_types):
+        crop_types = np.asarray(crop_types, dtype=object).astype(str)
+        position = np.searchsorted(self.types, crop_types)
+        position = np.clip(position, 0, max(len(self.types) - 1, 0))
+        found = (self.types[position] == crop_types) if len(self.types) else np.zeros(len(crop_types), dtype=bool)
+        return np.where(found, position, len(self.types))
+
+    # Fecha y cantidad esperadas de todos los cultivos de una vez
+    def predict(self, crop_types, planting_dates, areas):
+        curve = self.lookup(crop_types)
+        days = np.rint(self.days[curve]).astype(np.int64)
+        expected_dates = np.asarray(planting_dates, dtype="datetime64[D]") + days
+        per_area = np.clip(self.intercept[curve] + self.slope[curve] * days, 0, None)
+        return expected_dates, per_area * np.asarray(areas, dtype=np.float64), curve
+
+
+async def load_history(db):
+    result = await db.execute(
+        select(Cultivo.Tipo, Cultivo.Fecha_siembra, Cosecha.Fecha_cosecha, Cosecha.Cantidad_cosecha, Cosecha.Area)
+        .join(Cultivo, Cultivo.ID_Cultivo == Cosecha.ID_Cultivo)
+        .where(Cosecha.Area > 0, Cosecha.Fecha_cosecha >= Cultivo.Fecha_siembra)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    crop_types, planted, harvested, quantities, areas = zip(*rows)
+    days = (np.array(harvested, dtype="datetime64[D]") - np.array(planted, dtype="datetime64[D]")).astype(np.int64)
+    return crop_types, days, np.array(quantities, dtype=np.float64) / np.array(areas, dtype=np.float64)
+
+
+# Cultivos activos: sin cosechas registradas ni fecha de cosecha
+def active_crops():
+    return (
+        select(Cultivo.ID_Cultivo, Cultivo.user_id, Cultivo.Tipo, Cultivo.Fecha_siembra, Cultivo.Area_cultivada)
+        .where(Cultivo.Fecha_cosecha.is_(None), ~exists().where(Cosecha.ID_Cultivo == Cultivo.ID_Cultivo))
+    )
+
+
+# Ajusta las curvas, calcula el pronóstico de todos los cultivos activos en un solo lote y
+# reemplaza la tabla de pronósticos. Devuelve cuántos cultivos se pronosticaron.
+async def run_forecast(db):
+    history = await load_history(db)
+    crops = (await db.execute(active_crops())).all()
+    await db.execute(delete(PronosticoCosecha))
+    if history is None or not crops:
+        return 0
+
+    curves = YieldCurves.fit(*history)
+    crop_ids, user_ids, crop_types, planted, areas = zip(*crops)
+    expected_dates, quantities, curve = curves.predict(crop_types, planted, areas)
+    computed_at = utcnow()
+    await db.execute(insert(PronosticoCosecha), [
+        {"ID_Cultivo": crop_id, "user_id": user_id, "Fecha_esperada": expected.astype(date),
+         "Cantidad_esperada": round(float(quantity), 4), "Modelo": curves.models[c],
+         "Muestras": curves.model_samples[c], "Calculado": computed_at}
+        for crop_id, user_id, expected, quantity, c in zip(crop_ids, user_ids, expected_dates, quantities, curve)
+    ])
+    return len(crops)
+
+
+# Pronósticos ya calculados para los cultivos de una página: {id: (fecha, cantidad)}
+async def forecasts_for(db, crop_ids):
+    if not crop_ids:
+        return {}
+    result = await db.execute(
+        select(PronosticoCosecha.ID_Cultivo, PronosticoCosecha.Fecha_esperada, PronosticoCosecha.Cantidad_esperada)
+        .where(PronosticoCosecha.ID_Cultivo.in_(crop_ids))
+    )
+    return {crop_id: (expected_date, quantity) for crop_id, expected_date, quantity in result}
+
+
+# Tarea de fondo del lifespan; empieza un minuto después del arranque. Con varios workers,
+# el que encuentra pronósticos recientes (de menos de medio intervalo) no vuelve a calcularlos.
+async def forecast_periodically(interval=None, delay=60):
+    interval = interval or config.FORECAST_INTERVAL
+    await asyncio.sleep(delay)
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                latest = await db.scalar(select(func.max(PronosticoCosecha.Calculado)))
+                if latest is None or utcnow() - latest > timedelta(seconds=interval / 2):
+                    count = await run_forecast(db)
+                    await db.commit()
+                    logger.info("Forecast %d active crops", count)
+        except Exception as e:
+            logger.warning("Harvest forecast failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+async def forecast_all():
+    async with AsyncSessionLocal() as db:
+        count = await run_forecast(db)
+        await db.commit()
+    return count
+
+
+# python -m agriculture.user.forecast  (desde app/): recalcula todos los pronósticos
+if __name__ == "__main__":
+    print(f"{asyncio.run(forecast_all())} active crops forecast")
@@ -0,0 +1,188 @@
+import math
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import select
+from . import config
+from .models import Cultivo, PuntoVenta
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def valid_coordinates(latitude, longitude):
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+# Distancia de haversine en km; acepta escalares o arreglos (con broadcasting)
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+# Matriz de distancias (n x m) entre dos listas de (lat, lon), para costear rutas
+def distance_matrix(origins, destinations):
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+    destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+    return haversine(origins[:, :1], origins[:, 1:], destinations[:, 0][None, :], destinations[:, 1][None, :])
+
+
+# Índice de grilla (celdas de cell_deg grados) sobre puntos (id, lat, lon, nombre). Agregar un
+# punto solo toca su celda; las consultas miden distancias (vectorizadas) solo en las celdas cercanas.
+class GridIndex:
+    def __init__(self, cell_deg=None):
+        self.cell_deg = cell_deg or config.GEO_CELL_DEGREES
+        self.cells = defaultdict(list)
+        self.points = {}
+
+    def cell(self, latitude, longitude):
+        return int(math.floor(latitude / self.cell_deg)), int(math.floor(longitude / self.cell_deg))
+
+    def add(self, point_id, latitude, longitude, name=None):
+        if point_id in self.points:
+            self.remove(point_id)
+        self.points[point_id] = (latitude, longitude, name)
+        self.cells[self.cell(latitude, longitude)].append(point_id)
+
+    def remove(self, point_id):
+        latitude, longitude, _ = self.points.pop(point_id)
+        key = self.cell(latitude, longitude)
+        self.cells[key].remove(point_id)
+        if not self.cells[key]:
+            del self.cells[key]
+
+    def __len__(self):
+        return len(self.points)
+
+    def _ring(self, center, radius):
+        row, column = center
+        if radius == 0:
+            return [center]
+        keys = []
+        for offset in range(-radius, radius + 1):
+            keys += [(row - radius, column + offset), (row + radius, column + offset)]
+        for offset in range(-radius + 1, radius):
+            keys += [(row + offset, column - radius), (row + offset, column + radius)]
+        return keys
+
+    def _distances(self, ids, latitude, longitude):
+        coordinates = np.array([self.points[point_id][:2] for point_id in ids], dtype=np.float64).reshape(-1, 2)
+        return haversine(latitude, longitude, coordinates[:, 0], coordinates[:, 1])
+
+    def _result(self, ids, distances, order):
+        return [{"id": ids[i], "name": self.points[ids[i]][2], "latitude": self.points[ids[i]][0],
+                 "longitude": self.points[ids[i]][1], "distance_km": round(float(distances[i]), 4)} for i in order]
+
+    # Distancia mínima (km) a cualquier punto fuera de los anillos ya revisados: el ancho de
+    # las celdas, con la longitud escalada por el coseno de la latitud más alejada del ecuador
+    def _ring_bound(self, latitude, radius):
+        farthest = min(abs(latitude) + (radius + 1) * self.cell_deg, 90)
+        return radius * self.cell_deg * KM_PER_DEGREE * max(math.cos(math.radians(farthest)), 0)
+
+    # Los k puntos más cercanos: se revisan anillos de celdas hasta que el siguiente anillo no
+    # puede contener nada más cerca que el k-ésimo encontrado. Si los anillos ya abarcan más
+    # celdas de las que hay ocupadas, se miden todos los puntos. (No cruza el antimeridiano.)
+    def nearest(self, latitude, longitude, k=5):
+        if not self.points:
+            return []
+        k = min(k, len(self.points))
+        center = self.cell(latitude, longitude)
+        ids = []
+        radius = 0
+        while True:
+            if (2 * radius + 1) ** 2 > len(self.cells):
+                ids = list(self.points)
+                break
+            for key in self._ring(center, radius):
+                ids.extend(self.cells.get(key, ()))
+            if len(ids) >= k:
+                kth = np.partition(self._distances(ids, latitude, longitude), k - 1)[k - 1]
+                if kth <= self._ring_bound(latitude, radius):
+                    break
+            radius += 1
+        distances = self._distances(ids, latitude, longitude)
+        order = np.argsort(distances, kind="stable")[:k]
+        return self._result(ids, distances, order)
+
+    # Puntos a menos de radius_km, ordenados por distancia
+    def within(self, latitude, longitude, radius_km):
+        lat_cells = math.ceil(radius_km / KM_PER_DEGREE / self.cell_deg) + 1
+        farthest = min(abs(latitude) + radius_km / KM_PER_DEGREE, 89.9)
+        lon_degrees = radius_km / (KM_PER_DEGREE * math.cos(math.radians(farthest)))
+        lon_cells = min(math.ceil(lon_degrees / self.cell_deg) + 1, int(360 / self.cell_deg))
+        row, column = self.cell(latitude, longitude)
+        if (2 * lat_cells + 1) * (2 * lon_cells + 1) > len(self.cells):
+            ids = list(self.points)
+        else:
+            ids = [point_id
+                   for r in range(row - lat_cells, row + lat_cells + 1)
+                   for c in range(column - lon_cells, column + lon_cells + 1)
+                   for point_id in self.cells.get((r, c), ())]
+        if not ids:
+            return []
+        distances = self._distances(ids, latitude, longitude)
+        inside = np.flatnonzero(distances <= radius_km)
+        order = inside[np.argsort(distances[inside], kind="stable")]
+        return self._result(ids, distances, order)
+
+
+# Un índice de puntos de venta por usuario, cargado con una consulta la primera vez y actualizado
+# al registrar puntos. Es por proceso; se recarga cada GEO_INDEX_TTL segundos para recoger los
+# puntos registrados en otros workers.
+class PointOfSaleIndexes:
+    def __init__(self, ttl=None):
+        self.ttl = ttl or config.GEO_INDEX_TTL
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    async def get(self, db, user_id):
+        entry = self._indexes.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        index = GridIndex()
+        result = await db.execute(
+            select(PuntoVenta.ID_Punto_Venta, PuntoVenta.Latitud, PuntoVenta.Longitud, PuntoVenta.Nombre)
+            .where(PuntoVenta.user_id == user_id, PuntoVenta.Latitud.is_not(None), PuntoVenta.Longitud.is_not(None))
+        )
+        for point_id, latitude, longitude, name in result:
+            index.add(point_id, latitude, longitude, name)
+        with self._lock:
+            self._indexes[user_id] = (time.monotonic() + self.ttl, index)
+        return index
+
+    # Punto nuevo: si el índice del usuario ya está cargado se agrega ahí, sin recargar
+    def add(self, user_id, point_id, latitude, longitude, name=None):
+        entry = self._indexes.get(user_id)
+        if entry is not None:
+            with self._lock:
+                entry[1].add(point_id, latitude, longitude, name)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+pos_indexes = PointOfSaleIndexes()
+
+
+# Distancias de cada cultivo (finca) con coordenadas a cada punto de venta con coordenadas
+async def farm_to_pos_matrix(db, user_id):
+    farms = (await db.execute(
+        select(Cultivo.ID_Cultivo, Cultivo.Latitud, Cultivo.Longitud)
+        .where(Cultivo.user_id == user_id, Cultivo.Latitud.is_not(None), Cultivo.Longitud.is_not(None))
+        .order_by(Cultivo.ID_Cultivo)
+    )).all()
+    points = (await db.execute(
+        select(PuntoVenta.ID_Punto_Venta, PuntoVenta.Latitud, PuntoVenta.Longitud)
+        .where(PuntoVenta.user_id == user_id, PuntoVenta.Latitud.is_not(None), PuntoVenta.Longitud.is_not(None))
+        .order_by(PuntoVenta.ID_Punto_Venta)
+    )).all()
+    matrix = distance_matrix([row[1:] for row in farms], [row[1:] for row in points]) if farms and points else []
+    return {
+        "farms": [row[0] for row in farms],
+        "points_of_sale": [row[0] for row in points],
+        "km": np.round(matrix, 4).tolist() if len(matrix) else [],
+    }
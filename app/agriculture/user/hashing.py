@@ -0,0 +1,88 @@
+import asyncio
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from . import config
+
+
+class HashingBusy(Exception):
+    pass
+
+
+# Reparte las CPUs entre los workers del servidor, como pool_size_per_worker con las conexiones: los
+# hashes simultáneos de todos los procesos no pasan de las CPUs, ni la memoria de ARGON2_MEMORY_COST por hash
+def hash_threads_per_worker(cpus, workers):
+    return max(cpus // max(workers, 1), 1)
+
+
+# argon2 libera el GIL mientras calcula, así que un pool de hilos aprovecha varios núcleos
+# sin bloquear el event loop. La cola está acotada: si se llena se rechaza en vez de acumular.
+class PasswordHashingService:
+    def __init__(self, workers=None, queue_limit=None, time_cost=None, memory_cost=None, parallelism=None):
+        self.hasher = PasswordHasher(
+            time_cost=time_cost or config.ARGON2_TIME_COST,
+            memory_cost=memory_cost or config.ARGON2_MEMORY_COST,
+            parallelism=parallelism or config.ARGON2_PARALLELISM,
+        )
+        self.workers = (workers or config.HASH_WORKERS
+                        or hash_threads_per_worker(os.cpu_count() or 1, config.WEB_CONCURRENCY))
+        self.queue_limit = queue_limit or config.HASH_QUEUE_LIMIT
+        self._executor = None
+        self._dummy_hash = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+        return self._executor
+
+    async def _run(self, function, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                raise HashingBusy()
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password):
+        return await self._run(self.hasher.hash, password)
+
+    # Devuelve (válida, nuevo_hash). nuevo_hash no es None cuando hay que guardar un hash
+    # actualizado: parámetros de costo distintos o contraseña heredada en texto plano.
+    async def verify(self, stored, password):
+        if not stored.startswith("$argon2"):
+            if not secrets.compare_digest(stored.encode(), password.encode()):
+                return False, None
+            return True, await self.hash(password)
+        try:
+            await self._run(self.hasher.verify, stored, password)
+        except (VerificationError, InvalidHashError):
+            return False, None
+        if self.hasher.check_needs_rehash(stored):
+            return True, await self.hash(password)
+        return True, None
+
+    # Para un email que no existe: verifica contra un hash fijo con los mismos parámetros, así la
+    # respuesta tarda lo mismo que con un usuario registrado y no revela qué emails lo están
+    async def verify_unknown(self, password):
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+        await self.verify(self._dummy_hash, password)
+        return False, None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHashingService()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, literal, select, update
+from . import config
+from .database import AsyncSessionLocal
+from .models import MovimientoSilo, Silo
+
+logger = logging.getLogger(__name__)
+
+DEPOSIT = "deposito"
+WITHDRAW = "retiro"
+BALANCE = "saldo"
+
+# Clave del advisory lock de PostgreSQL que serializa las compactaciones de todos los workers
+LEDGER_COMPACTION_LOCK = 7310
+
+
+class StockError(Exception):
+    pass
+
+
+# Movimiento atómico: el saldo se ajusta en un único UPDATE condicionado, sin leer el silo ni
+# bloquearlo, así que depósitos y retiros concurrentes nunca pierden actualizaciones ni dejan el
+# silo por encima de su capacidad o por debajo de cero. El movimiento se registra en la misma
+# transacción; el llamador hace commit.
+async def move(db, user_id, silo_id, quantity, kind, harvest_id=None, assignment_id=None):
+    new_content = Silo.Contenido + quantity
+    result = await db.execute(
+        update(Silo)
+        .where(Silo.ID_Silo == silo_id, Silo.user_id == user_id,
+               new_content <= Silo.Capacidad, new_content >= 0)
+        .values(Contenido=new_content)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        exists = await db.scalar(select(Silo.ID_Silo).where(Silo.ID_Silo == silo_id, Silo.user_id == user_id))
+        if exists is None:
+            raise StockError("Silo not found or unauthorized access.")
+        if quantity > 0:
+            raise StockError("Not enough free capacity in the silo.")
+        raise StockError("Not enough product in the silo.")
+    await db.execute(insert(MovimientoSilo).values(
+        ID_Silo=silo_id, Tipo=kind, Cantidad=quantity,
+        ID_Cosecha=harvest_id, ID_Encargo=assignment_id, user_id=user_id,
+    ))
+
+
+async def deposit(db, user_id, silo_id, quantity, harvest_id=None):
+    if quantity <= 0:
+        raise StockError("Quantity must be greater than zero.")
+    await move(db, user_id, silo_id, quantity, DEPOSIT, harvest_id=harvest_id)
+
+
+async def withdraw(db, user_id, silo_id, quantity, assignment_id=None):
+    if quantity <= 0:
+        raise StockError("Quantity must be greater than zero.")
+    await move(db, user_id, silo_id, -quantity, WITHDRAW, assignment_id=assignment_id)
+
+
+# Saldo inicial de un silo recién creado (ya incluido en Contenido)
+def opening_balance(silo):
+    return MovimientoSilo(ID_Silo=silo.ID_Silo, Tipo=BALANCE, Cantidad=silo.Contenido, user_id=silo.user_id)
+
+
+# Nivel de llenado de todos los silos del usuario en una sola consulta
+async def fill_levels(db, user_id):
+    result = await db.execute(
+        select(Silo.ID_Silo, Silo.Nombre, Silo.Capacidad, Silo.Contenido)
+        .where(Silo.user_id == user_id)
+        .order_by(Silo.ID_Silo)
+    )
+    return [
+        {"id": silo_id, "name": name, "capacity": capacity, "content": content,
+         "fill": round(content / capacity, 4) if capacity else None}
+        for silo_id, name, capacity, content in result
+    ]
+
+
+# Reemplaza los movimientos anteriores a `before` por un movimiento "saldo" por silo con su suma,
+# con dos sentencias set-based. El saldo de cada silo (la suma del libro) no cambia.
+# Dos compactaciones pueden solaparse (la del comando manual con la periódica, o un worker 0 reciclado
+# con el que lo reemplaza): en PostgreSQL un advisory lock de la transacción hace que la segunda espere
+# a que termine la primera y resuma el libro ya compactado (sin él, las dos insertarían un saldo
+# calculado sobre los mismos movimientos y el libro contaría dos veces la historia).
+# SQLite ya serializa las transacciones que escriben.
+async def compact_ledger(db, before):
+    connection = await db.connection()
+    if connection.dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(LEDGER_COMPACTION_LOCK)))
+    summary = (
+        select(MovimientoSilo.ID_Silo, literal(before), literal(BALANCE), func.sum(MovimientoSilo.Cantidad),
+               MovimientoSilo.user_id)
+        .where(MovimientoSilo.Fecha < before)
+        .group_by(MovimientoSilo.ID_Silo, MovimientoSilo.user_id)
+        .having(func.count() > 1)
+    )
+    compacted = select(MovimientoSilo.ID_Silo).where(MovimientoSilo.Fecha < before) \
+        .group_by(MovimientoSilo.ID_Silo).having(func.count() > 1)
+    await db.execute(insert(MovimientoSilo).from_select(
+        ["ID_Silo", "Fecha", "Tipo", "Cantidad", "user_id"], summary))
+    result = await db.execute(
+        delete(MovimientoSilo)
+        .where(MovimientoSilo.Fecha < before, MovimientoSilo.ID_Silo.in_(compacted))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+# Tarea de fondo del lifespan: compacta el libro cada LEDGER_COMPACT_INTERVAL segundos
+async def compact_periodically(interval=None, retention_days=None):
+    interval = interval or config.LEDGER_COMPACT_INTERVAL
+    retention = timedelta(days=retention_days or config.LEDGER_RETENTION_DAYS)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                before = datetime.now(timezone.utc).replace(tzinfo=None) - retention
+                removed = await compact_ledger(db, before)
+                await db.commit()
+            if removed:
+                logger.info("Compacted %d silo ledger movements older than %s", removed, before)
+        except Exception as e:
+            logger.warning("Silo ledger compaction failed: %s", e)
@@ -0,0 +1,267 @@
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Límites (segundos) de los histogramas de latencia y de cantidad de consultas por solicitud
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Consultas SQL y tiempo de SQL y de plantillas de la solicitud en curso. La variable de contexto
+# llega a los greenlets del motor asíncrono y a los hilos de run_in_threadpool; fuera de una
+# solicitud (tareas de fondo) vale None y no se mide nada.
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    sql_seconds: float = 0.0
+    template_seconds: float = 0.0
+    lazy_loads: int = 0
+    # Plantilla que se está renderizando (para detectar cargas perezosas desde las plantillas)
+    rendering: Optional[str] = None
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class LazyLoadError(Exception):
+    pass
+
+
+current_request = ContextVar("current_request", default=None)
+
+
+# Histograma con los contadores reservados al crearlo; observe() solo incrementa una posición
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.lazy_loads = 0
+        self.budget_exceeded = 0
+        self.responses = {}
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def labels(**values):
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in values.items()) + "}"
+
+
+# Métricas del proceso por (ruta, método). Solo el middleware las escribe, al terminar cada
+# solicitud y desde el hilo del event loop, así que no hace falta ningún lock. Cada worker tiene
+# las suyas: Prometheus debe consultar cada worker (o sumar por instancia).
+class MetricsRegistry:
+    def __init__(self):
+        self.routes = {}
+
+    def observe(self, route, method, status, seconds, request_metrics):
+        metrics = self.routes.get((route, method))
+        if metrics is None:
+            metrics = self.routes[(route, method)] = RouteMetrics()
+        metrics.latency.observe(seconds)
+        metrics.queries.observe(request_metrics.queries)
+        metrics.sql_seconds += request_metrics.sql_seconds
+        metrics.template_seconds += request_metrics.template_seconds
+        metrics.lazy_loads += request_metrics.lazy_loads
+        metrics.responses[status] = metrics.responses.get(status, 0) + 1
+        return metrics
+
+    def clear(self):
+        self.routes.clear()
+
+    # Formato de texto de Prometheus
+    def render(self):
+        routes = sorted(self.routes.items())
+        lines = [
+            "# HELP app_requests_total Requests by route, method and status.",
+            "# TYPE app_requests_total counter",
+        ]
+        for (route, method), metrics in routes:
+            for status, count in sorted(metrics.responses.items()):
+                lines.append(f"app_requests_total{labels(route=route, method=method, status=status)} {count}")
+        for name, help_text, attribute in (
+            ("app_request_duration_seconds", "Request latency.", "latency"),
+            ("app_request_sql_queries", "SQL statements per request.", "queries"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (route, method), metrics in routes:
+                histogram = getattr(metrics, attribute)
+                for bound, total in histogram.cumulative():
+                    lines.append(f"{name}_bucket{labels(route=route, method=method, le=bound)} {total}")
+                lines.append(f"{name}_sum{labels(route=route, method=method)} {histogram.sum}")
+                lines.append(f"{name}_count{labels(route=route, method=method)} {histogram.count}")
+        for name, help_text, attribute in (
+            ("app_request_sql_seconds_total", "Time spent executing SQL.", "sql_seconds"),
+            ("app_request_template_seconds_total", "Time spent rendering templates.", "template_seconds"),
+            ("app_template_lazy_loads_total", "ORM lazy loads triggered while rendering templates.", "lazy_loads"),
+            ("app_query_budget_exceeded_total", "Requests over the route's query budget.", "budget_exceeded"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (route, method), metrics in routes:
+                lines.append(f"{name}{labels(route=route, method=method)} {getattr(metrics, attribute)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# Plantilla (de cualquier página, incluidas las de page_cache) dentro de una solicitud: se suma su tiempo de render
+class TimedTemplate(Template):
+    def render(self, *args, **kwargs):
+        request_metrics = current_request.get()
+        if request_metrics is None:
+            return super().render(*args, **kwargs)
+        started = time.perf_counter()
+        previous, request_metrics.rendering = request_metrics.rendering, self.name or "<string>"
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            request_metrics.rendering = previous
+            request_metrics.template_seconds += time.perf_counter() - started
+
+
+# Debe llamarse antes de cargar las plantillas
+def instrument_templates(env):
+    env.template_class = TimedTemplate
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    request_metrics = current_request.get()
+    started = conn.info.get("query_started")
+    if request_metrics is not None and started:
+        request_metrics.queries += 1
+        request_metrics.sql_seconds += time.perf_counter() - started.pop()
+
+
+# Un error en la sentencia no llega a after_cursor_execute: se descarta su marca de inicio
+def handle_error(context):
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if current_request.get() is not None and started:
+        started.pop()
+
+
+# Carga perezosa (relación o atributos expirados) pedida por una plantilla. Con LAZY_LOAD_CHECK
+# 'strict' se lanza LazyLoadError antes de ejecutar la consulta; con 'warn' se registra y se cuenta.
+def before_orm_execute(orm_execute_state):
+    request_metrics = current_request.get()
+    if request_metrics is None or request_metrics.rendering is None or config.LAZY_LOAD_CHECK == "off":
+        return
+    if orm_execute_state.is_relationship_load:
+        attribute = str(orm_execute_state.loader_strategy_path[-1])
+    elif orm_execute_state.is_column_load:
+        attribute = f"expired attributes of {orm_execute_state.bind_mapper.class_.__name__}"
+    else:
+        return
+    message = f"Lazy load of {attribute} while rendering {request_metrics.rendering}"
+    if config.LAZY_LOAD_CHECK == "strict":
+        raise LazyLoadError(message)
+    request_metrics.lazy_loads += 1
+    logger.warning(message)
+
+
+# Máximo de sentencias SQL de una ruta; se declara debajo del decorador de la ruta:
+#     @app.get("/cultivation")
+#     @query_budget(2)
+#     async def cultivation(...)
+def query_budget(max_queries):
+    def decorate(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorate
+
+
+# Con QUERY_BUDGET_MODE 'raise' (pruebas) lanza QueryBudgetExceeded; con 'log' (producción) lo registra y cuenta
+def check_budget(route, request_metrics, route_metrics):
+    budget = getattr(getattr(route, "endpoint", None), "query_budget", None)
+    if budget is None or config.QUERY_BUDGET_MODE == "off" or request_metrics.queries <= budget:
+        return
+    message = f"{route.path} ran {request_metrics.queries} SQL statements (budget {budget})"
+    route_metrics.budget_exceeded += 1
+    if config.QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+    if not event.contains(Session, "do_orm_execute", before_orm_execute):
+        event.listen(Session, "do_orm_execute", before_orm_execute)
+
+
+# Middleware ASGI (sin BaseHTTPMiddleware): mide la solicitud completa, hasta el último fragmento
+# del cuerpo, y la agrupa por la plantilla de la ruta (/harvest/{id_crop}), no por la URL
+class MetricsMiddleware:
+    def __init__(self, app, registry=registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_metrics = RequestMetrics()
+        token = current_request.set(request_metrics)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        failed = True
+        try:
+            await self.app(scope, receive, send_with_status)
+            failed = False
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = scope.get("route")
+            route_metrics = self.registry.observe(getattr(route, "path", "other"), scope["method"], status,
+                                                  elapsed, request_metrics)
+        if not failed:
+            check_budget(route, request_metrics, route_metrics)
@@ -2,8 +2,9 @@ from sqlalchemy import Column, Integer, String
 from .database import Base
 
 
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, DECIMAL, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, DECIMAL, Text, Index
 from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
 from .database import Base
 USERS_ID="users.id"
 
@@ -23,6 +24,9 @@ class User(Base):
     cultivos = relationship("Cultivo", back_populates="user")
     cosechas = relationship("Cosecha", back_populates="user")
     silos = relationship("Silo", back_populates="user")
+    movimientos_silo = relationship("MovimientoSilo", back_populates="user")
+    resumenes_rendimiento = relationship("ResumenRendimiento", back_populates="user")
+    pronosticos = relationship("PronosticoCosecha", back_populates="user")
     puntos_venta = relationship("PuntoVenta", back_populates="user")
     ventas = relationship("Venta", back_populates="user")
     vehiculos = relationship("Vehiculo", back_populates="user")
@@ -31,6 +35,11 @@ class User(Base):
 
 class Cultivo(Base):
     __tablename__ = "cultivo"
+    # Índices compuestos para los listados por usuario (orden por id o por fecha)
+    __table_args__ = (
+        Index("ix_cultivo_user_id_id", "user_id", "ID_Cultivo"),
+        Index("ix_cultivo_user_id_fecha", "user_id", "Fecha_siembra", "ID_Cultivo"),
+    )
 
     ID_Cultivo = Column(Integer, primary_key=True, index=True)
     Tipo = Column(String(50), nullable=False)
@@ -39,6 +48,9 @@ class Cultivo(Base):
     Fecha_cosecha = Column(Date, nullable=True)
     Estado_crecimiento = Column(String, nullable=False)
     Necesidades_tratamiento = Column(Text, nullable=True)
+    # Ubicación de la finca (grados decimales, WGS84)
+    Latitud = Column(Float, nullable=True)
+    Longitud = Column(Float, nullable=True)
 
     # Clave foránea y relación con User
     user_id = Column(Integer, ForeignKey(USERS_ID), nullable=False)
@@ -47,12 +59,16 @@ class Cultivo(Base):
 
 class Cosecha(Base):
     __tablename__ = "cosecha"
+    __table_args__ = (
+        Index("ix_cosecha_user_id_id", "user_id", "ID_Cosecha"),
+        Index("ix_cosecha_user_id_fecha", "user_id", "Fecha_cosecha", "ID_Cosecha"),
+    )
 
     ID_Cosecha = Column(Integer, primary_key=True, index=True)
     Fecha_cosecha = Column(Date, nullable=False)
     Cantidad_cosecha = Column(Float, nullable=False)
     Area = Column(Float, nullable=False)
-    ID_Cultivo = Column(Integer, ForeignKey("cultivo.ID_Cultivo"), nullable=False)
+    ID_Cultivo = Column(Integer, ForeignKey("cultivo.ID_Cultivo", ondelete="CASCADE"), nullable=False, index=True)
 
     # Clave foránea y relación con User
     user_id = Column(Integer, ForeignKey(USERS_ID), nullable=False)
@@ -61,12 +77,15 @@ class Cosecha(Base):
 
 class Silo(Base):
     __tablename__ = "silo"
+    __table_args__ = (
+        Index("ix_silo_user_id_id", "user_id", "ID_Silo"),
+    )
 
     ID_Silo = Column(Integer, primary_key=True, index=True)
     Nombre = Column(String(50), nullable=False)
     Capacidad = Column(Float, nullable=False)
     Contenido = Column(Float, nullable=False)
-    ID_Cosecha = Column(Integer, ForeignKey("cosecha.ID_Cosecha"), nullable=False)
+    ID_Cosecha = Column(Integer, ForeignKey("cosecha.ID_Cosecha", ondelete="CASCADE"), nullable=False, index=True)
 
     # Clave foránea y relación con User
     user_id = Column(Integer, ForeignKey(USERS_ID), nullable=False)
@@ -75,10 +94,16 @@ class Silo(Base):
 
 class PuntoVenta(Base):
     __tablename__ = "punto_venta"
+    __table_args__ = (
+        Index("ix_punto_venta_user_id_id", "user_id", "ID_Punto_Venta"),
+    )
 
     ID_Punto_Venta = Column(Integer, primary_key=True, index=True)
     Nombre = Column(String(50), nullable=False)
     Direccion = Column(String(100), nullable=False)
+    # Ubicación (grados decimales, WGS84) para las consultas de cercanía
+    Latitud = Column(Float, nullable=True)
+    Longitud = Column(Float, nullable=True)
 
     # Clave foránea y relación con User
     user_id = Column(Integer, ForeignKey(USERS_ID), nullable=False)
@@ -87,12 +112,15 @@ class PuntoVenta(Base):
 
 class Venta(Base):
     __tablename__ = "venta"
+    __table_args__ = (
+        Index("ix_venta_user_id_fecha", "user_id", "Fecha", "ID_Venta"),
+    )
 
     ID_Venta = Column(Integer, primary_key=True, index=True)
     Fecha = Column(Date, nullable=False)
     Cantidad_vendida = Column(Float, nullable=False)
     Precio = Column(DECIMAL(10, 2), nullable=False)
-    ID_Punto_Venta = Column(Integer, ForeignKey("punto_venta.ID_Punto_Venta"), nullable=False)
+    ID_Punto_Venta = Column(Integer, ForeignKey("punto_venta.ID_Punto_Venta"), nullable=False, index=True)
 
     # Clave foránea y relación con User
     user_id = Column(Integer, ForeignKey(USERS_ID), nullable=False)
@@ -101,11 +129,14 @@ class Venta(Base):
 
 class Vehiculo(Base):
     __tablename__ = "vehiculo"
+    __table_args__ = (
+        Index("ix_vehiculo_user_id_id", "user_id", "ID_Vehiculo"),
+    )
 
     ID_Vehiculo = Column(Integer, primary_key=True, index=True)
     Matricula = Column(String(50), nullable=False)
     Capacidad_Carga = Column(Float, nullable=False)
-    ID_Cosecha = Column(Integer, ForeignKey("cosecha.ID_Cosecha"), nullable=False)
+    ID_Cosecha = Column(Integer, ForeignKey("cosecha.ID_Cosecha", ondelete="CASCADE"), nullable=False, index=True)
 
     # Clave foránea y relación con User
     user_id = Column(Integer, ForeignKey(USERS_ID), nullable=False)
@@ -114,13 +145,84 @@ class Vehiculo(Base):
 
 class Encargo(Base):
     __tablename__ = "encargo"
+    __table_args__ = (
+        Index("ix_encargo_user_id_id", "user_id", "ID_Encargo"),
+        Index("ix_encargo_user_id_fecha", "user_id", "Fecha", "ID_Encargo"),
+    )
 
     ID_Encargo = Column(Integer, primary_key=True, index=True)
     Fecha = Column(Date, nullable=False)
     Cantidad_producto = Column(Float, nullable=False)
-    ID_Vehiculo = Column(Integer, ForeignKey("vehiculo.ID_Vehiculo"), nullable=False)
-    Punto_Venta_ID = Column(Integer, ForeignKey("punto_venta.ID_Punto_Venta"), nullable=False)
+    ID_Vehiculo = Column(Integer, ForeignKey("vehiculo.ID_Vehiculo", ondelete="CASCADE"), nullable=False, index=True)
+    Punto_Venta_ID = Column(Integer, ForeignKey("punto_venta.ID_Punto_Venta"), nullable=False, index=True)
 
     # Clave foránea y relación con User
     user_id = Column(Integer, ForeignKey(USERS_ID), nullable=False)
     user = relationship("User", back_populates="encargos")
+
+
+# Libro de movimientos de inventario de cada silo. Cantidad es positiva para depósitos y negativa
+# para retiros; Silo.Contenido es el saldo y se actualiza en la misma transacción que el movimiento.
+# La compactación reemplaza los movimientos antiguos de cada silo por uno de Tipo "saldo".
+class MovimientoSilo(Base):
+    __tablename__ = "movimiento_silo"
+    __table_args__ = (
+        Index("ix_movimiento_silo_silo_fecha", "ID_Silo", "Fecha"),
+    )
+
+    ID_Movimiento = Column(Integer, primary_key=True, index=True)
+    ID_Silo = Column(Integer, ForeignKey("silo.ID_Silo", ondelete="CASCADE"), nullable=False)
+    # UTC sin zona horaria, igual en PostgreSQL y SQLite
+    Fecha = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    Tipo = Column(String(20), nullable=False)
+    Cantidad = Column(Float, nullable=False)
+    ID_Cosecha = Column(Integer, ForeignKey("cosecha.ID_Cosecha", ondelete="SET NULL"), nullable=True)
+    ID_Encargo = Column(Integer, ForeignKey("encargo.ID_Encargo", ondelete="SET NULL"), nullable=True)
+
+    # Clave foránea y relación con User
+    user_id = Column(Integer, ForeignKey(USERS_ID), nullable=False)
+    user = relationship("User", back_populates="movimientos_silo")
+
+
+# Producción acumulada por usuario, tipo de cultivo y mes; se actualiza con cada cosecha registrada,
+# modificada o eliminada (ver summaries.py) para no recalcular sobre todo el historial
+class ResumenRendimiento(Base):
+    __tablename__ = "resumen_rendimiento"
+
+    user_id = Column(Integer, ForeignKey(USERS_ID), primary_key=True)
+    Tipo = Column(String(50), primary_key=True)
+    Anio = Column(Integer, primary_key=True)
+    Mes = Column(Integer, primary_key=True)
+    Cantidad_total = Column(Float, nullable=False, default=0)
+    Area_total = Column(Float, nullable=False, default=0)
+    Cosechas = Column(Integer, nullable=False, default=0)
+
+    user = relationship("User", back_populates="resumenes_rendimiento")
+
+
+# Fecha y cantidad de cosecha esperadas de cada cultivo activo, calculadas por lote (ver forecast.py)
+class PronosticoCosecha(Base):
+    __tablename__ = "pronostico_cosecha"
+
+    ID_Cultivo = Column(Integer, ForeignKey("cultivo.ID_Cultivo", ondelete="CASCADE"), primary_key=True)
+    Fecha_esperada = Column(Date, nullable=False)
+    Cantidad_esperada = Column(Float, nullable=False)
+    # Tipo de cultivo cuya curva se usó, o "general"
+    Modelo = Column(String(50), nullable=False)
+    Muestras = Column(Integer, nullable=False)
+    Calculado = Column(DateTime, nullable=False)
+
+    # Clave foránea y relación con User
+    user_id = Column(Integer, ForeignKey(USERS_ID), nullable=False)
+    user = relationship("User", back_populates="pronosticos")
+
+
+# Tokens de sesión revocados (logout) hasta que vencen. Cada worker los copia a memoria cada
+# SESSION_REVOCATION_SYNC segundos (ver session.py), así que un logout vale en todos los procesos
+class SesionRevocada(Base):
+    __tablename__ = "sesion_revocada"
+
+    ID = Column(Integer, primary_key=True, autoincrement=True)
+    JTI = Column(String(32), nullable=False, unique=True)
+    # Vencimiento del token (epoch); después ya no hace falta guardarlo
+    Expira = Column(Float, nullable=False, index=True)
@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi.responses import HTMLResponse, Response
+from jinja2 import FileSystemBytecodeCache, TemplateError
+
+logger = logging.getLogger(__name__)
+
+# Se revalida siempre (ETag); la cookie de sesión decide qué barra de navegación se muestra
+CACHE_HEADERS = {"Cache-Control": "no-cache", "Vary": "Cookie"}
+
+
+@dataclass
+class CachedPage:
+    body: bytes
+    etag: str
+    last_modified: str
+    modified_at: float
+
+
+def enable_bytecode_cache(env, directory):
+    os.makedirs(directory, exist_ok=True)
+    env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def etag_matches(header, etag):
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def not_modified_since(header, modified_at):
+    try:
+        return parsedate_to_datetime(header).timestamp() >= int(modified_at)
+    except (TypeError, ValueError):
+        return False
+
+
+# Páginas informativas cuyo HTML solo depende de la plantilla y de si hay sesión iniciada:
+# se renderizan una vez por combinación y se responden con ETag/Last-Modified (304 si no cambiaron).
+class PageCache:
+    def __init__(self, templates):
+        self.templates = templates
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._modified_at = None
+
+    @property
+    def modified_at(self):
+        # Fecha de la plantilla más reciente (incluye base.html, de la que heredan todas)
+        if self._modified_at is None:
+            paths = [os.path.join(directory, name)
+                     for directory in self.templates.env.loader.searchpath
+                     for name in self.templates.env.list_templates()]
+            self._modified_at = max((os.path.getmtime(path) for path in paths if os.path.exists(path)), default=0)
+        return self._modified_at
+
+    # Compila todas las plantillas (y llena el caché de bytecode) y pre-renderiza las páginas indicadas
+    def warm(self, pages=()):
+        for name in self.templates.env.list_templates():
+            try:
+                self.templates.env.get_template(name)
+            except (TemplateError, UnicodeDecodeError) as e:
+                logger.warning("Template %s could not be compiled: %s", name, e)
+        for name in pages:
+            self.get(name, False)
+            self.get(name, True)
+
+    def get(self, name, user_logged_in):
+        key = (name, bool(user_logged_in))
+        page = self._pages.get(key)
+        if page is None:
+            body = self.templates.get_template(name).render({"user_logged_in": key[1]}).encode()
+            page = CachedPage(
+                body=body,
+                etag=f'"{hashlib.sha1(body).hexdigest()}"',
+                last_modified=formatdate(self.modified_at, usegmt=True),
+                modified_at=self.modified_at,
+            )
+            with self._lock:
+                self._pages[key] = page
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._modified_at = None
+
+    def response(self, request, name, user_logged_in=False):
+        page = self.get(name, user_logged_in)
+        headers = {"ETag": page.etag, "Last-Modified": page.last_modified, **CACHE_HEADERS}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if etag_matches(if_none_match, page.etag):
+                return Response(status_code=304, headers=headers)
+        elif not_modified_since(request.headers.get("if-modified-since"), page.modified_at):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(page.body, headers=headers)
@@ -0,0 +1,97 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import select, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+# Parámetros de listado; se usan como `params: PageParams = Depends()` (query string)
+@dataclass
+class PageParams:
+    cursor: Optional[str] = None
+    limit: int = DEFAULT_PAGE_SIZE
+    sort: str = "id"
+    order: str = "asc"
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+
+@dataclass
+class Page:
+    rows: list
+    next_cursor: Optional[str] = None
+
+    def next_url(self, request):
+        if not self.next_cursor:
+            return None
+        return str(request.url.include_query_params(cursor=self.next_cursor))
+
+
+def encode_cursor(values):
+    values = [value.isoformat() if isinstance(value, date) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+# Un cursor inválido o de otro orden se ignora y el listado empieza desde el principio
+def decode_cursor(cursor, keys):
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(keys):
+        return None
+    try:
+        return [key.type.python_type.fromisoformat(value) if key.type.python_type in (date, datetime) else value
+                for key, value in zip(keys, values)]
+    except (TypeError, ValueError):
+        return None
+
+
+# pk puede ser una columna o una tupla de columnas (clave primaria compuesta)
+def sort_keys(pk, params, date_column=None):
+    pks = list(pk) if isinstance(pk, tuple) else [pk]
+    return [date_column] + pks if params.sort == "date" and date_column is not None else pks
+
+
+# Consulta keyset sobre la clave primaria o sobre (fecha, clave primaria); pide un registro extra
+# para saber si hay página siguiente. Los índices (user_id, fecha, pk) de models.py la resuelven.
+def page_query(columns, pk, owner, user_id, params, date_column=None):
+    limit = min(max(params.limit, 1), MAX_PAGE_SIZE)
+    descending = params.order == "desc"
+    keys = sort_keys(pk, params, date_column)
+
+    selected = list(columns) + [key for key in keys if not any(key is column for column in columns)]
+    query = select(*selected).where(owner == user_id)
+    if date_column is not None:
+        if params.date_from:
+            query = query.where(date_column >= params.date_from)
+        if params.date_to:
+            query = query.where(date_column <= params.date_to)
+
+    after = decode_cursor(params.cursor, keys)
+    if after:
+        key, value = (tuple_(*keys), tuple_(*after)) if len(keys) > 1 else (keys[0], after[0])
+        query = query.where(key < value if descending else key > value)
+
+    return query.order_by(*[key.desc() if descending else key.asc() for key in keys]).limit(limit + 1)
+
+
+# Solo se seleccionan las columnas que se muestran, sin hidratar entidades completas
+async def paginate(db, columns, pk, owner, user_id, params, date_column=None):
+    limit = min(max(params.limit, 1), MAX_PAGE_SIZE)
+    keys = sort_keys(pk, params, date_column)
+    rows = (await db.execute(page_query(columns, pk, owner, user_id, params, date_column))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]._mapping[key] for key in keys])
+    return Page([tuple(row)[:len(columns)] for row in rows], next_cursor)
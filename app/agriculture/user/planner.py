@@ -0,0 +1,188 @@
+import time
+from dataclasses import dataclass, field
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from . import config
+from .models import Encargo, Vehiculo
+
+
+@dataclass
+class Truck:
+    id: int
+    capacity: float
+    load: float = 0.0
+    orders: list = field(default_factory=list)
+
+    @property
+    def free(self):
+        return self.capacity - self.load
+
+    def add(self, order_id, quantity):
+        self.orders.append((order_id, quantity))
+        self.load += quantity
+
+
+@dataclass
+class LoadPlan:
+    trucks: list
+    unassigned: list
+    elapsed_ms: float = 0.0
+    improvements: int = 0
+
+    @property
+    def used(self):
+        return [truck for truck in self.trucks if truck.orders]
+
+    # {id_encargo: id_vehiculo}
+    def assignments(self):
+        return {order_id: truck.id for truck in self.used for order_id, _ in truck.orders}
+
+    def to_dict(self):
+        used = self.used
+        capacity = sum(truck.capacity for truck in used)
+        return {
+            "vehicles": [
+                {"vehicle": truck.id, "capacity": truck.capacity, "load": round(truck.load, 4),
+                 "assignments": [order_id for order_id, _ in truck.orders]}
+                for truck in used
+            ],
+            "unassigned": [order_id for order_id, _ in self.unassigned],
+            "vehicles_used": len(used),
+            "utilization": round(sum(truck.load for truck in used) / capacity, 4) if capacity else None,
+            "improvements": self.improvements,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+        }
+
+
+# Árbol de máximos sobre el espacio libre de los vehículos: encuentra en O(log n) el primero
+# (en orden) donde cabe una cantidad
+class FreeSpaceTree:
+    def __init__(self, free):
+        self.size = 1
+        while self.size < len(free):
+            self.size *= 2
+        self.tree = [float("-inf")] * (2 * self.size)
+        self.tree[self.size:self.size + len(free)] = free
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def first_fit(self, quantity):
+        if self.tree[1] < quantity:
+            return None
+        node = 1
+        while node < self.size:
+            node = 2 * node if self.tree[2 * node] >= quantity else 2 * node + 1
+        return node - self.size
+
+    def update(self, index, free):
+        node = index + self.size
+        self.tree[node] = free
+        while node > 1:
+            node //= 2
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+
+# First-fit decreasing: encargos de mayor a menor en el primer vehículo (de mayor a menor
+# capacidad) donde quepan. Los que no caben en ningún vehículo quedan sin asignar.
+def first_fit_decreasing(orders, vehicles):
+    trucks = [Truck(vehicle_id, capacity) for vehicle_id, capacity in sorted(vehicles, key=lambda v: -v[1])]
+    tree = FreeSpaceTree([truck.capacity for truck in trucks])
+    unassigned = []
+    for order_id, quantity in sorted(orders, key=lambda o: -o[1]):
+        index = tree.first_fit(quantity)
+        if index is None:
+            unassigned.append((order_id, quantity))
+            continue
+        trucks[index].add(order_id, quantity)
+        tree.update(index, trucks[index].free)
+    return LoadPlan(trucks, unassigned)
+
+
+# Intenta vaciar el vehículo pasando sus encargos (de mayor a menor) al vehículo usado con
+# menos espacio libre donde quepan (best fit). Solo aplica el cambio si caben todos.
+def empty_truck(truck, others):
+    free = {id(other): other.free for other in others}
+    moves = []
+    for order in sorted(truck.orders, key=lambda o: -o[1]):
+        target = min((other for other in others if free[id(other)] >= order[1]),
+                     key=lambda other: free[id(other)], default=None)
+        if target is None:
+            return False
+        free[id(target)] -= order[1]
+        moves.append((target, order))
+    for target, order in moves:
+        target.add(*order)
+    truck.orders, truck.load = [], 0.0
+    return True
+
+
+# Mejora local hasta agotar el tiempo: (1) liberar vehículos, empezando por los menos cargados;
+# (2) cambiar cada vehículo usado por el más pequeño libre que alcance para su carga;
+# (3) reintentar los encargos sin asignar en el espacio que haya quedado.
+def improve(plan, deadline):
+    stuck = set()
+    while time.perf_counter() < deadline:
+        used = plan.used
+        candidates = [truck for truck in sorted(used, key=lambda t: t.load) if truck.id not in stuck]
+        if not candidates:
+            break
+        truck = candidates[0]
+        if empty_truck(truck, [other for other in used if other is not truck]):
+            plan.improvements += 1
+            stuck.clear()
+        else:
+            stuck.add(truck.id)
+
+    for truck in sorted(plan.used, key=lambda t: -t.load):
+        if time.perf_counter() >= deadline:
+            break
+        smaller = min((spare for spare in plan.trucks
+                       if not spare.orders and truck.load <= spare.capacity < truck.capacity),
+                      key=lambda spare: spare.capacity, default=None)
+        if smaller is not None:
+            smaller.orders, smaller.load = truck.orders, truck.load
+            truck.orders, truck.load = [], 0.0
+            plan.improvements += 1
+
+    if plan.unassigned:
+        tree = FreeSpaceTree([truck.free for truck in plan.trucks])
+        remaining = []
+        for order in plan.unassigned:
+            index = tree.first_fit(order[1])
+            if index is None:
+                remaining.append(order)
+                continue
+            plan.trucks[index].add(*order)
+            tree.update(index, plan.trucks[index].free)
+            plan.improvements += 1
+        plan.unassigned = remaining
+    return plan
+
+
+# orders: [(id_encargo, cantidad)], vehicles: [(id_vehiculo, capacidad)]; cada vehículo hace
+# un viaje con como máximo su Capacidad_Carga
+def plan_loads(orders, vehicles, time_budget_ms=None):
+    start = time.perf_counter()
+    budget = (config.PLANNER_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms) / 1000
+    plan = improve(first_fit_decreasing(orders, vehicles), start + budget)
+    plan.elapsed_ms = (time.perf_counter() - start) * 1000
+    return plan
+
+
+# Planifica los encargos de un día con la flota del usuario; con apply=True reasigna los
+# vehículos en la base de datos (los encargos sin lugar conservan el que tenían)
+async def plan_day(db, user_id, day, apply=False, time_budget_ms=None):
+    orders = (await db.execute(
+        select(Encargo.ID_Encargo, Encargo.Cantidad_producto).where(Encargo.user_id == user_id, Encargo.Fecha == day)
+    )).all()
+    vehicles = (await db.execute(
+        select(Vehiculo.ID_Vehiculo, Vehiculo.Capacidad_Carga).where(Vehiculo.user_id == user_id)
+    )).all()
+    # El cálculo es CPU: se hace fuera del event loop
+    plan = await run_in_threadpool(plan_loads, orders, vehicles, time_budget_ms)
+    if apply and plan.used:
+        await db.execute(update(Encargo), [
+            {"ID_Encargo": order_id, "ID_Vehiculo": vehicle_id} for order_id, vehicle_id in plan.assignments().items()
+        ])
+    return plan
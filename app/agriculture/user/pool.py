@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+# Reparte las conexiones que admite PostgreSQL entre los workers de uvicorn.
+# Se reservan algunas para migraciones y administración; dos tercios quedan fijos y el resto como overflow.
+def pool_size_per_worker(max_connections, workers, reserved=5):
+    workers = max(workers, 1)
+    per_worker = max((max_connections - reserved) // workers, 1)
+    pool_size = max(per_worker * 2 // 3, 1)
+    return pool_size, per_worker - pool_size
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+# Mide cuánto espera cada checkout; las estadísticas sobreviven a engine.dispose() (recreate)
+class _TimedPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            logger.error("Connection pool exhausted: %s", pool_status(self))
+            raise
+        waited = time.perf_counter() - start
+        self.stats.record(waited)
+        if waited > config.DB_POOL_SLOW_WAIT:
+            logger.warning("Waited %.3fs for a database connection: %s", waited, pool_status(self))
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool):
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
@@ -0,0 +1,131 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.datastructures import MutableHeaders
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Hasta cuándo (epoch) las lecturas de este navegador van al primario, después de una escritura
+PRIMARY_COOKIE = "primary_until"
+WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "MERGE")
+
+
+# Réplicas de lectura con reparto round-robin entre las que pasan el chequeo de salud. Sin réplicas
+# sanas session_factory() devuelve None y se lee del primario.
+class ReplicaSet:
+    def __init__(self, engines=()):
+        self.set_engines(engines)
+
+    def set_engines(self, engines):
+        self.engines = list(engines)
+        self.healthy = [True] * len(self.engines)
+        self.factories = [async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+                          for engine in self.engines]
+        self._turn = itertools.count()
+
+    def __len__(self):
+        return len(self.engines)
+
+    def session_factory(self):
+        for _ in range(len(self.engines)):
+            index = next(self._turn) % len(self.engines)
+            if self.healthy[index]:
+                return self.factories[index]
+        return None
+
+    async def ping(self, engine):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def check(self, timeout=None):
+        timeout = timeout or config.REPLICA_CHECK_TIMEOUT
+        for index, engine in enumerate(self.engines):
+            error = None
+            try:
+                await asyncio.wait_for(self.ping(engine), timeout)
+            except Exception as e:
+                error = e
+            if error is not None and self.healthy[index]:
+                logger.warning("Read replica %d is unavailable: %s", index, error)
+            elif error is None and not self.healthy[index]:
+                logger.info("Read replica %d is back", index)
+            self.healthy[index] = error is None
+
+    # Tarea de fondo del lifespan
+    async def check_periodically(self, interval=None):
+        interval = interval or config.REPLICA_CHECK_INTERVAL
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    # Por índice (el orden de DATABASE_REPLICA_URLS): la URL lleva host, usuario y base de datos
+    def status(self):
+        return [{"index": index, "healthy": healthy} for index, healthy in enumerate(self.healthy)]
+
+
+# Leer tus propias escrituras: cada solicitud registra si ejecutó un INSERT/UPDATE/DELETE en el primario
+class WriteTracker:
+    wrote = False
+
+
+current_writes = ContextVar("current_writes", default=None)
+
+
+# Para escrituras que no pasan por el cursor de SQLAlchemy (p. ej. COPY con asyncpg)
+def mark_write():
+    tracker = current_writes.get()
+    if tracker is not None:
+        tracker.wrote = True
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip()[:6].upper().startswith(WRITE_VERBS):
+        mark_write()
+
+
+def track_writes(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def reads_from_primary(request):
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+# Si la solicitud escribió en el primario, la respuesta lleva una cookie que manda las lecturas del
+# mismo usuario al primario durante REPLICA_STICKY_SECONDS (en cualquier worker), mientras la
+# réplica se pone al día. Sin réplicas configuradas no hace nada.
+class ReadYourWritesMiddleware:
+    def __init__(self, app, replicas):
+        self.app = app
+        self.replicas = replicas
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        tracker = WriteTracker()
+        token = current_writes.set(tracker)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and tracker.wrote:
+                sticky = config.REPLICA_STICKY_SECONDS
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{PRIMARY_COOKIE}={time.time() + sticky:.3f}; Max-Age={sticky}; Path=/; HttpOnly; SameSite=lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            current_writes.reset(token)
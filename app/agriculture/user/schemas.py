@@ -0,0 +1,103 @@
+import datetime
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+# Modelos de respuesta de la API JSON (/api/v1), uno por entidad de models.py, con nombres en inglés
+
+
+class UserProfile(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    phone: Optional[str]
+
+
+class Crop(BaseModel):
+    id: int
+    crop_type: str
+    area: float
+    planting_date: datetime.date
+    harvest_date: Optional[datetime.date]
+    growing_state: str
+    needs: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+class Harvest(BaseModel):
+    id: int
+    harvest_date: datetime.date
+    quantity: float
+    area: float
+    crop_id: int
+
+
+class Silo(BaseModel):
+    id: int
+    name: str
+    capacity: float
+    content: float
+    harvest_id: int
+
+
+class PointOfSale(BaseModel):
+    id: int
+    name: str
+    address: str
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+class Sale(BaseModel):
+    id: int
+    date: datetime.date
+    quantity: float
+    price: Decimal
+    point_of_sale_id: int
+
+
+class Vehicle(BaseModel):
+    id: int
+    plate: str
+    capacity: float
+    harvest_id: int
+
+
+class Assignment(BaseModel):
+    id: int
+    date: datetime.date
+    quantity: float
+    vehicle_id: int
+    point_of_sale_id: int
+
+
+class SiloMovement(BaseModel):
+    id: int
+    silo_id: int
+    date: datetime.datetime
+    kind: str
+    quantity: float
+    harvest_id: Optional[int]
+    assignment_id: Optional[int]
+
+
+class YieldSummary(BaseModel):
+    crop_type: str
+    year: int
+    month: int
+    quantity: float
+    area: float
+    harvests: int
+
+
+class Forecast(BaseModel):
+    crop_id: int
+    expected_date: datetime.date
+    expected_quantity: float
+    model: str
+    samples: int
+    computed_at: datetime.datetime
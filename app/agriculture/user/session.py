@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from itsdangerous import URLSafeTimedSerializer, BadData
+from sqlalchemy import delete, select
+from . import config
+from .database import AsyncSessionLocal
+from .models import SesionRevocada, User
+
+logger = logging.getLogger(__name__)
+
+# Se conserva el nombre de la cookie original; ahora contiene un token firmado en lugar del id
+SESSION_COOKIE = "user_id"
+# Cada cuántos segundos se purgan las revocaciones vencidas
+COMPACT_INTERVAL = 60
+
+
+class InsecureSecretKey(Exception):
+    pass
+
+
+# Con la clave de desarrollo (publicada en el repositorio) cualquiera podría firmar un token de otro
+# usuario, así que fuera de desarrollo la aplicación no arranca sin una SECRET_KEY propia
+def secret_key(app_env=None, key=None):
+    app_env = config.APP_ENV if app_env is None else app_env
+    key = config.SECRET_KEY if key is None else key
+    if key and key != config.DEV_SECRET_KEY:
+        return key
+    if app_env == "development":
+        return config.DEV_SECRET_KEY
+    raise InsecureSecretKey(
+        f"SECRET_KEY must be set to a private random value when APP_ENV is {app_env!r} "
+        "(e.g. python -c 'import secrets; print(secrets.token_urlsafe(32))')."
+    )
+
+
+serializer = URLSafeTimedSerializer(secret_key(), salt="agriculture-session")
+
+
+# Caché LRU con expiración por entrada
+class TTLCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Tokens revocados (logout) hasta que vencen por sí solos: solo el jti y su expiración. La lista
+# vive en la tabla sesion_revocada; cada worker guarda una copia en memoria para verificar el token
+# sin consultar la base y le agrega las de la tabla cada SESSION_REVOCATION_SYNC segundos (también al
+# arrancar, así que un worker reciclado no pierde las revocaciones).
+class RevocationList:
+    def __init__(self):
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._next_compaction = time.time() + COMPACT_INTERVAL
+
+    def revoke(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti):
+        now = time.time()
+        if now >= self._next_compaction:
+            self.compact(now)
+        return jti in self._revoked
+
+    def compact(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+            self._next_compaction = now + COMPACT_INTERVAL
+
+    # Solo hay filas de logouts de las últimas SESSION_MAX_AGE horas, así que se leen todas
+    async def sync(self, db):
+        rows = (await db.execute(
+            select(SesionRevocada.JTI, SesionRevocada.Expira).where(SesionRevocada.Expira > time.time())
+        )).all()
+        with self._lock:
+            # Se conservan las revocaciones locales que todavía no se leyeron de la base
+            self._revoked = {**self._revoked, **dict(rows)}
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+user_cache = TTLCache(config.USER_CACHE_SIZE, config.USER_CACHE_TTL)
+revoked_tokens = RevocationList()
+
+
+def user_record(user):
+    return {
+        "id": user.id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "phone": user.phone,
+    }
+
+
+# El token lleva el id y el nombre para mostrar; el resto del registro queda en user_cache
+def create_session_token(user):
+    user_cache.set(user.id, user_record(user))
+    return serializer.dumps({
+        "id": user.id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "jti": secrets.token_hex(8),
+    })
+
+
+def decode_session_token(token):
+    if not token:
+        return None
+    try:
+        claims, issued_at = serializer.loads(token, max_age=config.SESSION_MAX_AGE, return_timestamp=True)
+    except BadData:
+        return None
+    if not isinstance(claims, dict) or revoked_tokens.is_revoked(claims.get("jti")):
+        return None
+    claims["expires_at"] = issued_at.timestamp() + config.SESSION_MAX_AGE
+    return claims
+
+
+# Claims de la sesión actual; se verifican una sola vez por request
+def get_session(request):
+    if not hasattr(request.state, "session"):
+        request.state.session = decode_session_token(request.cookies.get(SESSION_COOKIE))
+    return request.state.session
+
+
+# La revocación se guarda en la base para los demás workers; de paso se borran las ya vencidas
+async def revoke_session(request, db):
+    claims = get_session(request)
+    if not claims:
+        return
+    revoked_tokens.revoke(claims["jti"], claims["expires_at"])
+    request.state.session = None
+    await db.execute(delete(SesionRevocada).where(SesionRevocada.Expira <= time.time()))
+    db.add(SesionRevocada(JTI=claims["jti"], Expira=claims["expires_at"]))
+    await db.commit()
+
+
+# Tarea de fondo del lifespan, en cada worker
+async def sync_revocations_periodically(interval=None):
+    interval = interval or config.SESSION_REVOCATION_SYNC
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await revoked_tokens.sync(db)
+        except Exception as e:
+            logger.warning("Session revocation sync failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+# Registro del usuario desde la caché; solo consulta la base de datos si no está o venció
+async def get_user(db, user_id):
+    record = user_cache.get(user_id)
+    if record is None:
+        user = await db.scalar(select(User).filter(User.id == user_id))
+        if not user:
+            return None
+        record = user_record(user)
+        user_cache.set(user_id, record)
+    return record
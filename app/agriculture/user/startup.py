@@ -0,0 +1,124 @@
+import ast
+import asyncio
+import logging
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaMismatch(Exception):
+    pass
+
+
+def read_revision(path):
+    values = {}
+    for node in ast.parse(open(path, encoding="utf-8").read()).body:
+        # revision: str = '...' (anotado, como genera Alembic) o revision = '...'
+        target = node.target if isinstance(node, ast.AnnAssign) else node.targets[0] if isinstance(node, ast.Assign) else None
+        if isinstance(target, ast.Name) and target.id in ("revision", "down_revision") and node.value is not None:
+            values[target.id] = ast.literal_eval(node.value)
+    return values.get("revision"), values.get("down_revision")
+
+
+# Revisiones head de las migraciones, leídas de los scripts sin importar Alembic (más rápido al
+# arrancar). None si la carpeta alembic no está disponible.
+def expected_heads(script_location=None):
+    versions = os.path.join(script_location or config.ALEMBIC_SCRIPT_LOCATION, "versions")
+    if not os.path.isdir(versions):
+        return None
+    revisions, parents = set(), set()
+    for name in os.listdir(versions):
+        if name.endswith(".py"):
+            revision, down_revision = read_revision(os.path.join(versions, name))
+            if revision:
+                revisions.add(revision)
+                if isinstance(down_revision, (tuple, list)):
+                    parents.update(down_revision)
+                elif down_revision:
+                    parents.add(down_revision)
+    return revisions - parents
+
+
+async def current_heads(engine):
+    async with engine.connect() as connection:
+        try:
+            result = await connection.execute(text("SELECT version_num FROM alembic_version"))
+        except DBAPIError:
+            # Sin tabla alembic_version: la base nunca se migró
+            return set()
+        return set(result.scalars())
+
+
+# Espera a la base de datos con reintentos (backoff) sin bloquear el arranque del servidor
+async def wait_for_database(engine, timeout=None):
+    deadline = time.monotonic() + (config.DB_STARTUP_TIMEOUT if timeout is None else timeout)
+    delay = 0.25
+    while True:
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+            return
+        except Exception as e:
+            if time.monotonic() + delay > deadline:
+                raise
+            logger.info("Database not ready (%s); retrying in %.2fs", e.__class__.__name__, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5)
+
+
+async def check_schema(engine, script_location=None):
+    expected = expected_heads(script_location)
+    if expected is None:
+        message = (f"Alembic scripts not found in {script_location or config.ALEMBIC_SCRIPT_LOCATION}; "
+                   "cannot verify the schema version (set ALEMBIC_SCRIPT_LOCATION)")
+        # En modo strict no se arranca sin poder verificar el esquema
+        if config.SCHEMA_CHECK == "strict":
+            raise SchemaMismatch(message)
+        logger.warning("%s", message)
+        return None
+    current = await current_heads(engine)
+    if current != expected:
+        raise SchemaMismatch(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(expected)}. "
+            "Run 'alembic upgrade head'."
+        )
+    return current
+
+
+# Abre varias conexiones del pool a la vez para que los primeros requests no paguen el handshake
+async def warm_pool(engine, connections):
+    async def open_connection():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(open_connection() for _ in range(connections)))
+
+
+async def startup_checks(engine, state):
+    # Cada worker abre sus conexiones un poco después del anterior, para no llegar todos a la vez a PostgreSQL
+    if config.WORKER_INDEX and config.DB_POOL_STAGGER:
+        await asyncio.sleep(config.WORKER_INDEX * config.DB_POOL_STAGGER)
+    start = time.perf_counter()
+    try:
+        await wait_for_database(engine)
+        if config.SCHEMA_CHECK != "off":
+            state["schema"] = sorted(await check_schema(engine) or [])
+        if config.DB_POOL_WARM:
+            await warm_pool(engine, config.DB_POOL_WARM)
+        state["database_ready_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        logger.info("Database ready in %.1f ms", state["database_ready_ms"])
+    except SchemaMismatch as e:
+        state["schema_error"] = str(e)
+        logger.error("%s", e)
+        if config.SCHEMA_CHECK == "strict":
+            raise
+    except Exception as e:
+        state["database_error"] = str(e)
+        logger.error("Database not reachable at startup: %s", e)
+        if config.SCHEMA_CHECK == "strict":
+            raise
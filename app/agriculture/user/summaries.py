@@ -0,0 +1,166 @@
+import asyncio
+from collections import defaultdict
+
+from sqlalchemy import delete, extract, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from .database import AsyncSessionLocal
+from .models import Cultivo, Cosecha, ResumenRendimiento
+
+# Semestres agrícolas: A (enero-junio) y B (julio-diciembre)
+SEASONS = {month: "A" if month <= 6 else "B" for month in range(1, 13)}
+
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def harvest_key(user_id, crop_type, harvest_date):
+    return user_id, crop_type, harvest_date.year, harvest_date.month
+
+
+# Suma los deltas {(user_id, tipo, año, mes): (cantidad, área, cosechas)} a la tabla de resumen
+# con un único INSERT ... ON CONFLICT DO UPDATE, seguro frente a escrituras concurrentes
+async def apply_deltas(db, deltas):
+    rows = [
+        {"user_id": user_id, "Tipo": crop_type, "Anio": year, "Mes": month,
+         "Cantidad_total": quantity, "Area_total": area, "Cosechas": count}
+        for (user_id, crop_type, year, month), (quantity, area, count) in deltas.items()
+        if quantity or area or count
+    ]
+    if not rows:
+        return
+    connection = await db.connection()
+    statement = UPSERTS[connection.dialect.name](ResumenRendimiento)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "Tipo", "Anio", "Mes"],
+        set_={
+            "Cantidad_total": ResumenRendimiento.Cantidad_total + statement.excluded.Cantidad_total,
+            "Area_total": ResumenRendimiento.Area_total + statement.excluded.Area_total,
+            "Cosechas": ResumenRendimiento.Cosechas + statement.excluded.Cosechas,
+        },
+    )
+    await db.execute(statement, rows)
+
+
+def add_delta(deltas, key, quantity, area, sign=1):
+    total = deltas[key]
+    deltas[key] = (total[0] + sign * quantity, total[1] + sign * area, total[2] + sign)
+
+
+def new_deltas():
+    return defaultdict(lambda: (0.0, 0.0, 0))
+
+
+# Cosecha nueva (sign=1) o eliminada (sign=-1)
+async def record_harvest(db, crop_type, harvest, sign=1):
+    deltas = new_deltas()
+    add_delta(deltas, harvest_key(harvest.user_id, crop_type, harvest.Fecha_cosecha),
+              harvest.Cantidad_cosecha, harvest.Area, sign)
+    await apply_deltas(db, deltas)
+
+
+# Cosecha modificada: se resta la versión anterior y se suma la nueva en la misma sentencia
+async def update_harvest(db, crop_type, harvest, old_date, old_quantity, old_area):
+    deltas = new_deltas()
+    add_delta(deltas, harvest_key(harvest.user_id, crop_type, old_date), old_quantity, old_area, -1)
+    add_delta(deltas, harvest_key(harvest.user_id, crop_type, harvest.Fecha_cosecha),
+              harvest.Cantidad_cosecha, harvest.Area)
+    await apply_deltas(db, deltas)
+
+
+# Registros insertados por la importación masiva (diccionarios con las columnas de Cosecha)
+async def record_imported_harvests(db, user_id, records):
+    crop_ids = {record["ID_Cultivo"] for record in records}
+    crop_types = dict((await db.execute(
+        select(Cultivo.ID_Cultivo, Cultivo.Tipo).where(Cultivo.ID_Cultivo.in_(crop_ids))
+    )).all())
+    deltas = new_deltas()
+    for record in records:
+        add_delta(deltas, harvest_key(user_id, crop_types[record["ID_Cultivo"]], record["Fecha_cosecha"]),
+                  record["Cantidad_cosecha"], record["Area"])
+    await apply_deltas(db, deltas)
+
+
+def grouped_harvests(condition):
+    year = extract("year", Cosecha.Fecha_cosecha)
+    month = extract("month", Cosecha.Fecha_cosecha)
+    return (
+        select(Cosecha.user_id, Cultivo.Tipo, year, month,
+               func.sum(Cosecha.Cantidad_cosecha), func.sum(Cosecha.Area), func.count())
+        .join(Cultivo, Cultivo.ID_Cultivo == Cosecha.ID_Cultivo)
+        .where(condition)
+        .group_by(Cosecha.user_id, Cultivo.Tipo, year, month)
+    )
+
+
+# Resta (o suma) de una vez las cosechas que cumplen `condition`; se usa antes de borrar
+# cultivos en bloque o al cambiar el tipo de un cultivo
+async def record_harvests_where(db, condition, sign=1, crop_type=None):
+    deltas = new_deltas()
+    for user_id, tipo, year, month, quantity, area, count in await db.execute(grouped_harvests(condition)):
+        key = (user_id, crop_type or tipo, int(year), int(month))
+        total = deltas[key]
+        deltas[key] = (total[0] + sign * quantity, total[1] + sign * area, total[2] + sign * count)
+    await apply_deltas(db, deltas)
+
+
+# Reconstruye las tablas de resumen desde las cosechas (todas o las de un usuario)
+async def rebuild(db, user_id=None):
+    condition = Cosecha.user_id == user_id if user_id is not None else Cosecha.ID_Cosecha.is_not(None)
+    statement = delete(ResumenRendimiento)
+    if user_id is not None:
+        statement = statement.where(ResumenRendimiento.user_id == user_id)
+    await db.execute(statement)
+    await db.execute(insert(ResumenRendimiento).from_select(
+        ["user_id", "Tipo", "Anio", "Mes", "Cantidad_total", "Area_total", "Cosechas"],
+        grouped_harvests(condition),
+    ))
+
+
+def yield_per_area(quantity, area):
+    return round(quantity / area, 4) if area else None
+
+
+# Tablero de rendimiento desde los resúmenes: por tipo y mes, por tipo y semestre, y por tipo.
+# Solo lee las filas mensuales del usuario, sin importar cuántas cosechas haya.
+async def dashboard(db, user_id, year=None):
+    statement = select(ResumenRendimiento).where(ResumenRendimiento.user_id == user_id, ResumenRendimiento.Cosechas > 0)
+    if year is not None:
+        statement = statement.where(ResumenRendimiento.Anio == year)
+    rows = (await db.scalars(statement.order_by(
+        ResumenRendimiento.Tipo, ResumenRendimiento.Anio, ResumenRendimiento.Mes))).all()
+
+    months, seasons, crops = [], new_deltas(), new_deltas()
+    for row in rows:
+        months.append({
+            "crop_type": row.Tipo, "year": row.Anio, "month": row.Mes,
+            "quantity": row.Cantidad_total, "area": row.Area_total, "harvests": row.Cosechas,
+            "yield_per_area": yield_per_area(row.Cantidad_total, row.Area_total),
+        })
+        for totals, key in ((seasons, (row.Tipo, row.Anio, SEASONS[row.Mes])), (crops, row.Tipo)):
+            total = totals[key]
+            totals[key] = (total[0] + row.Cantidad_total, total[1] + row.Area_total, total[2] + row.Cosechas)
+
+    return {
+        "months": months,
+        "seasons": [
+            {"crop_type": crop_type, "year": year, "season": season, "quantity": quantity, "area": area,
+             "harvests": count, "yield_per_area": yield_per_area(quantity, area)}
+            for (crop_type, year, season), (quantity, area, count) in seasons.items()
+        ],
+        "crops": [
+            {"crop_type": crop_type, "quantity": quantity, "area": area, "harvests": count,
+             "yield_per_area": yield_per_area(quantity, area)}
+            for crop_type, (quantity, area, count) in crops.items()
+        ],
+    }
+
+
+async def rebuild_all():
+    async with AsyncSessionLocal() as db:
+        await rebuild(db)
+        await db.commit()
+
+
+# python -m agriculture.user.summaries  (desde app/): reconstrucción completa
+if __name__ == "__main__":
+    asyncio.run(rebuild_all())
+    print("Yield summaries rebuilt")
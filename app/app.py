@@ -1,30 +1,130 @@
-from fastapi import FastAPI, Request, Form, Depends, Response, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+# Instante en que empieza a cargarse la aplicación (para medir el tiempo de arranque)
+import time
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Request, Form, Depends, Response, HTTPException, UploadFile, File
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from fastapi.concurrency import run_in_threadpool
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import logging
+import os
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from datetime import date
-from agriculture.user.database import SessionLocal, get_db, engine, Base
+from typing import Optional
+from agriculture.user.database import get_async_db, get_read_db, engine, async_engine, replicas
+from agriculture.user.pool import pool_status
+from agriculture.user.pagination import PageParams, paginate
+from agriculture.user.bulk_import import IMPORTS, detect_format, import_file
+from agriculture.user.export import EXPORTS, MEDIA_TYPES, export_rows
+from agriculture.user.session import (SESSION_COOKIE, create_session_token, get_session, get_user, revoke_session,
+                                      sync_revocations_periodically)
+from agriculture.user.hashing import HashingBusy, password_hasher
+from agriculture.user.page_cache import PageCache, enable_bytecode_cache
+from agriculture.user.assets import ASSET_DIRS, PrecompressedStaticFiles, build_assets
+from agriculture.user.startup import startup_checks
+from agriculture.user.cascade import delete_crops
+from agriculture.user.inventory import StockError, compact_periodically, deposit, fill_levels, opening_balance, withdraw
+from agriculture.user import api, config, metrics, summaries
+from agriculture.user.metrics import query_budget
+from agriculture.user.replicas import ReadYourWritesMiddleware
+from agriculture.user.planner import plan_day
+from agriculture.user.forecast import forecast_periodically, forecasts_for
+from agriculture.user.geo import farm_to_pos_matrix, pos_indexes, valid_coordinates
+from agriculture.user.analytics import PERIODS, invalidate as invalidate_sales_analytics, sales_analytics
 from agriculture.user.models import User, Cultivo, Cosecha, Silo, PuntoVenta, Vehiculo, Venta, Encargo
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.exc import SQLAlchemyError
 
-# Crear todas las tablas en la base de datos si no existen
-Base.metadata.create_all(bind=engine)
-app = FastAPI()
+# El esquema lo crea y actualiza Alembic ('alembic upgrade head'); al arrancar solo se verifica la versión
+logger = logging.getLogger(__name__)
 
 # Path to the templates folder
 templates = Jinja2Templates(directory="templates")
+if config.METRICS_ENABLED:
+    metrics.instrument_templates(templates.env)
+enable_bytecode_cache(templates.env, config.TEMPLATE_CACHE_DIR)
+# Estáticos con hash en el nombre; las plantillas los enlazan con asset_url()
+asset_manifest = build_assets()
+templates.env.globals["asset_url"] = asset_manifest.url
+page_cache = PageCache(templates)
+
+# Páginas informativas que solo cambian según haya sesión iniciada
+STATIC_PAGES = [
+    "index.html", "about_us.html", "contact_us.html", "login.html", "register.html",
+    "crop.html", "silo.html", "distribution.html", "vehicles.html", "pos.html", "sales.html",
+]
+
+# El arranque no espera a la base de datos: la verificación del esquema y el precalentamiento
+# del pool corren en segundo plano (en modo 'strict' sí se espera y un error detiene el arranque)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    page_cache.warm(STATIC_PAGES)
+    app.state.startup = {"import_ms": round((started - IMPORT_STARTED) * 1000, 1),
+                         "warmup_ms": round((time.perf_counter() - started) * 1000, 1)}
+    checks = None
+    if config.SCHEMA_CHECK == "strict":
+        await startup_checks(async_engine, app.state.startup)
+    else:
+        checks = asyncio.create_task(startup_checks(async_engine, app.state.startup))
+    # Tareas que deben correr una sola vez por servidor: solo en el primer worker de serve.py (al
+    # reciclarse, su reemplazo conserva el índice 0). Los chequeos de réplicas son de cada proceso.
+    background = []
+    if config.WORKER_INDEX == 0:
+        background = [asyncio.create_task(compact_periodically()), asyncio.create_task(forecast_periodically())]
+    # Logouts hechos en cualquier worker
+    revocations = asyncio.create_task(sync_revocations_periodically())
+    replica_checks = asyncio.create_task(replicas.check_periodically()) if replicas else None
+    logger.info("Application ready in %.1f ms (imports %.1f ms, warmup %.1f ms)",
+                (time.perf_counter() - IMPORT_STARTED) * 1000,
+                app.state.startup["import_ms"], app.state.startup["warmup_ms"])
+    yield
+    for task in background:
+        task.cancel()
+    revocations.cancel()
+    if replica_checks is not None:
+        replica_checks.cancel()
+    if checks is not None:
+        checks.cancel()
+    password_hasher.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+if config.METRICS_ENABLED:
+    # Latencia por ruta, consultas SQL y tiempo de SQL y de plantillas de cada solicitud (ver /metrics)
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(async_engine.sync_engine)
+    for replica in replicas.engines:
+        metrics.instrument_engine(replica.sync_engine)
+    app.add_middleware(metrics.MetricsMiddleware)
+# Lecturas en réplicas: después de escribir, el usuario lee del primario por unos segundos
+app.add_middleware(ReadYourWritesMiddleware, replicas=replicas)
+# API JSON versionada para tabletas e integraciones (ver agriculture/user/api.py)
+app.include_router(api.router)
 
 # Función para verificar si el usuario está autenticado
+# El id sale del token de sesión firmado, sin consultar la base de datos
 def get_current_user_id(request: Request):
-    return request.cookies.get("user_id")
+    claims = get_session(request)
+    return claims["id"] if claims else None
 
 def is_logged_in(request: Request):
     return get_current_user_id(request) is not None
 
+# Los endpoints internos exponen el estado del servidor: solo con X-Internal-Token igual a
+# INTERNAL_TOKEN, y sin INTERNAL_TOKEN no existen
+def require_internal_token(request: Request):
+    token = request.headers.get("X-Internal-Token", "")
+    if not config.INTERNAL_TOKEN or not hmac.compare_digest(token.encode(), config.INTERNAL_TOKEN.encode()):
+        raise HTTPException(status_code=404)
+
+SERVER_BUSY = "The server is busy, please try again in a few seconds."
+INVALID_LOCATION = "Latitude and longitude must be given together, in decimal degrees."
+
 # Esquemas de Pydantic para validar los datos de entrada
 class UserCreate(BaseModel):
     first_name: str
@@ -41,15 +141,15 @@ class UserLogin(BaseModel):
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     user_logged_in = is_logged_in(request)
-    return templates.TemplateResponse("index.html", {"request": request, "user_logged_in": user_logged_in})
+    return page_cache.response(request, "index.html", user_logged_in)
 
 @app.get("/login", response_class=HTMLResponse)
 async def login(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+    return page_cache.response(request, "login.html")
 
 @app.get("/register", response_class=HTMLResponse)
 async def register(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
+    return page_cache.response(request, "register.html")
 
 @app.post("/register", response_class=HTMLResponse)
 async def register_user(
@@ -60,26 +160,32 @@ async def register_user(
     phone: str = Form(...),
     hashed_password: str = Form(...),
     confirm_password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     if hashed_password != confirm_password:
         return templates.TemplateResponse("register.html", {"request": request, "error": "Passwords do not match."})
 
+    # El formulario envía la contraseña en texto plano; aquí se calcula el hash argon2
+    try:
+        password_hash = await password_hasher.hash(hashed_password)
+    except HashingBusy:
+        return templates.TemplateResponse("register.html", {"request": request, "error": SERVER_BUSY}, status_code=503)
+
     new_user = User(
         first_name=first_name,
         last_name=last_name,
         email=email,
         phone=phone,
-        hashed_password=hashed_password
+        hashed_password=password_hash
     )
 
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         return templates.TemplateResponse("login.html", {"request": request, "message": "User created successfully! Please log in."})
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse("register.html", {"request": request, "error": "The email is already registered. Please use another one."})
 
 @app.post("/login", response_class=HTMLResponse)
@@ -88,47 +194,60 @@ async def login_user(
     response: Response,
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_user = db.query(User).filter(User.email == email).first()
-
-    if not db_user or db_user.hashed_password != password:
+    db_user = await db.scalar(select(User).filter(User.email == email))
+    try:
+        if db_user is None:
+            valid, new_hash = await password_hasher.verify_unknown(password)
+        else:
+            valid, new_hash = await password_hasher.verify(db_user.hashed_password, password)
+    except HashingBusy:
+        return templates.TemplateResponse("login.html", {"request": request, "error": SERVER_BUSY}, status_code=503)
+    if not valid:
         return templates.TemplateResponse("login.html", {"request": request, "error": "Invalid email or password."})
 
+    # Cambiaron los parámetros de argon2 o la contraseña estaba guardada sin hash
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await db.commit()
+
     response = RedirectResponse(url="/", status_code=302)
-    response.set_cookie(key="user_id", value=str(db_user.id), httponly=True)
+    response.set_cookie(key=SESSION_COOKIE, value=create_session_token(db_user), httponly=True,
+                        max_age=config.SESSION_MAX_AGE, samesite="lax")
     return response
 
 @app.get("/logout", response_class=HTMLResponse)
-async def logout(request: Request):
+async def logout(request: Request, db: AsyncSession = Depends(get_async_db)):
+    await revoke_session(request, db)
     response = RedirectResponse(url="/")
-    response.delete_cookie("user_id")
+    response.delete_cookie(SESSION_COOKIE)
     return response
 
 @app.get("/profile", response_class=HTMLResponse)
-async def profile(request: Request, db: Session = Depends(get_db)):
+async def profile(request: Request, db: AsyncSession = Depends(get_async_db)):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await get_user(db, user_id)
     if not db_user:
         return RedirectResponse(url="/login")
 
     return templates.TemplateResponse("profile.html", {
         "request": request,
         "user_logged_in": True,
-        "first_name": db_user.first_name,
-        "last_name": db_user.last_name,
-        "email": db_user.email,
-        "phone": db_user.phone
+        "first_name": db_user["first_name"],
+        "last_name": db_user["last_name"],
+        "email": db_user["email"],
+        "phone": db_user["phone"]
     })
 
 # Endpoints para cultivos
 @app.get("/crop", response_class=HTMLResponse)
 async def crop(request: Request):
     user_logged_in = is_logged_in(request)
-    return templates.TemplateResponse("crop.html", {"request": request, "user_logged_in": user_logged_in})
+    return page_cache.response(request, "crop.html", user_logged_in)
 
 @app.post("/crop_detail", response_class=HTMLResponse)
 async def register_crop(
@@ -139,11 +258,15 @@ async def register_crop(
     planting_date: date = Form(...),
     growing_state: str = Form(...),
     needs: str = Form(...),
-    db: Session = Depends(get_db)
+    latitud: Optional[float] = Form(None),
+    longitud: Optional[float] = Form(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
+    if (latitud is None) != (longitud is None) or (latitud is not None and not valid_coordinates(latitud, longitud)):
+        return templates.TemplateResponse("crop.html", {"request": request, "error": INVALID_LOCATION}, status_code=400)
 
     try:
         new_crop = Cultivo(
@@ -153,55 +276,66 @@ async def register_crop(
             Fecha_siembra=planting_date,
             Estado_crecimiento=growing_state,
             Necesidades_tratamiento=needs,
+            Latitud=latitud,
+            Longitud=longitud,
             user_id=user_id
         )
         db.add(new_crop)
-        db.commit()
-        db.refresh(new_crop)
+        await db.commit()
+        await db.refresh(new_crop)
         return templates.TemplateResponse("crop_detail.html", {"request": request, "message": "Crop registered successfully!"})
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse("crop.html", {"request": request, "error": f"Failed to register crop. Error: {str(e)}"})
 
 
 @app.get("/crop_delete/{id_crop}", response_class=HTMLResponse)
-async def delete_crop(request: Request, id_crop: int, db: Session = Depends(get_db)):
+async def delete_crop(request: Request, id_crop: int, db: AsyncSession = Depends(get_async_db)):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
-    # Obtener el cultivo específico del usuario autenticado
-    crop = db.query(Cultivo).filter(Cultivo.ID_Cultivo == id_crop, Cultivo.user_id == user_id).first()
-    if not crop:
-        return templates.TemplateResponse("cultivation.html",
-                                          {"request": request, "error": "Crop not found or unauthorized access."})
-
-
     try:
-        # Eliminar todas las cosechas relacionadas
-        db.query(Cosecha).filter(Cosecha.ID_Cultivo == id_crop).delete()
-
-        # Eliminar todos los silos relacionados
-        db.query(Silo).filter(Silo.ID_Cosecha == id_crop).delete()
-
-        # Eliminar el cultivo principal
-        db.delete(crop)
-        db.commit()
+        # Eliminar el cultivo con sus cosechas, silos, vehículos y encargos
+        deleted = await delete_crops(db, user_id, [id_crop])
+        if not deleted["cultivo"]:
+            await db.rollback()
+            return templates.TemplateResponse("cultivation.html",
+                                              {"request": request, "error": "Crop not found or unauthorized access."})
+        await db.commit()
 
         # Redirigir al usuario a la página de cultivos
         return RedirectResponse(url="/cultivation", status_code=302)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse("cultivation.html",
                                           {"request": request, "error": f"Failed to delete crop. Error: {str(e)}"})
+
+# Borrado de varios cultivos a la vez (p. ej. al cerrar una temporada)
+@app.post("/crop_delete", response_class=HTMLResponse)
+async def delete_crop_list(request: Request, crop_ids: list[int] = Form(...), db: AsyncSession = Depends(get_async_db)):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+
+    try:
+        await delete_crops(db, user_id, crop_ids)
+        await db.commit()
+        return RedirectResponse(url="/cultivation", status_code=302)
+    except Exception as e:
+        await db.rollback()
+        return templates.TemplateResponse("cultivation.html",
+                                          {"request": request, "error": f"Failed to delete crops. Error: {str(e)}"})
+
 @app.get("/crop_update/{id_crop}", response_class=HTMLResponse)
-async def get_crop_update(request: Request, id_crop: int, db: Session = Depends(get_db)):
+@query_budget(1)
+async def get_crop_update(request: Request, id_crop: int, db: AsyncSession = Depends(get_async_db)):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
     # Obtener el cultivo para el usuario autenticado
-    crop1 = db.query(Cultivo).filter(Cultivo.ID_Cultivo == id_crop, Cultivo.user_id == user_id).first()
+    crop1 = await db.scalar(select(Cultivo).filter(Cultivo.ID_Cultivo == id_crop, Cultivo.user_id == user_id))
     if not crop1:
         print("Cultivo no encontrado o el usuario no tiene permiso.")
         return RedirectResponse(url="/cultivation")
@@ -225,74 +359,90 @@ async def post_crop_update(
     planting_date: date = Form(...),
     growing_state: str = Form(...),
     needs: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
     # Verificar que el cultivo existe y pertenece al usuario
-    crop1 = db.query(Cultivo).filter(Cultivo.ID_Cultivo == id_crop, Cultivo.user_id == user_id).first()
+    crop1 = await db.scalar(select(Cultivo).filter(Cultivo.ID_Cultivo == id_crop, Cultivo.user_id == user_id))
     if not crop1:
         return templates.TemplateResponse("cultivation.html", {"request": request, "error": "Cultivo no encontrado o acceso no autorizado"})
 
-    # Actualizar el cultivo con los nuevos datos
-    crop1.Tipo = crop_type
-    crop1.Area_cultivada = area
-    crop1.Fecha_siembra = planting_date
-    crop1.Estado_crecimiento = growing_state
-    crop1.Necesidades_tratamiento = needs
-
     try:
-        db.commit()
-        db.refresh(crop1)
+        # Si cambia el tipo, las cosechas del cultivo pasan al resumen del nuevo tipo
+        if crop_type != crop1.Tipo:
+            await summaries.record_harvests_where(db, Cosecha.ID_Cultivo == id_crop, sign=-1)
+            await summaries.record_harvests_where(db, Cosecha.ID_Cultivo == id_crop, crop_type=crop_type)
+
+        # Actualizar el cultivo con los nuevos datos
+        crop1.Tipo = crop_type
+        crop1.Area_cultivada = area
+        crop1.Fecha_siembra = planting_date
+        crop1.Estado_crecimiento = growing_state
+        crop1.Necesidades_tratamiento = needs
+        await db.commit()
+        await db.refresh(crop1)
         return templates.TemplateResponse("cultivation.html", {"request": request, "message": "Crop updated succesfully!", "crop": crop1})
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse("crop_update.html", {"request": request, "error": f"Cannot update crop. Error: {str(e)}", "crop": crop1})
 
 @app.get("/cultivation", response_class=HTMLResponse)
-async def cultivation(request: Request, db: Session = Depends(get_db)):
+@query_budget(2)
+async def cultivation(request: Request, params: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
-    user_crops = db.query(Cultivo).filter(Cultivo.user_id == user_id).all()
-    crops_data = [
-        (crop.ID_Cultivo, crop.Tipo, crop.Area_cultivada, crop.Fecha_siembra, crop.Estado_crecimiento, crop.Necesidades_tratamiento)
-        for crop in user_crops
-    ]
+    page = await paginate(
+        db,
+        (Cultivo.ID_Cultivo, Cultivo.Tipo, Cultivo.Area_cultivada, Cultivo.Fecha_siembra, Cultivo.Estado_crecimiento, Cultivo.Necesidades_tratamiento),
+        Cultivo.ID_Cultivo, Cultivo.user_id, user_id, params, date_column=Cultivo.Fecha_siembra
+    )
+
+    # Pronósticos precalculados por la tarea de fondo; la página no calcula nada
+    forecasts = await forecasts_for(db, [row[0] for row in page.rows])
 
     return templates.TemplateResponse("cultivation.html", {
         "request": request,
         "user_logged_in": True,
-        "value": crops_data
+        "value": page.rows,
+        "forecasts": forecasts,
+        "next_url": page.next_url(request)
     })
 
+# Rendimiento por tipo de cultivo (mes, semestre y total), leído de las tablas de resumen
+@app.get("/yield_dashboard")
+@query_budget(1)
+async def yield_dashboard(request: Request, year: Optional[int] = None, db: AsyncSession = Depends(get_read_db)):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+    return JSONResponse(await summaries.dashboard(db, user_id, year))
+
 # Endpoints para silos
 
 
 @app.get("/silo", response_class=HTMLResponse)
 async def silo(request: Request):
     user_logged_in = is_logged_in(request)
-    return templates.TemplateResponse("silo.html", {"request": request, "user_logged_in": user_logged_in})
+    return page_cache.response(request, "silo.html", user_logged_in)
 
 @app.get("/silocreation", response_class=HTMLResponse)
-async def silocreation(request: Request, db: Session= Depends(get_db)):
+@query_budget(1)
+async def silocreation(request: Request, params: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
-    user_silos=db.query(Silo).filter(Silo.user_id==user_id).all()
-    silos_data = [
-        (silo.ID_Silo, silo.Capacidad, silo.Contenido)
-        for silo in user_silos
-    ]
+    page = await paginate(db, (Silo.ID_Silo, Silo.Capacidad, Silo.Contenido), Silo.ID_Silo, Silo.user_id, user_id, params)
 
     return templates.TemplateResponse("silocreation.html",{
         "request":request,
         "user_logged_in":True,
-        "value":silos_data
-
+        "value":page.rows,
+        "next_url":page.next_url(request)
     })
 
 @app.post("/silo_detail", response_class=HTMLResponse)
@@ -302,7 +452,7 @@ async def register_silo(
     capacidad: float = Form(...),
     contenido: float = Form(...),
     id_cosecha: int = 11,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user_id = get_current_user_id(request)
     if not user_id:
@@ -317,16 +467,57 @@ async def register_silo(
             user_id=user_id
         )
         db.add(new_silo)
-        db.commit()
-        db.refresh(new_silo)
+        await db.flush()
+        # El contenido inicial queda como primer movimiento del libro del silo
+        db.add(opening_balance(new_silo))
+        await db.commit()
+        await db.refresh(new_silo)
         return templates.TemplateResponse("silo.html", {"request": request, "message": "Silo registered successfully!"})
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse("silo.html", {"request": request, "error": f"Failed to register silo. Error: {str(e)}"})
 
+# Depósito o retiro de producto en un silo; el saldo se actualiza de forma atómica
+@app.post("/silo_movement/{id_silo}", response_class=HTMLResponse)
+async def register_silo_movement(
+    request: Request,
+    id_silo: int,
+    quantity: float = Form(...),
+    kind: str = Form(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+    if kind not in ("deposit", "withdraw"):
+        return templates.TemplateResponse("silo.html", {"request": request, "error": "Movement must be 'deposit' or 'withdraw'."}, status_code=400)
+
+    try:
+        if kind == "deposit":
+            await deposit(db, user_id, id_silo, quantity)
+        else:
+            await withdraw(db, user_id, id_silo, quantity)
+        await db.commit()
+        return RedirectResponse(url="/silocreation", status_code=302)
+    except StockError as e:
+        await db.rollback()
+        return templates.TemplateResponse("silo.html", {"request": request, "error": str(e)}, status_code=409)
+    except Exception as e:
+        await db.rollback()
+        return templates.TemplateResponse("silo.html", {"request": request, "error": f"Failed to register movement. Error: {str(e)}"})
+
+# Nivel de llenado actual de todos los silos del usuario
+@app.get("/silo_levels")
+@query_budget(1)
+async def silo_levels(request: Request, db: AsyncSession = Depends(get_read_db)):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+    return JSONResponse(await fill_levels(db, user_id))
+
 @app.get("/silo_update/{id_silo}", response_class=HTMLResponse)
-async def update_silo(request: Request, id_silo: int, db: Session = Depends(get_db)):
-    silo = db.query(Silo).filter(Silo.ID_Silo == id_silo).first()
+async def update_silo(request: Request, id_silo: int, db: AsyncSession = Depends(get_async_db)):
+    silo = await db.scalar(select(Silo).filter(Silo.ID_Silo == id_silo))
     if not silo:
         return RedirectResponse(url="/silocreation")
     return templates.TemplateResponse("silo_update.html", {"request": request, "id_silo": id_silo, "silo": silo})
@@ -340,14 +531,15 @@ async def register_harvest(
     harvest_date: date = Form(...),
     quantity: float = Form(...),
     area: float = Form(...),
-    db: Session = Depends(get_db)
+    id_silo: Optional[int] = Form(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
     # Verificar que el cultivo existe y pertenece al usuario actual
-    crop = db.query(Cultivo).filter(Cultivo.ID_Cultivo == id_crop, Cultivo.user_id == user_id).first()
+    crop = await db.scalar(select(Cultivo).filter(Cultivo.ID_Cultivo == id_crop, Cultivo.user_id == user_id))
     if not crop:
         return templates.TemplateResponse("cultivation.html", {"request": request, "error": "Crop not found or unauthorized access."})
 
@@ -361,11 +553,19 @@ async def register_harvest(
             user_id=user_id
         )
         db.add(new_harvest)
-        db.commit()
-        db.refresh(new_harvest)
+        await summaries.record_harvest(db, crop.Tipo, new_harvest)
+        if id_silo is not None:
+            # La cosecha se guarda en el silo indicado dentro de la misma transacción
+            await db.flush()
+            await deposit(db, user_id, id_silo, quantity, harvest_id=new_harvest.ID_Cosecha)
+        await db.commit()
+        await db.refresh(new_harvest)
         return RedirectResponse(url="/harvested", status_code=302)
+    except StockError as e:
+        await db.rollback()
+        return templates.TemplateResponse("harvest.html", {"request": request, "error": str(e)}, status_code=409)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse("harvest.html", {
             "request": request,
             "error": f"Failed to register harvest. Error: {str(e)}"
@@ -378,27 +578,29 @@ async def update_harvest(
     id_harvest: int,
     harvest_date: date = Form(...),
     quantity: float = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
     # Buscar la cosecha del usuario actual
-    db_harvest = db.query(Cosecha).filter(Cosecha.ID_Cosecha == id_harvest, Cosecha.user_id == user_id).first()
+    db_harvest = await db.scalar(select(Cosecha).filter(Cosecha.ID_Cosecha == id_harvest, Cosecha.user_id == user_id))
     if not db_harvest:
         return templates.TemplateResponse("harvest_update.html", {"request": request, "error": "Harvest not found or unauthorized access."})
 
-    # Actualizar datos
-    db_harvest.Fecha_recoleccion = harvest_date
-    db_harvest.Cantidad = quantity
-
     try:
-        db.commit()
-        db.refresh(db_harvest)
+        # Actualizar datos y mover la diferencia en el resumen de rendimiento
+        old_date, old_quantity = db_harvest.Fecha_cosecha, db_harvest.Cantidad_cosecha
+        db_harvest.Fecha_cosecha = harvest_date
+        db_harvest.Cantidad_cosecha = quantity
+        crop_type = await db.scalar(select(Cultivo.Tipo).filter(Cultivo.ID_Cultivo == db_harvest.ID_Cultivo))
+        await summaries.update_harvest(db, crop_type, db_harvest, old_date, old_quantity, db_harvest.Area)
+        await db.commit()
+        await db.refresh(db_harvest)
         return RedirectResponse(url="/harvested", status_code=302)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse("harvest_update.html", {
             "request": request,
             "error": f"Failed to update harvest. Error: {str(e)}",
@@ -406,14 +608,14 @@ async def update_harvest(
         })
 
 @app.get("/harvest/{id_crop}", response_class=HTMLResponse)
-async def harvest_form(request: Request, id_crop: int, db: Session = Depends(get_db)):
+async def harvest_form(request: Request, id_crop: int, db: AsyncSession = Depends(get_async_db)):
     user_logged_in = is_logged_in(request)
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
     # Obtener el cultivo y verificar que pertenece al usuario actual
-    crop = db.query(Cultivo).filter(Cultivo.ID_Cultivo == id_crop, Cultivo.user_id == user_id).first()
+    crop = await db.scalar(select(Cultivo).filter(Cultivo.ID_Cultivo == id_crop, Cultivo.user_id == user_id))
     if not crop:
         return RedirectResponse(url="/cultivation")
 
@@ -426,32 +628,79 @@ async def harvest_form(request: Request, id_crop: int, db: Session = Depends(get
     })
 
 @app.get("/harvested", response_class=HTMLResponse)
-async def harvested(request: Request, db: Session = Depends(get_db)):
+@query_budget(1)
+async def harvested(request: Request, params: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
-    # Obtener todas las cosechas del usuario
-    user_harvests = db.query(Cosecha).filter(Cosecha.user_id == user_id).all()
-    harvests_data = [
-        (harvest.ID_Cosecha, harvest.Fecha_cosecha, harvest.Cantidad_cosecha, harvest.Area, harvest.ID_Cultivo, harvest.user_id)
-        for harvest in user_harvests
-    ]
+    # Obtener una página de cosechas del usuario
+    page = await paginate(
+        db,
+        (Cosecha.ID_Cosecha, Cosecha.Fecha_cosecha, Cosecha.Cantidad_cosecha, Cosecha.Area, Cosecha.ID_Cultivo, Cosecha.user_id),
+        Cosecha.ID_Cosecha, Cosecha.user_id, user_id, params, date_column=Cosecha.Fecha_cosecha
+    )
 
     return templates.TemplateResponse("harvested.html", {
         "request": request,
         "user_logged_in": True,
-        "value": harvests_data
+        "value": page.rows,
+        "next_url": page.next_url(request)
     })
 
 
 
+# Carga masiva de cultivos o cosechas desde CSV/NDJSON; devuelve el reporte de errores por fila
+@app.post("/import/{entity}")
+async def bulk_import(
+    request: Request,
+    entity: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+
+    spec = IMPORTS.get(entity)
+    if not spec:
+        raise HTTPException(status_code=404, detail="Unknown import type. Use 'crops' or 'harvests'.")
+
+    report = await import_file(db, spec, file.file, detect_format(file.filename, format), user_id)
+    return JSONResponse(report.to_dict())
+
+# Exportación de cosechas, ventas o encargos en CSV/NDJSON, enviada por partes mientras se lee la consulta
+@app.get("/export/{entity}")
+async def export(
+    request: Request,
+    entity: str,
+    format: str = "csv",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+
+    spec = EXPORTS.get(entity)
+    if not spec:
+        raise HTTPException(status_code=404, detail="Unknown export type. Use 'harvests', 'sales' or 'assignments'.")
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unknown format. Use 'csv' or 'ndjson'.")
+
+    return StreamingResponse(
+        export_rows(spec, user_id, format, date_from, date_to),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{format}"'}
+    )
+
 
 #Endpoints distribucion
 @app.get("/distribution", response_class=HTMLResponse)
 async def distribution(request: Request):
     user_logged_in = is_logged_in(request)
-    return templates.TemplateResponse("distribution.html", {"request": request, "user_logged_in": user_logged_in})
+    return page_cache.response(request, "distribution.html", user_logged_in)
 
 #Endpoints encargos
 @app.get("/assignments", response_class=HTMLResponse)
@@ -462,18 +711,24 @@ async def assignmnets(request: Request):
 
 # GET para listar todos los encargos del usuario
 @app.get("/assignment_creation", response_class=HTMLResponse)
-async def assignment_creation(request: Request, db: Session = Depends(get_db)):
+@query_budget(1)
+async def assignment_creation(request: Request, params: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     user_logged_in = is_logged_in(request)
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
     # Filtrar encargos del usuario actual
-    user_assignments = db.query(Encargo).filter(Encargo.user_id == user_id).all()
+    page = await paginate(
+        db,
+        (Encargo.ID_Encargo, Encargo.Fecha, Encargo.Cantidad_producto, Encargo.ID_Vehiculo, Encargo.Punto_Venta_ID),
+        Encargo.ID_Encargo, Encargo.user_id, user_id, params, date_column=Encargo.Fecha
+    )
     return templates.TemplateResponse("assignment_creation.html", {
         "request": request,
         "user_logged_in": user_logged_in,
-        "assignments": user_assignments
+        "assignments": page.rows,
+        "next_url": page.next_url(request)
     })
 
 
@@ -485,7 +740,8 @@ async def register_assignment(
         cantidad_producto: float = Form(...),
         id_vehiculo: int = Form(...),
         punto_venta_id: int = Form(...),
-        db: Session = Depends(get_db)
+        id_silo: Optional[int] = Form(None),
+        db: AsyncSession = Depends(get_async_db)
 ):
     user_id = get_current_user_id(request)
     if not user_id:
@@ -501,15 +757,22 @@ async def register_assignment(
             user_id=user_id
         )
         db.add(new_assignment)
-        db.commit()
-        db.refresh(new_assignment)
+        if id_silo is not None:
+            # El producto despachado sale del silo indicado dentro de la misma transacción
+            await db.flush()
+            await withdraw(db, user_id, id_silo, cantidad_producto, assignment_id=new_assignment.ID_Encargo)
+        await db.commit()
+        await db.refresh(new_assignment)
         return templates.TemplateResponse("assignment_detail.html", {
             "request": request,
             "message": "Assignment registered successfully!",
             "assignment": new_assignment
         })
+    except StockError as e:
+        await db.rollback()
+        return templates.TemplateResponse("assignment_detail.html", {"request": request, "error": str(e)}, status_code=409)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse("assignment_detail.html", {
             "request": request,
             "error": f"Failed to register assignment. Error: {str(e)}"
@@ -519,29 +782,58 @@ async def assignment_update(request: Request):
     user_logged_in = is_logged_in(request)
     return templates.TemplateResponse("assignment_creation.html", {"request": request, "user_logged_in": user_logged_in})
 
+# Propuesta de reparto de los encargos de un día en los vehículos del usuario, respetando su capacidad
+@app.get("/assignment_plan")
+async def assignment_plan(request: Request, fecha: date, db: AsyncSession = Depends(get_read_db)):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+    plan = await plan_day(db, user_id, fecha)
+    return JSONResponse(plan.to_dict())
+
+# Aplica el reparto: actualiza el vehículo de cada encargo del día
+@app.post("/assignment_plan")
+async def apply_assignment_plan(request: Request, fecha: date = Form(...), db: AsyncSession = Depends(get_async_db)):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+    try:
+        plan = await plan_day(db, user_id, fecha, apply=True)
+        await db.commit()
+        return JSONResponse(plan.to_dict())
+    except Exception as e:
+        await db.rollback()
+        return JSONResponse({"error": f"Failed to apply plan. Error: {str(e)}"}, status_code=500)
+
 
 #Endpoints vehiculos
 
 @app.get("/vehicles", response_class=HTMLResponse)
 async def vehicles(request: Request):
     user_logged_in = is_logged_in(request)
-    return templates.TemplateResponse("vehicles.html", {"request": request, "user_logged_in": user_logged_in})
+    return page_cache.response(request, "vehicles.html", user_logged_in)
 
 
 # GET para listar todos los vehículos del usuario
 @app.get("/vehicle_creation", response_class=HTMLResponse)
-async def vehicle_creation(request: Request, db: Session = Depends(get_db)):
+@query_budget(1)
+async def vehicle_creation(request: Request, params: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     user_logged_in = is_logged_in(request)
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
     # Filtrar vehículos del usuario actual
-    user_vehicles = db.query(Vehiculo).filter(Vehiculo.user_id == user_id).all()
+    page = await paginate(
+        db,
+        (Vehiculo.ID_Vehiculo, Vehiculo.Matricula, Vehiculo.Capacidad_Carga, Vehiculo.ID_Cosecha),
+        Vehiculo.ID_Vehiculo, Vehiculo.user_id, user_id, params
+    )
     return templates.TemplateResponse("vehicle_creation.html", {
         "request": request,
         "user_logged_in": user_logged_in,
-        "vehicles": user_vehicles
+        "vehicles": page.rows,
+        "next_url": page.next_url(request)
     })
 
 # POST para registrar un nuevo vehículo
@@ -551,7 +843,7 @@ async def register_vehicle(
         matricula: str = Form(...),
         capacidad_carga: float = Form(...),
         id_cosecha: int = Form(...),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     user_id = get_current_user_id(request)
     if not user_id:
@@ -566,15 +858,15 @@ async def register_vehicle(
             user_id=user_id
         )
         db.add(new_vehicle)
-        db.commit()
-        db.refresh(new_vehicle)
+        await db.commit()
+        await db.refresh(new_vehicle)
         return templates.TemplateResponse("vehicle_detail.html", {
             "request": request,
             "message": "Vehicle registered successfully!",
             "vehicle": new_vehicle
         })
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse("vehicle_detail.html", {
             "request": request,
             "error": f"Failed to register vehicle. Error: {str(e)}"
@@ -590,23 +882,29 @@ async def vehicle_update(request: Request):
 @app.get("/pos", response_class=HTMLResponse)
 async def pos(request: Request):
     user_logged_in = is_logged_in(request)
-    return templates.TemplateResponse("pos.html", {"request": request, "user_logged_in": user_logged_in})
+    return page_cache.response(request, "pos.html", user_logged_in)
 
 
 # GET para listar todos los puntos de venta del usuario
 @app.get("/pos_creation", response_class=HTMLResponse)
-async def pos_creation(request: Request, db: Session = Depends(get_db)):
+@query_budget(1)
+async def pos_creation(request: Request, params: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     user_logged_in = is_logged_in(request)
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
 
     # Filtrar puntos de venta del usuario actual
-    user_pos = db.query(PuntoVenta).filter(PuntoVenta.user_id == user_id).all()
+    page = await paginate(
+        db,
+        (PuntoVenta.ID_Punto_Venta, PuntoVenta.Nombre, PuntoVenta.Direccion),
+        PuntoVenta.ID_Punto_Venta, PuntoVenta.user_id, user_id, params
+    )
     return templates.TemplateResponse("pos_creation.html", {
         "request": request,
         "user_logged_in": user_logged_in,
-        "points_of_sale": user_pos
+        "points_of_sale": page.rows,
+        "next_url": page.next_url(request)
     })
 
 # POST para registrar un nuevo punto de venta
@@ -615,33 +913,72 @@ async def register_pos(
         request: Request,
         nombre: str = Form(...),
         direccion: str = Form(...),
-        db: Session = Depends(get_db)
+        latitud: Optional[float] = Form(None),
+        longitud: Optional[float] = Form(None),
+        db: AsyncSession = Depends(get_async_db)
 ):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login")
+    if (latitud is None) != (longitud is None) or (latitud is not None and not valid_coordinates(latitud, longitud)):
+        return templates.TemplateResponse("pos_creation.html", {"request": request, "error": INVALID_LOCATION}, status_code=400)
 
     try:
         # Crear y agregar el nuevo punto de venta
         new_pos = PuntoVenta(
             Nombre=nombre,
             Direccion=direccion,
+            Latitud=latitud,
+            Longitud=longitud,
             user_id=user_id
         )
         db.add(new_pos)
-        db.commit()
-        db.refresh(new_pos)
-        return templates.TemplateResponse("pos_detail.html", {
-            "request": request,
-            "message": "Point of Sale registered successfully!",
-            "pos": new_pos
-        })
+        await db.commit()
+        await db.refresh(new_pos)
+        if latitud is not None:
+            # Se agrega al índice geográfico del usuario sin reconstruirlo
+            pos_indexes.add(user_id, new_pos.ID_Punto_Venta, latitud, longitud, nombre)
+        # pos_detail.html no existe: se vuelve al listado de puntos de venta
+        return RedirectResponse(url="/pos_creation", status_code=302)
     except Exception as e:
-        db.rollback()
-        return templates.TemplateResponse("pos_detail.html", {
+        await db.rollback()
+        return templates.TemplateResponse("pos_creation.html", {
             "request": request,
             "error": f"Failed to register Point of Sale. Error: {str(e)}"
         })
+# Puntos de venta más cercanos a una ubicación
+@app.get("/pos_nearest")
+@query_budget(1)
+async def pos_nearest(request: Request, lat: float, lon: float, k: int = 5, db: AsyncSession = Depends(get_read_db)):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+    if not valid_coordinates(lat, lon) or not 1 <= k <= 1000:
+        raise HTTPException(status_code=400, detail="Invalid coordinates or k (1-1000).")
+    index = await pos_indexes.get(db, user_id)
+    return JSONResponse(index.nearest(lat, lon, k))
+
+# Puntos de venta a menos de radius_km de una ubicación
+@app.get("/pos_within")
+@query_budget(1)
+async def pos_within(request: Request, lat: float, lon: float, radius_km: float, db: AsyncSession = Depends(get_read_db)):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+    if not valid_coordinates(lat, lon) or radius_km <= 0:
+        raise HTTPException(status_code=400, detail="Invalid coordinates or radius.")
+    index = await pos_indexes.get(db, user_id)
+    return JSONResponse(index.within(lat, lon, radius_km))
+
+# Matriz de distancias (km) de las fincas a los puntos de venta, para costear rutas
+@app.get("/distance_matrix")
+@query_budget(2)
+async def distance_matrix_view(request: Request, db: AsyncSession = Depends(get_read_db)):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+    return JSONResponse(await farm_to_pos_matrix(db, user_id))
+
 @app.get("/pos_update", response_class=HTMLResponse)
 async def pos_update(request: Request):
     user_logged_in = is_logged_in(request)
@@ -650,7 +987,54 @@ async def pos_update(request: Request):
 @app.get("/sales", response_class=HTMLResponse)
 async def sales(request: Request):
     user_logged_in = is_logged_in(request)
-    return templates.TemplateResponse("sales.html", {"request": request, "user_logged_in": user_logged_in})
+    return page_cache.response(request, "sales.html", user_logged_in)
+
+# POST para registrar una venta en un punto de venta del usuario
+@app.post("/sale_detail", response_class=HTMLResponse)
+async def register_sale(
+        request: Request,
+        fecha: date = Form(...),
+        cantidad_vendida: float = Form(...),
+        precio: float = Form(...),
+        id_punto_venta: int = Form(...),
+        db: AsyncSession = Depends(get_async_db)
+):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+
+    pos = await db.scalar(select(PuntoVenta.ID_Punto_Venta).filter(
+        PuntoVenta.ID_Punto_Venta == id_punto_venta, PuntoVenta.user_id == user_id))
+    if not pos:
+        return templates.TemplateResponse("sales.html", {"request": request, "error": "Point of Sale not found or unauthorized access."})
+
+    try:
+        db.add(Venta(
+            Fecha=fecha,
+            Cantidad_vendida=cantidad_vendida,
+            Precio=precio,
+            ID_Punto_Venta=id_punto_venta,
+            user_id=user_id
+        ))
+        await db.commit()
+        # La analítica en caché de este usuario ya no está al día
+        invalidate_sales_analytics(user_id)
+        return RedirectResponse(url="/sales", status_code=302)
+    except Exception as e:
+        await db.rollback()
+        return templates.TemplateResponse("sales.html", {"request": request, "error": f"Failed to register sale. Error: {str(e)}"})
+
+# Ingresos por período, promedio móvil diario, ranking de puntos de venta y percentiles de precio
+@app.get("/sales_analytics")
+@query_budget(2)
+async def sales_analytics_view(request: Request, period: str = "month", window: int = 7,
+                               db: AsyncSession = Depends(get_read_db)):
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return RedirectResponse(url="/login")
+    if period not in PERIODS or not 1 <= window <= 366:
+        raise HTTPException(status_code=400, detail="Use period 'day', 'week', 'month' or 'year' and a window between 1 and 366 days.")
+    return JSONResponse(await sales_analytics(db, user_id, period, window))
 
 @app.get("/sales_creation", response_class=HTMLResponse)
 async def sales_creation(request: Request):
@@ -669,15 +1053,35 @@ async def submit_success(request: Request):
 
 @app.get("/contact", response_class=HTMLResponse)
 async def contact(request: Request):
-    return templates.TemplateResponse("contact_us.html", {"request": request})
+    return page_cache.response(request, "contact_us.html")
 
 @app.get("/about_us", response_class=HTMLResponse)
 async def about_us(request: Request):
-    return templates.TemplateResponse("about_us.html", {"request": request})
+    return page_cache.response(request, "about_us.html")
+
+# Endpoints internos
+@app.get("/internal/pool", dependencies=[Depends(require_internal_token)])
+async def pool_stats():
+    # Conexiones ocupadas, libres y en overflow, y tiempos de espera por conexión de cada motor
+    return JSONResponse({
+        "async": pool_status(async_engine.sync_engine.pool),
+        "sync": pool_status(engine.pool),
+        "replicas": [dict(status, pool=pool_status(replica.sync_engine.pool))
+                     for status, replica in zip(replicas.status(), replicas.engines)],
+    })
+
+@app.get("/internal/startup", dependencies=[Depends(require_internal_token)])
+async def startup_stats(request: Request):
+    # Tiempos de arranque y resultado de la verificación del esquema
+    return JSONResponse(request.app.state.startup)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    # Formato de texto de Prometheus; cada worker expone sus propias métricas
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
-# Montar archivos estaticos
-app.mount("/styles", StaticFiles(directory="styles"), name="styles2")
-app.mount("/images", StaticFiles(directory="images"), name="Diego")
-app.mount("/styles", StaticFiles(directory="styles"), name="styles")
-app.mount("/images", StaticFiles(directory="images"), name="Luis")
+# Montar archivos estaticos (generados por build_assets, con variantes precomprimidas)
+for directory in ASSET_DIRS:
+    app.mount(f"/{directory}", PrecompressedStaticFiles(directory=os.path.join(config.STATIC_BUILD_DIR, directory)), name=directory)
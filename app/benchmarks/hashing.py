@@ -0,0 +1,44 @@
+# Micro-benchmark del hash de contraseñas con los parámetros de config.py.
+# Uso (desde app/): python -m benchmarks.hashing --seconds 5 --workers 4
+import argparse
+import asyncio
+import os
+import time
+
+from agriculture.user.hashing import PasswordHashingService
+
+
+async def run(service, seconds):
+    done = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            await service.hash("benchmark-password")
+            done += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(service.workers)))
+    return done, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="argon2 hashes per second per core")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    service = PasswordHashingService(workers=args.workers)
+    params = service.hasher
+    print(f"argon2id t={params.time_cost} m={params.memory_cost}KiB p={params.parallelism}, {args.workers} workers")
+    try:
+        hashes, elapsed = asyncio.run(run(service, args.seconds))
+    finally:
+        service.shutdown()
+    print(f"{hashes} hashes in {elapsed:.2f}s: {hashes / elapsed:.1f} hashes/s, "
+          f"{hashes / elapsed / args.workers:.1f} hashes/s per core, {elapsed * args.workers / hashes * 1000:.1f} ms per hash")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Benchmark del planificador de cargas sobre flotas y encargos sintéticos.
+# Uso (desde app/): python -m benchmarks.load_planner --orders 5000 --vehicles 400 --budget 200
+import argparse
+import random
+import time
+
+from agriculture.user.planner import first_fit_decreasing, plan_loads
+
+# Capacidades típicas de la flota (camionetas a tractomulas)
+CAPACITIES = (3.5, 8, 10, 17, 34)
+
+
+def synthetic(orders, vehicles, seed):
+    rng = random.Random(seed)
+    order_list = [(i, round(min(rng.lognormvariate(1.0, 0.9), max(CAPACITIES)), 2)) for i in range(orders)]
+    fleet = [(i, rng.choice(CAPACITIES)) for i in range(vehicles)]
+    return order_list, fleet
+
+
+# Cota inferior de vehículos: los más grandes hasta cubrir la cantidad total
+def lower_bound(orders, fleet):
+    total, count = sum(q for _, q in orders), 0
+    for _, capacity in sorted(fleet, key=lambda v: -v[1]):
+        if total <= 0:
+            break
+        total -= capacity
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="load planner: first-fit decreasing + local improvement")
+    parser.add_argument("--orders", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--vehicles", type=int, default=0, help="fleet size (default: enough for every order)")
+    parser.add_argument("--budget", type=float, default=200, help="local improvement budget in ms")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'orders':>7} {'fleet':>6} {'ffd ms':>8} {'total ms':>9} {'ffd used':>9} {'used':>5} "
+          f"{'bound':>6} {'util':>6} {'unassigned':>10}")
+    for count in args.orders:
+        fleet_size = args.vehicles or count // 3
+        orders, fleet = synthetic(count, fleet_size, args.seed)
+        start = time.perf_counter()
+        greedy = first_fit_decreasing(orders, fleet)
+        ffd_ms = (time.perf_counter() - start) * 1000
+        ffd_used = len(greedy.used)
+        plan = plan_loads(orders, fleet, args.budget).to_dict()
+        print(f"{count:>7} {fleet_size:>6} {ffd_ms:>8.1f} {plan['elapsed_ms']:>9.1f} {ffd_used:>9} "
+              f"{plan['vehicles_used']:>5} {lower_bound(orders, fleet):>6} {plan['utilization']:>6.3f} "
+              f"{len(plan['unassigned']):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+# Benchmark de latencia de todas las rutas de app.py, en proceso (cliente ASGI, sin servidor ni red),
+# sobre una base SQLite temporal con un conjunto de datos realista. Compara contra una línea base
+# JSON y termina con código 1 si alguna ruta empeora más que el umbral.
+# Uso (desde app/):
+#     python -m benchmarks.routes --save-baseline          # guarda benchmarks/baselines/routes.json
+#     python -m benchmarks.routes --threshold 0.25         # compara el p95 contra la línea base
+#     python -m benchmarks.routes --only /cultivation /api/v1/crops --requests 500 --concurrency 20
+# Las líneas base dependen de la máquina: se comparan solo corridas hechas en el mismo equipo.
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import secrets
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import numpy as np
+
+# La base y los estáticos van a un directorio temporal; debe definirse antes de importar la aplicación.
+# La URL se asigna siempre (no setdefault): prepare() borra todas las tablas, y dentro del contenedor
+# DATABASE_URL apunta a la base real. Tampoco se usan réplicas ni una URL asíncrona distinta.
+BENCH_DIR = tempfile.mkdtemp(prefix="agriculture_bench_")
+BENCH_DATABASE = os.path.join(BENCH_DIR, "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DATABASE}"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["DATABASE_REPLICA_URLS"] = ""
+# Las sesiones del benchmark se firman con una clave desechable (la imagen exige SECRET_KEY)
+os.environ["SECRET_KEY"] = secrets.token_urlsafe(32)
+os.environ.setdefault("STATIC_BUILD_DIR", os.path.join(BENCH_DIR, "static_build"))
+os.environ.setdefault("SCHEMA_CHECK", "off")
+os.environ.setdefault("QUERY_BUDGET_MODE", "log")
+
+import httpx
+from sqlalchemy import insert
+
+from agriculture.user import summaries
+from agriculture.user.database import AsyncSessionLocal, Base, SessionLocal, engine
+from agriculture.user.forecast import run_forecast
+from agriculture.user.inventory import BALANCE
+from agriculture.user.models import (User, Cultivo, Cosecha, Silo, PuntoVenta, Venta, Vehiculo, Encargo,
+                                     MovimientoSilo)
+from app import app
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "routes.json")
+EMAIL = "bench@example.com"
+PASSWORD = "benchmark-password"
+CROP_TYPES = ("Maize", "Rice", "Coffee", "Potato", "Banana", "Cocoa")
+# Rutas que no se miden: cerrar sesión invalida la cookie de los demás clientes
+SKIPPED = {"GET /logout": "revokes the benchmark session"}
+
+
+@dataclass
+class Dataset:
+    user_id: int
+    crops: int
+    harvested: int
+    silos: int
+    points_of_sale: int
+    vehicles: int
+    day: date
+    email: str = EMAIL
+
+
+# Datos de un productor mediano: la mitad de los cultivos cosechados, silos, flota, puntos de venta
+# con ubicación, un año de ventas y encargos
+def seed(user_id, scale, rng):
+    crops, silos, points, vehicles = 2000 * scale, 50 * scale, 200 * scale, 100 * scale
+    harvested = crops // 2
+    start = date(2024, 1, 1)
+    with SessionLocal() as db:
+        db.execute(insert(Cultivo), [
+            {"ID_Cultivo": i, "Tipo": rng.choice(CROP_TYPES), "Area_cultivada": round(rng.uniform(1, 50), 2),
+             "Fecha_siembra": start + timedelta(days=rng.randrange(120)), "Estado_crecimiento": "Growing",
+             "Necesidades_tratamiento": "Water", "Latitud": 4.6 + rng.uniform(-1, 1),
+             "Longitud": -74.1 + rng.uniform(-1, 1), "user_id": user_id}
+            for i in range(1, crops + 1)
+        ])
+        db.execute(insert(Cosecha), [
+            {"ID_Cosecha": i, "Fecha_cosecha": start + timedelta(days=150 + rng.randrange(120)),
+             "Cantidad_cosecha": round(rng.uniform(100, 5000), 1), "Area": round(rng.uniform(1, 50), 2),
+             "ID_Cultivo": i, "user_id": user_id}
+            for i in range(1, harvested + 1)
+        ])
+        db.execute(insert(Silo), [
+            {"ID_Silo": i, "Nombre": f"Silo {i}", "Capacidad": 1e9, "Contenido": 1e6,
+             "ID_Cosecha": rng.randint(1, harvested), "user_id": user_id}
+            for i in range(1, silos + 1)
+        ])
+        db.execute(insert(MovimientoSilo), [
+            {"ID_Silo": i, "Tipo": BALANCE, "Cantidad": 1e6, "user_id": user_id} for i in range(1, silos + 1)
+        ])
+        db.execute(insert(PuntoVenta), [
+            {"ID_Punto_Venta": i, "Nombre": f"Market {i}", "Direccion": f"Street {i}",
+             "Latitud": 4.6 + rng.uniform(-2, 2), "Longitud": -74.1 + rng.uniform(-2, 2), "user_id": user_id}
+            for i in range(1, points + 1)
+        ])
+        db.execute(insert(Venta), [
+            {"Fecha": start + timedelta(days=rng.randrange(365)), "Cantidad_vendida": round(rng.uniform(1, 500), 1),
+             "Precio": round(rng.uniform(100, 5000), 2), "ID_Punto_Venta": rng.randint(1, points), "user_id": user_id}
+            for _ in range(20000 * scale)
+        ])
+        db.execute(insert(Vehiculo), [
+            {"ID_Vehiculo": i, "Matricula": f"BEN{i:04d}", "Capacidad_Carga": rng.choice((3.5, 8, 10, 17, 34)),
+             "ID_Cosecha": rng.randint(1, harvested), "user_id": user_id}
+            for i in range(1, vehicles + 1)
+        ])
+        db.execute(insert(Encargo), [
+            {"Fecha": start + timedelta(days=rng.randrange(365)), "Cantidad_producto": round(rng.uniform(0.5, 30), 1),
+             "ID_Vehiculo": rng.randint(1, vehicles), "Punto_Venta_ID": rng.randint(1, points), "user_id": user_id}
+            for _ in range(5000 * scale)
+        ])
+        db.commit()
+    return Dataset(user_id, crops, harvested, silos, points, vehicles, start + timedelta(days=200))
+
+
+async def derive_tables():
+    async with AsyncSessionLocal() as db:
+        await summaries.rebuild(db)
+        await run_forecast(db)
+        await db.commit()
+
+
+def csv_file(rows):
+    return {"file": ("bench.csv", io.BytesIO(rows.encode()), "text/csv")}
+
+
+# Solicitudes de escritura: cada llamada (i es único por corrida) usa ids nuevos para no chocar
+def write_requests(data, run):
+    crop_form = {"crop_type": "Maize", "area": 10, "planting_date": "2024-02-01", "growing_state": "Ripe",
+                 "needs": "Water"}
+    return {
+        "POST /register": lambda i: {"data": {
+            "first_name": "Load", "last_name": "Test", "email": f"load{run}-{i}@example.com", "phone": "1",
+            "hashed_password": PASSWORD, "confirm_password": PASSWORD}},
+        "POST /login": lambda i: {"data": {"email": data.email, "password": PASSWORD}},
+        "POST /crop_detail": lambda i: {"data": {"id_crop": 10_000_000 + run * 100_000 + i, **crop_form}},
+        "POST /crop_update": lambda i: {"params": {"id_crop": 1 + i % data.crops}, "data": crop_form},
+        "POST /crop_delete": lambda i: {"data": {"crop_ids": [0]}},
+        "GET /crop_delete/{id_crop}": lambda i: {"url": "/crop_delete/0"},
+        "POST /silo_detail": lambda i: {"data": {"nombre": "Bench silo", "capacidad": 1000, "contenido": 10},
+                                        "params": {"id_cosecha": 1}},
+        "POST /silo_movement/{id_silo}": lambda i: {"url": f"/silo_movement/{1 + i % data.silos}",
+                                                    "data": {"quantity": 1, "kind": "deposit" if i % 2 else "withdraw"}},
+        # Cada cosecha nueva usa un cultivo sin cosechar (el id de la cosecha es el del cultivo)
+        "POST /harvest_detail/{id_crop}": lambda i: {
+            "url": f"/harvest_detail/{data.harvested + 1 + (run * 997 + i) % (data.crops - data.harvested)}",
+            "data": {"harvest_date": "2024-09-01", "quantity": 100, "area": 2}},
+        "POST /harvest_update/{id_harvest}": lambda i: {"url": f"/harvest_update/{1 + i % data.harvested}",
+                                                        "data": {"harvest_date": "2024-09-02", "quantity": 120}},
+        "POST /import/{entity}": lambda i: {"url": "/import/crops", "files": csv_file(
+            "id_crop,crop_type,area,planting_date,growing_state\n" + "".join(
+                f"{20_000_000 + run * 1_000_000 + i * 50 + k},Rice,5,2024-03-01,Seedling\n" for k in range(50)))},
+        "POST /assignment_detail": lambda i: {"data": {
+            "fecha": str(data.day), "cantidad_producto": 2, "id_vehiculo": 1 + i % data.vehicles,
+            "punto_venta_id": 1 + i % data.points_of_sale}},
+        "POST /assignment_plan": lambda i: {"data": {"fecha": str(data.day)}},
+        "POST /vehicle_detail": lambda i: {"data": {"matricula": f"NEW{i}", "capacidad_carga": 10, "id_cosecha": 1}},
+        "POST /pos_detail": lambda i: {"data": {"nombre": f"New {i}", "direccion": "Road", "latitud": 4.7,
+                                                "longitud": -74.0}},
+        "POST /sale_detail": lambda i: {"data": {"fecha": str(data.day), "cantidad_vendida": 3, "precio": 1200,
+                                                 "id_punto_venta": 1 + i % data.points_of_sale}},
+        "POST /api/v1/{entity}/batch": lambda i: {"url": "/api/v1/points_of_sale/batch", "json": {"records": [
+            {"nombre": f"Batch {i}-{k}", "direccion": "Road"} for k in range(50)]}},
+    }
+
+
+# Valores para los parámetros de ruta y de consulta de las lecturas
+PATH_VALUES = {"item_id": 1, "id_crop": 1, "id_silo": 1, "id_harvest": 1, "entity": "harvests"}
+
+
+def read_query(data):
+    return {
+        "/assignment_plan": {"fecha": str(data.day)},
+        "/pos_nearest": {"lat": 4.6, "lon": -74.1, "k": 5},
+        "/pos_within": {"lat": 4.6, "lon": -74.1, "radius_km": 25},
+        "/export/{entity}": {"format": "ndjson", "date_from": "2024-06-01", "date_to": "2024-07-01"},
+    }
+
+
+# Una solicitud por cada método y ruta de la aplicación (rutas duplicadas una sola vez)
+def scenarios(data, run):
+    writes = write_requests(data, run)
+    queries = read_query(data)
+    found = {}
+    for route in app.routes:
+        for method in sorted(getattr(route, "methods", None) or ()):
+            if method == "HEAD":
+                continue
+            name = f"{method} {route.path}"
+            if name in found or name in SKIPPED:
+                continue
+            if name in writes:
+                found[name] = writes[name]
+            elif method == "GET":
+                url = route.path.format(**PATH_VALUES)
+                params = queries.get(route.path, {})
+                found[name] = lambda i, url=url, params=params: {"url": url, "params": params}
+            else:
+                found[name] = None
+    return found
+
+
+@dataclass
+class RouteResult:
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def summary(self):
+        latencies = np.array(self.latencies) * 1000
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) if len(latencies) else (0.0, 0.0, 0.0)
+        return {"requests": len(self.latencies), "errors": self.errors,
+                "rps": round(len(self.latencies) / self.elapsed, 1) if self.elapsed else 0.0,
+                "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3)}
+
+
+# `concurrency` clientes hacen `requests` solicitudes en total a la misma ruta
+async def drive(client, name, factory, requests, concurrency, first=0):
+    method, path = name.split(" ", 1)
+    result = RouteResult()
+    counter = iter(range(first, first + requests))
+
+    async def worker():
+        for i in counter:
+            kwargs = {"url": path, **factory(i)}
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, **kwargs)
+                if response.status_code >= 500:
+                    result.errors += 1
+            except Exception:
+                result.errors += 1
+            result.latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+# El usuario del benchmark se registra e inicia sesión por la aplicación; sus datos se cargan directo
+async def prepare(client, args):
+    # Nunca se borra otra base que la temporal del benchmark
+    if engine.url.get_backend_name() != "sqlite" or os.path.abspath(engine.url.database or "") != BENCH_DATABASE:
+        raise SystemExit(f"Refusing to drop tables in {engine.url.render_as_string(hide_password=True)}")
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    await client.post("/register", data={"first_name": "Bench", "last_name": "Mark", "email": EMAIL, "phone": "0",
+                                         "hashed_password": PASSWORD, "confirm_password": PASSWORD})
+    await client.post("/login", data={"email": EMAIL, "password": PASSWORD})
+    with SessionLocal() as db:
+        user_id = db.query(User.id).filter(User.email == EMAIL).scalar()
+    started = time.perf_counter()
+    data = seed(user_id, args.scale, random.Random(args.seed))
+    await derive_tables()
+    print(f"dataset seeded in {time.perf_counter() - started:.1f}s ({data.crops} crops, scale {args.scale})")
+    return data
+
+
+async def run_suite(args):
+    run = random.randrange(1000)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    results, uncovered = {}, []
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", follow_redirects=False,
+                                     timeout=None) as client:
+            data = await prepare(client, args)
+            print(f"{'route':<45} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}")
+            for name, factory in scenarios(data, run).items():
+                if args.only and name.split(" ", 1)[1] not in args.only:
+                    continue
+                if factory is None:
+                    uncovered.append(name)
+                    continue
+                # Calentamiento: plantillas, cachés y conexiones
+                await drive(client, name, factory, args.warmup, 1)
+                results[name] = (await drive(client, name, factory, args.requests, args.concurrency,
+                                             first=args.warmup)).summary()
+                print(f"{name:<45} {results[name]['rps']:>8.1f} {results[name]['p50_ms']:>9.2f} "
+                      f"{results[name]['p95_ms']:>9.2f} {results[name]['p99_ms']:>9.2f} {results[name]['errors']:>6}")
+    return results, uncovered
+
+
+# Rutas cuyo valor (p95 por defecto) supera el de la línea base en más del umbral relativo y del mínimo absoluto
+def regressions(results, baseline, metric, threshold, min_delta_ms):
+    found = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        before, after = previous[metric], current[metric]
+        if after > before * (1 + threshold) and after - before > min_delta_ms:
+            found.append((name, before, after))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-route latency benchmark with regression check")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--scale", type=int, default=1, help="dataset size multiplier")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", nargs="+", help="route paths to run (default: all)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--metric", default="p95_ms", choices=("p50_ms", "p95_ms", "p99_ms"))
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    # La base y los estáticos del benchmark viven en BENCH_DIR; se borran al terminar
+    try:
+        results, uncovered = asyncio.run(run_suite(args))
+        for name in uncovered:
+            print(f"not covered: {name} (add it to write_requests)")
+
+        report = {
+            "meta": {"python": platform.python_version(), "machine": platform.machine(), "requests": args.requests,
+                     "concurrency": args.concurrency, "scale": args.scale,
+                     "database": engine.dialect.name, "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "routes": results,
+        }
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        if args.save_baseline:
+            os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+            with open(args.baseline, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"baseline saved to {args.baseline}")
+            return 0
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; run with --save-baseline first")
+            return 0
+
+        with open(args.baseline) as f:
+            baseline = json.load(f)["routes"]
+        found = regressions(results, baseline, args.metric, args.threshold, args.min_delta_ms)
+        for name, before, after in found:
+            print(f"REGRESSION {name}: {args.metric} {before:.2f} -> {after:.2f} ms ({after / before - 1:+.0%})")
+        print(f"{len(found)} regressions over {args.threshold:.0%} in {len(results)} routes")
+        return 1 if found else 0
+
+    finally:
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+# Servidor de producción. El proceso maestro importa la aplicación y compila las plantillas una sola
+# vez, abre el socket y crea con fork un worker de uvicorn por CPU disponible: los workers comparten
+# en copy-on-write el código y las plantillas ya compiladas, y aceptan conexiones del mismo socket.
+# Cada worker se recicla después de WORKER_MAX_REQUESTS solicitudes (con variación aleatoria) y el
+# maestro lo reemplaza; con SIGTERM o SIGINT los workers dejan de aceptar conexiones, terminan las
+# solicitudes en curso (hasta WORKER_GRACEFUL_TIMEOUT segundos) y el maestro sale cuando todos terminaron.
+# Uso (desde app/):
+#     python serve.py                              # un worker por CPU, puerto 8003
+#     python serve.py --workers 4 --port 8000
+#     python serve.py --reload                     # desarrollo: un proceso que se reinicia al cambiar el código
+#     python serve.py --migrate                    # antes de arrancar aplica las migraciones (alembic upgrade head)
+import argparse
+import logging
+import math
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+# Código de salida de un worker cuya aplicación no pudo arrancar (lifespan con error)
+BOOT_FAILED = 3
+
+
+# CPUs que puede usar este proceso: afinidad y límite de CPU del contenedor (cgroup v2, "max 100000" o "200000 100000")
+def available_cpus(cgroup_cpu_max="/sys/fs/cgroup/cpu.max"):
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open(cgroup_cpu_max) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(math.ceil(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+# La aplicación es asíncrona, así que basta un worker por CPU (no 2n+1 como con workers síncronos).
+# WEB_CONCURRENCY, si está definida, tiene prioridad sobre el cálculo.
+def worker_count(requested=None):
+    return requested or int(os.getenv("WEB_CONCURRENCY") or 0) or available_cpus()
+
+
+def bind(host, port):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+# alembic.ini está junto a la carpeta de migraciones; env.py toma DATABASE_URL de config.py. Corre en
+# un proceso aparte para no importar la aplicación dos veces (env.py la importa como paquete app), con
+# el comando alembic y no "python -m alembic": la carpeta alembic/ del repositorio ocultaría el paquete.
+def migrate():
+    from agriculture.user import config
+    root = os.path.dirname(os.path.abspath(config.ALEMBIC_SCRIPT_LOCATION))
+    command = shutil.which("alembic", path=os.path.dirname(sys.executable)) or "alembic"
+    logger.info("Applying migrations (alembic upgrade head)")
+    return subprocess.run([command, "upgrade", "head"], cwd=root).returncode == 0
+
+
+def request_limit(max_requests, jitter):
+    if not max_requests:
+        return None
+    return max_requests + random.randint(0, max(jitter, 0))
+
+
+class Master:
+    def __init__(self, app, sock, workers, max_requests, max_requests_jitter, graceful_timeout):
+        self.app = app
+        self.sock = sock
+        self.worker_total = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        # pid -> índice del worker
+        self.workers = {}
+        self.stopping = False
+        self.deadline = None
+        self.exit_code = 0
+
+    def spawn(self, index):
+        limit = request_limit(self.max_requests, self.max_requests_jitter)
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = index
+            logger.info("Booting worker %d (pid %d, max requests %s)", index, pid, limit or "unlimited")
+            return
+        code = 1
+        try:
+            code = self.run_worker(index, limit)
+        except BaseException:
+            logger.exception("Worker %d crashed", index)
+        finally:
+            os._exit(code)
+
+    def run_worker(self, index, limit):
+        from agriculture.user import config
+        from agriculture.user.database import async_engine, engine, replicas
+
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        config.WORKER_INDEX = index
+        # Cada worker crea sus propias conexiones; no se reutiliza ninguna heredada del maestro
+        for worker_engine in (engine, async_engine.sync_engine, *(replica.sync_engine for replica in replicas.engines)):
+            worker_engine.dispose(close=False)
+
+        server = uvicorn.Server(uvicorn.Config(
+            self.app, lifespan="on", limit_max_requests=limit, timeout_graceful_shutdown=self.graceful_timeout,
+            proxy_headers=True,
+        ))
+        server.run(sockets=[self.sock])
+        return 0 if server.started else BOOT_FAILED
+
+    def stop(self, signum, frame):
+        if self.stopping:
+            return
+        logger.info("Received %s; waiting for in-flight requests", signal.Signals(signum).name)
+        self.stopping = True
+        # Margen para el shutdown del lifespan después de drenar las solicitudes
+        self.deadline = time.monotonic() + self.graceful_timeout + 5
+        for pid in self.workers:
+            self.kill(pid, signal.SIGTERM)
+
+    def kill(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def reap(self, pid, status):
+        index = self.workers.pop(pid)
+        if self.stopping:
+            return
+        if os.WIFEXITED(status) and os.WEXITSTATUS(status) == BOOT_FAILED:
+            # Reiniciarlo no sirve (p. ej. esquema desactualizado con SCHEMA_CHECK=strict)
+            logger.error("Worker %d failed to boot; shutting down", index)
+            self.exit_code = BOOT_FAILED
+            self.stop(signal.SIGTERM, None)
+            return
+        logger.info("Worker %d (pid %d) exited; starting a new one", index, pid)
+        self.spawn(index)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.worker_total):
+            self.spawn(index)
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.reap(pid, status)
+                continue
+            if self.stopping and time.monotonic() > self.deadline:
+                logger.warning("Graceful shutdown timed out; killing %d worker(s)", len(self.workers))
+                for pid in self.workers:
+                    self.kill(pid, signal.SIGKILL)
+                self.deadline = float("inf")
+            time.sleep(0.1)
+        self.sock.close()
+        logger.info("All workers stopped")
+        return self.exit_code
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the application with one worker process per CPU.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8003)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: WEB_CONCURRENCY or the available CPUs)")
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="Requests before a worker is recycled, 0 to never recycle (default: WORKER_MAX_REQUESTS)")
+    parser.add_argument("--max-requests-jitter", type=int, default=None,
+                        help="Random extra requests per worker (default: WORKER_MAX_REQUESTS_JITTER)")
+    parser.add_argument("--graceful-timeout", type=int, default=None,
+                        help="Seconds to finish in-flight requests on shutdown (default: WORKER_GRACEFUL_TIMEOUT)")
+    parser.add_argument("--migrate", action="store_true", help="Run 'alembic upgrade head' before starting")
+    parser.add_argument("--reload", action="store_true",
+                        help="Development mode: a single process that restarts when the code changes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s")
+    if args.reload:
+        if args.migrate and not migrate():
+            logger.error("Migrations failed; not starting")
+            return 1
+        uvicorn.run("app:app", host=args.host, port=args.port, reload=True)
+        return 0
+
+    # Antes de importar la aplicación: config.py reparte las conexiones del pool entre WEB_CONCURRENCY workers
+    workers = worker_count(args.workers)
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    from agriculture.user import config
+    from agriculture.user.hashing import hash_threads_per_worker, password_hasher
+    # Hilos de argon2 por worker sobre las mismas CPUs (con límite del contenedor) que cuentan los
+    # workers; HASH_WORKERS explícita tiene prioridad. Los workers heredan el valor con el fork.
+    if not config.HASH_WORKERS:
+        config.HASH_WORKERS = password_hasher.workers = hash_threads_per_worker(available_cpus(), workers)
+    if args.migrate and not migrate():
+        logger.error("Migrations failed; not starting")
+        return 1
+    sock = bind(args.host, args.port)
+
+    started = time.perf_counter()
+    from app import STATIC_PAGES, app, page_cache
+    page_cache.warm(STATIC_PAGES)
+    logger.info("Application preloaded in %.1f ms; listening on %s:%d with %d worker(s)",
+                (time.perf_counter() - started) * 1000, args.host, args.port, workers)
+
+    master = Master(
+        app, sock, workers,
+        config.WORKER_MAX_REQUESTS if args.max_requests is None else args.max_requests,
+        config.WORKER_MAX_REQUESTS_JITTER if args.max_requests_jitter is None else args.max_requests_jitter,
+        config.WORKER_GRACEFUL_TIMEOUT if args.graceful_timeout is None else args.graceful_timeout,
+    )
+    return master.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+import pytest
+
+# Base de datos SQLite temporal como sustituto de PostgreSQL (aiosqlite para el motor asíncrono).
+# Debe definirse antes de importar la aplicación.
+TEST_DB_DIR = tempfile.mkdtemp(prefix="agriculture_test_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(TEST_DB_DIR, 'agriculture_test.db')}")
+os.environ.setdefault("STATIC_BUILD_DIR", os.path.join(TEST_DB_DIR, "static_build"))
+# Las pruebas crean el esquema con create_all, sin versión de Alembic
+os.environ.setdefault("SCHEMA_CHECK", "off")
+# Costo mínimo de argon2 para que las pruebas no tarden
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+# Los presupuestos de consultas y las cargas perezosas en plantillas fallan las pruebas
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
+os.environ.setdefault("LAZY_LOAD_CHECK", "strict")
+os.environ.setdefault("ARGON2_MEMORY_COST", "1024")
+# Las revocaciones de sesión se copian a memoria solo al arrancar (las pruebas llaman a sync) para que
+# la tarea de fondo no agregue consultas a las que cuentan las pruebas
+os.environ.setdefault("SESSION_REVOCATION_SYNC", "3600")
+# Token de los endpoints /internal/*
+os.environ.setdefault("INTERNAL_TOKEN", "test-internal-token")
+
+from fastapi.testclient import TestClient
+from agriculture.user.database import engine, Base
+from agriculture.user.analytics import analytics_cache
+from agriculture.user.geo import pos_indexes
+from agriculture.user.metrics import registry
+from agriculture.user.session import user_cache
+from app.app import app
+
+
+@pytest.fixture
+def client():
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as client:
+        yield client
+    Base.metadata.drop_all(bind=engine)
+    # Cada prueba parte de una base vacía: los ids se repiten y no deben quedar en caché
+    user_cache.clear()
+    analytics_cache.clear()
+    pos_indexes.clear()
+    registry.clear()
+
+
+@pytest.fixture
+def user_data():
+    return {
+        "first_name": "John",
+        "last_name": "Doe",
+        "email": "johndoe@example.com",
+        "phone": "1234567890",
+        "hashed_password": "securepassword",
+        "confirm_password": "securepassword"
+    }
+
+
+# Cliente con un usuario registrado y autenticado (cookie de sesión ya establecida)
+@pytest.fixture
+def logged_client(client, user_data):
+    client.post("/register", data=user_data)
+    client.post("/login", data={"email": user_data["email"], "password": user_data["hashed_password"]},
+                follow_redirects=False)
+    return client
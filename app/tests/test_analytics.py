@@ -0,0 +1,56 @@
+from datetime import date
+
+import numpy as np
+
+from agriculture.user.analytics import SalesColumns, point_ranking, price_percentiles, revenue_series, rolling_revenue
+from agriculture.user.database import SessionLocal
+from agriculture.user.models import PuntoVenta, User
+
+
+def sample():
+    return SalesColumns.from_rows([
+        (date(2024, 1, 1), 10, 2.0, 1),
+        (date(2024, 1, 3), 5, 4.0, 2),
+        (date(2024, 2, 1), 1, 100.0, 2),
+    ])
+
+
+def test_revenue_series_and_ranking():
+    sales = sample()
+    assert revenue_series(sales, "month") == [
+        {"period": "2024-01", "revenue": 40.0, "quantity": 15.0},
+        {"period": "2024-02", "revenue": 100.0, "quantity": 1.0},
+    ]
+    ranking = point_ranking(sales, {1: "Market"})
+    assert [(row["point_of_sale"], row["revenue"], row["sales"]) for row in ranking] == [(2, 120.0, 2), (1, 20.0, 1)]
+    assert ranking[1]["name"] == "Market"
+
+
+def test_rolling_average_counts_days_without_sales():
+    rolling = rolling_revenue(sample(), window=2)
+    assert len(rolling) == 32
+    assert [day["average"] for day in rolling[:3]] == [20.0, 10.0, 10.0]
+
+
+def test_price_percentiles_match_numpy():
+    assert price_percentiles(sample(), (50,)) == {"p50": float(np.median([2.0, 4.0, 100.0]))}
+    assert revenue_series(SalesColumns.from_rows([])) == []
+
+
+def test_analytics_cached_until_next_sale(logged_client, user_data):
+    with SessionLocal() as db:
+        user_id = db.query(User).filter(User.email == user_data["email"]).one().id
+        db.add(PuntoVenta(ID_Punto_Venta=1, Nombre="Market", Direccion="Main St", user_id=user_id))
+        db.commit()
+
+    sale = {"fecha": "2024-05-01", "cantidad_vendida": 3, "precio": 10, "id_punto_venta": 1}
+    assert logged_client.post("/sale_detail", data=sale, follow_redirects=False).status_code == 302
+    first = logged_client.get("/sales_analytics").json()
+    assert first["revenue"] == 30
+    assert logged_client.get("/sales_analytics").json() == first
+
+    logged_client.post("/sale_detail", data={**sale, "precio": 20}, follow_redirects=False)
+    second = logged_client.get("/sales_analytics").json()
+    assert second["revenue"] == 90
+    assert second["points_of_sale"][0]["name"] == "Market"
+    assert logged_client.get("/sales_analytics?period=decade").status_code == 400
@@ -0,0 +1,75 @@
+from datetime import date
+
+from agriculture.user.database import SessionLocal
+from agriculture.user.models import User, Cultivo, Cosecha, ResumenRendimiento
+
+
+def user_id(email):
+    with SessionLocal() as db:
+        return db.query(User).filter(User.email == email).one().id
+
+
+def seed(owner, other):
+    with SessionLocal() as db:
+        for crop_id, user in ((1, owner), (2, owner), (3, owner), (4, other)):
+            db.add(Cultivo(ID_Cultivo=crop_id, Tipo="Maize", Area_cultivada=crop_id, Fecha_siembra=date(2024, 3, crop_id),
+                           Estado_crecimiento="Ripe", user_id=user))
+        db.add(Cosecha(ID_Cosecha=1, Fecha_cosecha=date(2024, 8, 1), Cantidad_cosecha=12.5, Area=1, ID_Cultivo=1,
+                       user_id=owner))
+        for month in (1, 2, 3):
+            db.add(ResumenRendimiento(user_id=owner, Tipo="Maize", Anio=2024, Mes=month, Cantidad_total=10,
+                                      Area_total=1, Cosechas=1))
+        db.commit()
+
+
+def other_user():
+    with SessionLocal() as db:
+        user = User(first_name="Jane", last_name="Roe", email="jane@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+def test_requires_session(client):
+    response = client.get("/api/v1/crops")
+    assert response.status_code == 401
+
+
+def test_list_is_paginated_and_owned(logged_client, user_data):
+    seed(user_id(user_data["email"]), other_user())
+
+    response = logged_client.get("/api/v1/crops", params={"limit": 2})
+    body = response.json()
+    assert response.status_code == 200
+    assert [item["id"] for item in body["items"]] == [1, 2]
+    assert body["items"][0]["planting_date"] == "2024-03-01"
+
+    rest = logged_client.get("/api/v1/crops", params={"limit": 2, "cursor": body["next_cursor"]}).json()
+    assert [item["id"] for item in rest["items"]] == [3]
+    assert rest["next_cursor"] is None
+
+    assert logged_client.get("/api/v1/crops/1").json()["area"] == 1
+    assert logged_client.get("/api/v1/crops/4").status_code == 404
+
+
+def test_sparse_fields(logged_client, user_data):
+    seed(user_id(user_data["email"]), other_user())
+
+    body = logged_client.get("/api/v1/harvests", params={"fields": "quantity,id"}).json()
+    assert body["items"] == [{"id": 1, "quantity": 12.5}]
+    assert logged_client.get("/api/v1/crops/2", params={"fields": "crop_type"}).json() == {"crop_type": "Maize"}
+    assert logged_client.get("/api/v1/crops", params={"fields": "id,Tipo"}).status_code == 400
+
+
+def test_composite_key_pagination(logged_client, user_data):
+    seed(user_id(user_data["email"]), other_user())
+
+    first = logged_client.get("/api/v1/yield_summaries", params={"limit": 2, "fields": "month"}).json()
+    rest = logged_client.get("/api/v1/yield_summaries", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [item["month"] for item in first["items"] + rest["items"]] == [1, 2, 3]
+
+
+def test_profile(logged_client, user_data):
+    body = logged_client.get("/api/v1/me").json()
+    assert body["email"] == user_data["email"]
+    assert "hashed_password" not in body
@@ -0,0 +1,44 @@
+import gzip
+import re
+
+import brotli
+
+
+def stylesheet_url(client):
+    return re.search(rb'href="(/styles/styles3\.[0-9a-f]{12}\.css)"', client.get("/login").content).group(1).decode()
+
+
+def test_pages_link_fingerprinted_assets(client):
+    assert stylesheet_url(client)
+
+
+def test_fingerprinted_asset_is_immutable_and_precompressed(client):
+    url = stylesheet_url(client)
+    with open("styles/styles3.css", "rb") as source:
+        original = source.read()
+
+    with client.stream("GET", url, headers={"Accept-Encoding": "gzip, br"}) as response:
+        body = b"".join(response.iter_raw())
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert brotli.decompress(body) == original
+
+    with client.stream("GET", url, headers={"Accept-Encoding": "gzip"}) as response:
+        body = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == original
+
+    with client.stream("GET", url, headers={"Accept-Encoding": "br;q=0, identity"}) as response:
+        assert "content-encoding" not in response.headers
+        assert b"".join(response.iter_raw()) == original
+
+
+def test_original_name_still_served_without_immutable_cache(client):
+    response = client.get("/styles/styles3.css")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+
+    response = client.get("/images/Luis.jpg", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
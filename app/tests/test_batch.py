@@ -0,0 +1,84 @@
+from datetime import date
+
+from sqlalchemy import event
+
+from agriculture.user.database import SessionLocal, async_engine
+from agriculture.user.models import User, Cultivo, Cosecha, PuntoVenta, ResumenRendimiento
+
+
+def seed_crops(email, crop_ids):
+    with SessionLocal() as db:
+        owner = db.query(User).filter(User.email == email).one().id
+        for crop_id in crop_ids:
+            db.add(Cultivo(ID_Cultivo=crop_id, Tipo="Maize", Area_cultivada=1, Fecha_siembra=date(2024, 3, 1),
+                           Estado_crecimiento="Ripe", user_id=owner))
+        db.commit()
+
+
+def harvest(crop_id, quantity=10):
+    return {"id_crop": crop_id, "harvest_date": "2024-08-01", "quantity": quantity, "area": 1}
+
+
+def count(model):
+    with SessionLocal() as db:
+        return db.query(model).count()
+
+
+def test_atomic_batch_returns_ids_in_order(logged_client, user_data):
+    seed_crops(user_data["email"], [1, 2, 3])
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO cosecha"):
+            inserts.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = logged_client.post("/api/v1/harvests/batch",
+                                      json={"records": [harvest(1), harvest(2, 20), harvest(3, 30)]})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["inserted"] == 3 and len(set(body["ids"])) == 3 and body["errors"] == []
+    # En PostgreSQL es un solo INSERT; SQLite no garantiza el orden de RETURNING en un INSERT de varias
+    # filas, así que SQLAlchemy envía una fila por sentencia para devolver los ids en orden
+    assert len(inserts) == (3 if async_engine.dialect.name == "sqlite" else 1)
+    with SessionLocal() as db:
+        quantities = {row.ID_Cosecha: row.Cantidad_cosecha for row in db.query(Cosecha)}
+        assert [quantities[record_id] for record_id in body["ids"]] == [10, 20, 30]
+        assert db.query(ResumenRendimiento).one().Cantidad_total == 60
+
+
+def test_atomic_batch_rejects_everything_on_one_error(logged_client, user_data):
+    seed_crops(user_data["email"], [1])
+
+    response = logged_client.post("/api/v1/harvests/batch",
+                                  json={"records": [harvest(1), harvest(99), {"id_crop": 1}]})
+    body = response.json()
+    assert response.status_code == 422
+    assert body["ids"] == [None, None, None]
+    assert [error["index"] for error in body["errors"]] == [1, 2]
+    assert "Crop 99 not found" in body["errors"][0]["error"]
+    assert count(Cosecha) == 0
+
+
+def test_partial_batch_keeps_valid_records(logged_client, user_data):
+    response = logged_client.post("/api/v1/points_of_sale/batch", json={"mode": "partial", "records": [
+        {"nombre": "North", "direccion": "1st St", "latitud": 4.6, "longitud": -74.1},
+        {"nombre": "Broken", "direccion": "2nd St", "latitud": 4.6},
+        {"nombre": "South", "direccion": "3rd St"},
+    ]})
+    body = response.json()
+    assert response.status_code == 200
+    assert body["inserted"] == 2 and body["ids"][1] is None
+    assert body["errors"][0]["index"] == 1
+    assert count(PuntoVenta) == 2
+
+    nearest = logged_client.get("/pos_nearest", params={"lat": 4.6, "lon": -74.1}).json()
+    assert [point["id"] for point in nearest] == [body["ids"][0]]
+
+
+def test_unknown_batch_type(logged_client):
+    assert logged_client.post("/api/v1/sales/batch", json={"records": [{}]}).status_code == 404
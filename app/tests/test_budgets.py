@@ -0,0 +1,78 @@
+from datetime import date
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jinja2 import Environment
+from sqlalchemy import text
+
+from agriculture.user import config
+from agriculture.user.database import AsyncSessionLocal, SessionLocal
+from agriculture.user.metrics import (LazyLoadError, MetricsMiddleware, MetricsRegistry, QueryBudgetExceeded,
+                                      RequestMetrics, current_request, instrument_templates, query_budget)
+from agriculture.user.models import User, Cultivo
+
+
+def budget_app(registry):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/three")
+    @query_budget(2)
+    async def three():
+        async with AsyncSessionLocal() as db:
+            for _ in range(3):
+                await db.execute(text("SELECT 1"))
+        return {}
+
+    return app
+
+
+def test_query_budget_raises_in_tests(client):
+    with TestClient(budget_app(MetricsRegistry())) as budget_client:
+        with pytest.raises(QueryBudgetExceeded, match="/three ran 3 SQL statements"):
+            budget_client.get("/three")
+
+
+def test_query_budget_is_logged_in_production(client, monkeypatch, caplog):
+    monkeypatch.setattr(config, "QUERY_BUDGET_MODE", "log")
+    registry = MetricsRegistry()
+    with TestClient(budget_app(registry)) as budget_client:
+        assert budget_client.get("/three").status_code == 200
+    assert registry.routes[("/three", "GET")].budget_exceeded == 1
+    assert "budget 2" in caplog.text
+
+
+def render_crop_owner():
+    env = Environment()
+    instrument_templates(env)
+    request_metrics = RequestMetrics()
+    token = current_request.set(request_metrics)
+    try:
+        with SessionLocal() as db:
+            crop = db.get(Cultivo, 1)
+            return env.from_string("{{ crop.user.email }}").render(crop=crop), request_metrics
+    finally:
+        current_request.reset(token)
+
+
+def seed_crop(email):
+    with SessionLocal() as db:
+        owner = db.query(User).filter(User.email == email).one().id
+        db.add(Cultivo(ID_Cultivo=1, Tipo="Maize", Area_cultivada=1, Fecha_siembra=date(2024, 3, 1),
+                       Estado_crecimiento="Ripe", user_id=owner))
+        db.commit()
+
+
+def test_strict_mode_names_the_lazy_attribute(logged_client, user_data):
+    seed_crop(user_data["email"])
+    with pytest.raises(LazyLoadError, match=r"Cultivo\.user while rendering"):
+        render_crop_owner()
+
+
+def test_warn_mode_counts_lazy_loads(logged_client, user_data, monkeypatch):
+    monkeypatch.setattr(config, "LAZY_LOAD_CHECK", "warn")
+    seed_crop(user_data["email"])
+    body, request_metrics = render_crop_owner()
+    assert body == user_data["email"]
+    assert request_metrics.lazy_loads == 1
@@ -0,0 +1,47 @@
+import json
+
+from sqlalchemy import select
+
+from agriculture.user.database import SessionLocal
+from agriculture.user.models import Cultivo, Cosecha
+
+CROPS_CSV = """id_crop,crop_type,area,planting_date,growing_state,needs
+1,Maize,10.5,2024-01-10,Seedling,Water
+2,Rice,not-a-number,2024-01-11,Seedling,
+3,Beans,4,2024-01-12,Flowering,
+1,Maize,10.5,2024-01-10,Seedling,Duplicated
+"""
+
+
+def test_import_crops_csv_reports_bad_rows(logged_client):
+    response = logged_client.post("/import/crops", files={"file": ("crops.csv", CROPS_CSV, "text/csv")})
+    report = response.json()
+
+    assert report["inserted"] == 2
+    assert report["failed"] == 2
+    assert [error["line"] for error in report["errors"]] == [3, 5]
+    assert "area" in report["errors"][0]["error"]
+    with SessionLocal() as db:
+        assert sorted(db.scalars(select(Cultivo.ID_Cultivo))) == [1, 3]
+
+
+def test_import_harvests_ndjson_checks_crop_ownership(logged_client):
+    logged_client.post("/import/crops", files={"file": ("crops.csv", CROPS_CSV, "text/csv")})
+    lines = [
+        {"id_harvest": 10, "id_crop": 1, "harvest_date": "2024-06-01", "quantity": 120, "area": 10.5},
+        {"id_crop": 3, "harvest_date": "2024-06-02", "quantity": 40, "area": 4},
+        {"id_crop": 99, "harvest_date": "2024-06-03", "quantity": 1, "area": 1},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n{broken\n"
+    response = logged_client.post("/import/harvests", files={"file": ("harvests.ndjson", body)})
+    report = response.json()
+
+    assert report["inserted"] == 2
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    with SessionLocal() as db:
+        assert db.query(Cosecha).count() == 2
+
+
+def test_import_unknown_entity(logged_client):
+    response = logged_client.post("/import/silos", files={"file": ("silos.csv", "a,b\n")})
+    assert response.status_code == 404
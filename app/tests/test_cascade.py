@@ -0,0 +1,77 @@
+from datetime import date
+
+from sqlalchemy import event
+
+from agriculture.user.database import SessionLocal, async_engine
+from agriculture.user.models import User, Cultivo, Cosecha, Silo, PuntoVenta, Vehiculo, Encargo
+
+
+# Cultivo -> cosecha -> silo y vehículo -> encargo, para cada id indicado
+def seed_tree(user_id, crop_ids):
+    with SessionLocal() as db:
+        db.add(PuntoVenta(ID_Punto_Venta=1, Nombre="Market", Direccion="Main St", user_id=user_id))
+        for crop_id in crop_ids:
+            db.add(Cultivo(ID_Cultivo=crop_id, Tipo="Maize", Area_cultivada=1, Fecha_siembra=date(2024, 3, 1),
+                           Estado_crecimiento="Ripe", user_id=user_id))
+            db.add(Cosecha(ID_Cosecha=crop_id, Fecha_cosecha=date(2024, 8, 1), Cantidad_cosecha=10, Area=1,
+                           ID_Cultivo=crop_id, user_id=user_id))
+            db.add(Silo(ID_Silo=crop_id, Nombre="Silo", Capacidad=100, Contenido=10, ID_Cosecha=crop_id,
+                        user_id=user_id))
+            db.add(Vehiculo(ID_Vehiculo=crop_id, Matricula="ABC", Capacidad_Carga=5, ID_Cosecha=crop_id,
+                            user_id=user_id))
+            db.add(Encargo(ID_Encargo=crop_id, Fecha=date(2024, 8, 2), Cantidad_producto=5, ID_Vehiculo=crop_id,
+                           Punto_Venta_ID=1, user_id=user_id))
+        db.commit()
+
+
+def count(model):
+    with SessionLocal() as db:
+        return db.query(model).count()
+
+
+def user_id(email):
+    with SessionLocal() as db:
+        return db.query(User).filter(User.email == email).one().id
+
+
+def test_delete_crop_removes_dependency_tree(logged_client, user_data):
+    seed_tree(user_id(user_data["email"]), [1, 2])
+
+    response = logged_client.get("/crop_delete/1", follow_redirects=False)
+    assert response.status_code == 302
+    for model in (Cultivo, Cosecha, Silo, Vehiculo, Encargo):
+        assert count(model) == 1
+
+
+def test_bulk_delete_uses_constant_statements(logged_client, user_data):
+    seed_tree(user_id(user_data["email"]), range(1, 51))
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("DELETE", "UPDATE")):
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = logged_client.post("/crop_delete", data={"crop_ids": list(range(1, 41))}, follow_redirects=False)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 302
+    assert len(statements) == 9
+    for model in (Cultivo, Cosecha, Silo, Vehiculo, Encargo):
+        assert count(model) == 10
+
+
+def test_bulk_delete_ignores_other_users_crops(logged_client, user_data):
+    with SessionLocal() as db:
+        other = User(first_name="Jane", last_name="Roe", email="jane@example.com", phone="1", hashed_password="x")
+        db.add(other)
+        db.commit()
+        other_id = other.id
+    seed_tree(other_id, [7])
+
+    response = logged_client.post("/crop_delete", data={"crop_ids": [7]}, follow_redirects=False)
+    assert response.status_code == 302
+    assert count(Cultivo) == 1
+    assert count(Encargo) == 1
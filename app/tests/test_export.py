@@ -0,0 +1,41 @@
+import json
+
+from agriculture.user import export
+
+HARVESTS = """id_crop,crop_type,area,planting_date,growing_state,needs
+1,Maize,10.5,2024-01-10,Seedling,
+"""
+
+
+def seed_harvests(client, count):
+    client.post("/import/crops", files={"file": ("crops.csv", HARVESTS)})
+    body = "".join(
+        json.dumps({"id_harvest": i, "id_crop": 1, "harvest_date": f"2024-06-{i:02d}", "quantity": i * 10, "area": 10.5}) + "\n"
+        for i in range(1, count + 1)
+    )
+    client.post("/import/harvests", files={"file": ("harvests.ndjson", body)})
+
+
+def test_export_harvests_csv_in_batches(logged_client, monkeypatch):
+    monkeypatch.setattr(export, "YIELD_PER", 2)
+    seed_harvests(logged_client, 5)
+
+    response = logged_client.get("/export/harvests")
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "ID_Cosecha,Fecha_cosecha,Cantidad_cosecha,Area,ID_Cultivo"
+    assert lines[1:] == [f"{i},2024-06-{i:02d},{float(i * 10)},10.5,1" for i in range(1, 6)]
+
+
+def test_export_harvests_ndjson_date_range(logged_client):
+    seed_harvests(logged_client, 5)
+
+    response = logged_client.get("/export/harvests", params={"format": "ndjson", "date_from": "2024-06-04"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["ID_Cosecha"] for row in rows] == [4, 5]
+    assert rows[0]["Fecha_cosecha"] == "2024-06-04"
+
+
+def test_export_rejects_unknown_entity_and_format(logged_client):
+    assert logged_client.get("/export/silos").status_code == 404
+    assert logged_client.get("/export/sales", params={"format": "xml"}).status_code == 400
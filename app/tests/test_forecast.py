@@ -0,0 +1,69 @@
+import asyncio
+from datetime import date, timedelta
+
+import numpy as np
+
+from agriculture.user.database import AsyncSessionLocal, SessionLocal, async_engine
+from agriculture.user.forecast import GENERAL, YieldCurves, run_forecast
+from agriculture.user.models import User, Cultivo, Cosecha, PronosticoCosecha
+
+
+def test_curves_per_type_with_general_fallback():
+    # Maize: 100 días y 30 por unidad de área (con pendiente); Rice: una sola cosecha
+    types = ["Maize"] * 5 + ["Rice"]
+    days = np.array([90, 95, 100, 105, 110, 150])
+    yields = np.array([28, 29, 30, 31, 32, 10], dtype=float)
+    curves = YieldCurves.fit(types, days, yields, min_samples=3)
+
+    expected, quantities, curve = curves.predict(["Maize", "Rice", "Beans"], [date(2024, 1, 1)] * 3, [2, 1, 1])
+    assert expected[0] == np.datetime64(date(2024, 1, 1) + timedelta(days=100))
+    assert round(float(quantities[0]), 4) == 60
+    assert [curves.models[c] for c in curve] == ["Maize", GENERAL, GENERAL]
+    # Rice y Beans usan la curva de todas las cosechas
+    assert expected[1] == expected[2]
+    assert curves.model_samples[curve[0]] == 5 and curves.model_samples[curve[1]] == 6
+
+
+def seed(user_id):
+    with SessionLocal() as db:
+        for crop_id in range(1, 6):
+            db.add(Cultivo(ID_Cultivo=crop_id, Tipo="Maize", Area_cultivada=1, Fecha_siembra=date(2024, 1, 1),
+                           Estado_crecimiento="Ripe", user_id=user_id))
+            db.add(Cosecha(ID_Cosecha=crop_id, Fecha_cosecha=date(2024, 4, 10), Cantidad_cosecha=40, Area=2,
+                           ID_Cultivo=crop_id, user_id=user_id))
+        db.add(Cultivo(ID_Cultivo=10, Tipo="Maize", Area_cultivada=3, Fecha_siembra=date(2025, 2, 1),
+                       Estado_crecimiento="Seedling", user_id=user_id))
+        db.commit()
+
+
+def forecast():
+    async def run():
+        async with AsyncSessionLocal() as db:
+            count = await run_forecast(db)
+            await db.commit()
+        await async_engine.dispose()
+        return count
+
+    return asyncio.run(run())
+
+
+def test_forecast_only_active_crops_and_shown_on_page(logged_client, user_data):
+    with SessionLocal() as db:
+        user_id = db.query(User).filter(User.email == user_data["email"]).one().id
+    seed(user_id)
+
+    assert forecast() == 1
+    with SessionLocal() as db:
+        rows = db.query(PronosticoCosecha).all()
+        assert [(row.ID_Cultivo, row.Fecha_esperada, row.Cantidad_esperada, row.Modelo) for row in rows] == [
+            (10, date(2025, 2, 1) + timedelta(days=100), 60.0, "Maize")
+        ]
+
+    response = logged_client.get("/cultivation")
+    assert str(date(2025, 2, 1) + timedelta(days=100)) in response.text
+    assert "60.0" in response.text
+
+    # Se reemplaza en cada ejecución
+    assert forecast() == 1
+    with SessionLocal() as db:
+        assert db.query(PronosticoCosecha).count() == 1
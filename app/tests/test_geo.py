@@ -0,0 +1,55 @@
+import random
+
+import numpy as np
+
+from agriculture.user.geo import GridIndex, distance_matrix, haversine
+
+
+def random_points(count, seed=5):
+    rng = random.Random(seed)
+    # Alrededor de Colombia
+    return [(i, rng.uniform(-4, 12), rng.uniform(-79, -67)) for i in range(count)]
+
+
+def brute_force(points, latitude, longitude):
+    return sorted((float(haversine(latitude, longitude, lat, lon)), point_id) for point_id, lat, lon in points)
+
+
+def test_haversine_and_matrix():
+    # Bogotá - Medellín, unos 240 km
+    assert 235 < haversine(4.711, -74.0721, 6.2442, -75.5812) < 250
+    matrix = distance_matrix([(4.711, -74.0721), (6.2442, -75.5812)], [(6.2442, -75.5812), (3.4516, -76.532)])
+    assert matrix.shape == (2, 2)
+    assert np.isclose(matrix[1, 0], 0)
+
+
+def test_grid_queries_match_brute_force():
+    points = random_points(5000)
+    index = GridIndex(cell_deg=0.25)
+    for point_id, lat, lon in points:
+        index.add(point_id, lat, lon)
+
+    for latitude, longitude in ((4.6, -74.1), (11.9, -67.1), (30.0, -100.0)):
+        expected = brute_force(points, latitude, longitude)
+        assert [row["id"] for row in index.nearest(latitude, longitude, 10)] == [pid for _, pid in expected[:10]]
+        inside = [pid for distance, pid in expected if distance <= 50]
+        assert [row["id"] for row in index.within(latitude, longitude, 50)] == inside
+
+
+def test_pos_endpoints_use_incremental_index(logged_client):
+    assert logged_client.get("/pos_nearest?lat=4.6&lon=-74.1").json() == []
+    for name, lat, lon in (("Bogota", 4.711, -74.0721), ("Medellin", 6.2442, -75.5812), ("NoLocation", None, None)):
+        data = {"nombre": name, "direccion": "Main St"}
+        if lat is not None:
+            data.update(latitud=lat, longitud=lon)
+        logged_client.post("/pos_detail", data=data)
+
+    nearest = logged_client.get("/pos_nearest?lat=4.6&lon=-74.1&k=5").json()
+    assert [row["name"] for row in nearest] == ["Bogota", "Medellin"]
+    assert [row["name"] for row in logged_client.get("/pos_within?lat=4.6&lon=-74.1&radius_km=50").json()] == ["Bogota"]
+    assert logged_client.post("/pos_detail", data={"nombre": "X", "direccion": "Y", "latitud": 100}).status_code == 400
+
+    logged_client.post("/crop_detail", data={"id_crop": 1, "crop_type": "Maize", "area": 1, "planting_date": "2024-03-01",
+                                             "growing_state": "Ripe", "needs": "Water", "latitud": 5.0, "longitud": -74.5})
+    matrix = logged_client.get("/distance_matrix").json()
+    assert matrix["farms"] == [1] and len(matrix["km"][0]) == 2
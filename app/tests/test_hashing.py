@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+import pytest
+
+from agriculture.user import config
+from agriculture.user.database import SessionLocal
+from agriculture.user.hashing import HashingBusy, PasswordHashingService, hash_threads_per_worker, password_hasher
+from agriculture.user.models import User
+
+
+def stored_hash(email):
+    with SessionLocal() as db:
+        return db.query(User).filter(User.email == email).one().hashed_password
+
+
+def test_register_stores_argon2_hash(logged_client, user_data):
+    assert stored_hash(user_data["email"]).startswith("$argon2id$")
+
+
+def test_legacy_plaintext_password_is_rehashed_on_login(client, user_data):
+    with SessionLocal() as db:
+        db.add(User(first_name="Old", last_name="User", email="old@example.com", phone="1", hashed_password="legacy"))
+        db.commit()
+
+    response = client.post("/login", data={"email": "old@example.com", "password": "wrong"}, follow_redirects=False)
+    assert response.status_code == 200
+    assert stored_hash("old@example.com") == "legacy"
+
+    response = client.post("/login", data={"email": "old@example.com", "password": "legacy"}, follow_redirects=False)
+    assert response.status_code == 302
+    assert stored_hash("old@example.com").startswith("$argon2id$")
+
+
+# Un email desconocido también pasa por argon2: el tiempo de respuesta no revela qué emails están registrados
+def test_unknown_email_is_verified_against_a_dummy_hash(client, monkeypatch):
+    verified = []
+
+    class RecordingHasher:
+        def __init__(self, hasher):
+            self.hasher = hasher
+
+        def hash(self, password):
+            return self.hasher.hash(password)
+
+        def verify(self, stored, password):
+            verified.append(stored)
+            return self.hasher.verify(stored, password)
+
+    monkeypatch.setattr(password_hasher, "hasher", RecordingHasher(password_hasher.hasher))
+    for _ in range(2):
+        response = client.post("/login", data={"email": "nobody@example.com", "password": "secret"}, follow_redirects=False)
+        assert response.status_code == 200
+    assert len(verified) == 2 and verified[0] == verified[1] and verified[0].startswith("$argon2id$")
+
+
+def test_verify_rehashes_when_parameters_change():
+    old = PasswordHashingService(workers=1, time_cost=1, memory_cost=1024)
+    new = PasswordHashingService(workers=1, time_cost=2, memory_cost=1024)
+
+    async def run():
+        stored = await old.hash("secret")
+        assert await old.verify(stored, "secret") == (True, None)
+        assert await new.verify(stored, "wrong") == (False, None)
+        valid, rehashed = await new.verify(stored, "secret")
+        assert valid and "t=2" in rehashed
+
+    asyncio.run(run())
+
+
+def test_full_queue_is_rejected():
+    service = PasswordHashingService(workers=1, queue_limit=1, time_cost=1, memory_cost=1024)
+    release = threading.Event()
+
+    class SlowHasher:
+        def hash(self, password):
+            release.wait()
+            return "hashed"
+
+    service.hasher = SlowHasher()
+
+    async def run():
+        pending = [asyncio.ensure_future(service.hash("a")) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(HashingBusy):
+            await service.hash("b")
+        release.set()
+        assert await asyncio.gather(*pending) == ["hashed", "hashed"]
+
+    asyncio.run(run())
+    service.shutdown()
+
+
+# Con un worker por CPU cada proceso usa un hilo: el total de hashes simultáneos no pasa de las CPUs
+def test_hash_threads_are_split_between_workers(monkeypatch):
+    assert hash_threads_per_worker(16, 16) == 1
+    assert hash_threads_per_worker(16, 4) == 4
+    assert hash_threads_per_worker(2, 8) == 1
+    monkeypatch.setattr(config, "HASH_WORKERS", 0)
+    monkeypatch.setattr(config, "WEB_CONCURRENCY", 10 ** 6)
+    assert PasswordHashingService().workers == 1
+    monkeypatch.setattr(config, "HASH_WORKERS", 3)
+    assert PasswordHashingService().workers == 3
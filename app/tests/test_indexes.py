@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, text
+
+from agriculture.user.database import engine, Base
+from agriculture.user.models import Cultivo, Cosecha, Silo, PuntoVenta, Venta, Vehiculo, Encargo
+from agriculture.user.pagination import PageParams, encode_cursor, page_query
+
+
+# Plan de ejecución de SQLite (EXPLAIN QUERY PLAN) o de PostgreSQL (EXPLAIN, sin seq scans)
+def explain(connection, statement):
+    compiled = statement.compile(connection, compile_kwargs={"literal_binds": True})
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.execute(text(f"EXPLAIN {compiled}")).all()
+        return "\n".join(row[0] for row in rows)
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.fixture
+def connection():
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        yield connection
+    Base.metadata.drop_all(bind=engine)
+
+
+LISTINGS = [
+    (Cultivo, Cultivo.ID_Cultivo, Cultivo.Fecha_siembra),
+    (Cosecha, Cosecha.ID_Cosecha, Cosecha.Fecha_cosecha),
+    (Silo, Silo.ID_Silo, None),
+    (PuntoVenta, PuntoVenta.ID_Punto_Venta, None),
+    (Vehiculo, Vehiculo.ID_Vehiculo, None),
+    (Encargo, Encargo.ID_Encargo, Encargo.Fecha),
+]
+
+
+@pytest.mark.parametrize("model, pk, date_column", LISTINGS)
+def test_listing_queries_use_owner_index(connection, model, pk, date_column):
+    table = model.__tablename__
+    params = PageParams(cursor=encode_cursor([7]))
+    plan = explain(connection, page_query((pk,), pk, model.user_id, 1, params))
+    assert f"ix_{table}_user_id" in plan
+
+    if date_column is not None:
+        params = PageParams(sort="date", order="desc", date_from=date(2024, 1, 1))
+        plan = explain(connection, page_query((pk, date_column), pk, model.user_id, 1, params, date_column))
+        assert f"ix_{table}_user_id_fecha" in plan
+
+
+@pytest.mark.parametrize("model, column, index", [
+    (Cosecha, Cosecha.ID_Cultivo, "ix_cosecha_ID_Cultivo"),
+    (Silo, Silo.ID_Cosecha, "ix_silo_ID_Cosecha"),
+    (Vehiculo, Vehiculo.ID_Cosecha, "ix_vehiculo_ID_Cosecha"),
+    (Encargo, Encargo.ID_Vehiculo, "ix_encargo_ID_Vehiculo"),
+    (Encargo, Encargo.Punto_Venta_ID, "ix_encargo_Punto_Venta_ID"),
+    (Venta, Venta.ID_Punto_Venta, "ix_venta_ID_Punto_Venta"),
+])
+def test_foreign_key_deletes_use_index(connection, model, column, index):
+    assert index in explain(connection, delete(model).where(column == 1))
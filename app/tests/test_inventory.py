@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func
+
+from agriculture.user.database import AsyncSessionLocal, SessionLocal, async_engine
+from agriculture.user.inventory import StockError, compact_ledger, deposit, withdraw
+from agriculture.user.models import Silo, MovimientoSilo
+
+
+def create_silo(client, capacity=100, content=10):
+    client.post("/silo_detail", data={"nombre": "North", "capacidad": capacity, "contenido": content})
+    with SessionLocal() as db:
+        silo = db.query(Silo).order_by(Silo.ID_Silo.desc()).first()
+        return silo.ID_Silo, silo.user_id
+
+
+def ledger(silo_id):
+    with SessionLocal() as db:
+        content = db.query(Silo.Contenido).filter(Silo.ID_Silo == silo_id).scalar()
+        total = db.query(func.sum(MovimientoSilo.Cantidad)).filter(MovimientoSilo.ID_Silo == silo_id).scalar()
+        return content, total
+
+
+def test_movements_respect_capacity_and_stock(logged_client):
+    silo_id, _ = create_silo(logged_client)
+
+    response = logged_client.post(f"/silo_movement/{silo_id}", data={"quantity": 60, "kind": "deposit"},
+                                  follow_redirects=False)
+    assert response.status_code == 302
+    response = logged_client.post(f"/silo_movement/{silo_id}", data={"quantity": 40, "kind": "deposit"})
+    assert response.status_code == 409
+    response = logged_client.post(f"/silo_movement/{silo_id}", data={"quantity": 71, "kind": "withdraw"})
+    assert response.status_code == 409
+    response = logged_client.post(f"/silo_movement/{silo_id}", data={"quantity": 70, "kind": "withdraw"},
+                                  follow_redirects=False)
+    assert response.status_code == 302
+
+    assert ledger(silo_id) == (0, 0)
+
+
+def test_concurrent_movements_do_not_lose_updates(logged_client):
+    silo_id, user_id = create_silo(logged_client, capacity=100, content=0)
+
+    async def move(quantity):
+        async with AsyncSessionLocal() as db:
+            try:
+                if quantity > 0:
+                    await deposit(db, user_id, silo_id, quantity)
+                else:
+                    await withdraw(db, user_id, silo_id, -quantity)
+                await db.commit()
+                return True
+            except StockError:
+                await db.rollback()
+                return False
+
+    async def run():
+        results = await asyncio.gather(*(move(10) for _ in range(15)), *(move(-5) for _ in range(5)))
+        await async_engine.dispose()
+        return results
+
+    asyncio.run(run())
+    content, total = ledger(silo_id)
+    assert 0 <= content <= 100
+    assert content == total
+
+
+def test_compaction_keeps_balance(logged_client):
+    silo_id, user_id = create_silo(logged_client, capacity=1000, content=10)
+    for quantity in (5, 7, 11):
+        logged_client.post(f"/silo_movement/{silo_id}", data={"quantity": quantity, "kind": "deposit"})
+
+    async def compact():
+        async with AsyncSessionLocal() as db:
+            removed = await compact_ledger(db, datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=1))
+            await db.commit()
+        await async_engine.dispose()
+        return removed
+
+    assert asyncio.run(compact()) == 4
+    with SessionLocal() as db:
+        assert db.query(MovimientoSilo).filter(MovimientoSilo.ID_Silo == silo_id).count() == 1
+    assert ledger(silo_id) == (33, 33)
+
+
+# Dos workers compactan a la vez: el libro queda con un solo saldo y sigue cuadrando con Contenido
+def test_concurrent_compactions_do_not_double_count(logged_client):
+    silo_id, user_id = create_silo(logged_client, capacity=1000, content=10)
+    for quantity in (5, 7, 11):
+        logged_client.post(f"/silo_movement/{silo_id}", data={"quantity": quantity, "kind": "deposit"})
+    before = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=1)
+
+    async def compact():
+        async with AsyncSessionLocal() as db:
+            removed = await compact_ledger(db, before)
+            await db.commit()
+        return removed
+
+    async def run():
+        results = await asyncio.gather(compact(), compact())
+        await async_engine.dispose()
+        return results
+
+    assert sorted(asyncio.run(run())) == [0, 4]
+    with SessionLocal() as db:
+        assert db.query(MovimientoSilo).filter(MovimientoSilo.ID_Silo == silo_id).count() == 1
+    assert ledger(silo_id) == (33, 33)
+
+
+def test_silo_levels_in_one_query(logged_client):
+    create_silo(logged_client, capacity=100, content=25)
+    create_silo(logged_client, capacity=50, content=50)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = logged_client.get("/silo_levels")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert [level["fill"] for level in response.json()] == [0.25, 1.0]
+    assert len(statements) == 1
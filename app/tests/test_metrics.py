@@ -0,0 +1,37 @@
+import re
+
+from agriculture.user.metrics import Histogram, registry
+
+
+def sample(text, name, **labels):
+    for line in text.splitlines():
+        if line.startswith(name + "{") and all(f'{key}="{value}"' in line for key, value in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value)
+    assert list(histogram.cumulative()) == [(0.1, 2), (1.0, 3), ("+Inf", 4)]
+    assert histogram.count == 4 and histogram.sum == 3.65
+
+
+def test_metrics_by_route_template(logged_client):
+    registry.clear()
+    logged_client.get("/cultivation")
+    logged_client.get("/cultivation")
+    logged_client.get("/api/v1/crops/7")
+
+    text = logged_client.get("/metrics").text
+    assert sample(text, "app_requests_total", route="/cultivation", method="GET", status=200) == 2
+    assert sample(text, "app_requests_total", route="/api/v1/crops/{item_id}", status=404) == 1
+    assert sample(text, "app_request_duration_seconds_count", route="/cultivation") == 2
+    assert sample(text, "app_request_duration_seconds_bucket", route="/cultivation", le="+Inf") == 2
+    # Cada página hace al menos la consulta del listado y renderiza una plantilla
+    assert sample(text, "app_request_sql_queries_sum", route="/cultivation") >= 2
+    assert sample(text, "app_request_sql_seconds_total", route="/cultivation") > 0
+    assert sample(text, "app_request_template_seconds_total", route="/cultivation") > 0
+    assert sample(text, "app_request_template_seconds_total", route="/api/v1/crops/{item_id}") == 0
+    assert re.search(r'^# TYPE app_request_duration_seconds histogram$', text, re.M)
@@ -0,0 +1,31 @@
+def test_static_page_sends_validators(client):
+    response = client.get("/about_us")
+    assert response.status_code == 200
+    assert b"About Us" in response.content
+    assert response.headers["etag"].startswith('"')
+    assert "last-modified" in response.headers
+    assert response.headers["vary"] == "Cookie"
+
+
+def test_conditional_requests_get_304(client):
+    response = client.get("/")
+    etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get("/", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    response = client.get("/", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+
+
+def test_login_state_has_its_own_cached_page(client, logged_client):
+    logged_in = logged_client.get("/crop")
+    logged_client.cookies.clear()
+    anonymous = logged_client.get("/crop")
+    assert logged_in.headers["etag"] != anonymous.headers["etag"]
+    assert b"Welcome Back!" in logged_in.content
+    assert b"Welcome Back!" not in anonymous.content
@@ -0,0 +1,49 @@
+from datetime import date
+
+from agriculture.user.models import Cosecha
+from agriculture.user.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    keys = [Cosecha.Fecha_cosecha, Cosecha.ID_Cosecha]
+    cursor = encode_cursor([date(2024, 5, 1), 42])
+    assert decode_cursor(cursor, keys) == [date(2024, 5, 1), 42]
+    assert decode_cursor("not-a-cursor", keys) is None
+    assert decode_cursor(encode_cursor([42]), keys) is None
+
+
+def create_crops(client, count):
+    for id_crop in range(1, count + 1):
+        client.post("/crop_detail", data={
+            "id_crop": id_crop,
+            "crop_type": f"Crop {id_crop:03d}",
+            "area": 10,
+            "planting_date": f"2024-01-{31 - id_crop:02d}",
+            "growing_state": "Seedling",
+            "needs": "Water"
+        })
+
+
+def test_cultivation_keyset_pages(logged_client):
+    create_crops(logged_client, 5)
+
+    response = logged_client.get("/cultivation", params={"limit": 2})
+    assert b"Crop 001" in response.content and b"Crop 002" in response.content
+    assert b"Crop 003" not in response.content
+    assert b"Next Page" in response.content
+
+    seen = []
+    url = "/cultivation?limit=2&sort=date&order=asc"
+    while url:
+        response = logged_client.get(url)
+        seen += [row[0] for row in response.context["value"]]
+        url = response.context["next_url"]
+    # Ordenado por fecha de siembra ascendente: el último cultivo creado es el más antiguo
+    assert seen == [5, 4, 3, 2, 1]
+
+
+def test_cultivation_date_range(logged_client):
+    create_crops(logged_client, 5)
+
+    response = logged_client.get("/cultivation", params={"date_from": "2024-01-27", "date_to": "2024-01-28"})
+    assert [row[0] for row in response.context["value"]] == [3, 4]
@@ -0,0 +1,64 @@
+import random
+from datetime import date
+
+from agriculture.user.database import SessionLocal
+from agriculture.user.models import User, Cultivo, Cosecha, PuntoVenta, Vehiculo, Encargo
+from agriculture.user.planner import Truck, empty_truck, first_fit_decreasing, plan_loads
+
+
+def test_plan_respects_capacity_and_reports_oversized_orders():
+    rng = random.Random(3)
+    orders = [(i, round(rng.uniform(0.5, 12), 2)) for i in range(3000)] + [(3000, 25), (3001, 30)]
+    fleet = [(i, rng.choice((5, 10, 20))) for i in range(2000)]
+    plan = plan_loads(orders, fleet, time_budget_ms=50)
+
+    assert plan.elapsed_ms < 1000
+    for truck in plan.used:
+        assert truck.load <= truck.capacity + 1e-9
+    placed = plan.assignments()
+    assert len(placed) + len(plan.unassigned) == len(orders)
+    assert plan.unassigned == [(3001, 30), (3000, 25)]
+
+
+def test_local_improvement_downsizes_and_empties_trucks():
+    plan = plan_loads([(1, 3)], [(1, 50), (2, 5)], time_budget_ms=10)
+    assert plan.assignments() == {1: 2}
+
+    light = Truck(1, 10)
+    light.add(7, 2)
+    other = Truck(2, 10)
+    other.add(8, 7)
+    assert empty_truck(light, [other])
+    assert light.orders == [] and other.load == 9
+
+
+def test_first_fit_decreasing_places_largest_first():
+    plan = first_fit_decreasing([(1, 2), (2, 8), (3, 5), (4, 5)], [(1, 10), (2, 10)])
+    assert sorted(sorted(order for order, _ in truck.orders) for truck in plan.used) == [[1, 2], [3, 4]]
+
+
+def test_assignment_plan_endpoint_applies_plan(logged_client, user_data):
+    with SessionLocal() as db:
+        user_id = db.query(User).filter(User.email == user_data["email"]).one().id
+        db.add(Cultivo(ID_Cultivo=1, Tipo="Maize", Area_cultivada=1, Fecha_siembra=date(2024, 3, 1),
+                       Estado_crecimiento="Ripe", user_id=user_id))
+        db.add(Cosecha(ID_Cosecha=1, Fecha_cosecha=date(2024, 8, 1), Cantidad_cosecha=10, Area=1, ID_Cultivo=1,
+                       user_id=user_id))
+        db.add(PuntoVenta(ID_Punto_Venta=1, Nombre="Market", Direccion="Main St", user_id=user_id))
+        db.add(Vehiculo(ID_Vehiculo=1, Matricula="SMALL", Capacidad_Carga=5, ID_Cosecha=1, user_id=user_id))
+        db.add(Vehiculo(ID_Vehiculo=2, Matricula="BIG", Capacidad_Carga=10, ID_Cosecha=1, user_id=user_id))
+        for order_id, quantity in ((1, 6), (2, 4), (3, 5)):
+            db.add(Encargo(ID_Encargo=order_id, Fecha=date(2024, 8, 2), Cantidad_producto=quantity, ID_Vehiculo=1,
+                           Punto_Venta_ID=1, user_id=user_id))
+        db.commit()
+
+    preview = logged_client.get("/assignment_plan?fecha=2024-08-02").json()
+    assert preview["vehicles_used"] == 2 and preview["unassigned"] == []
+
+    response = logged_client.post("/assignment_plan", data={"fecha": "2024-08-02"})
+    assert response.status_code == 200
+    with SessionLocal() as db:
+        loads = {}
+        for assignment in db.query(Encargo):
+            loads[assignment.ID_Vehiculo] = loads.get(assignment.ID_Vehiculo, 0) + assignment.Cantidad_producto
+    assert loads == {2: 10, 1: 5}
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+
+from agriculture.user.database import Base, SessionLocal, replicas
+from agriculture.user.models import User, PuntoVenta
+from agriculture.user.replicas import PRIMARY_COOKIE, WriteTracker, current_writes, mark_write
+
+
+def user_id(email):
+    with SessionLocal() as db:
+        return db.query(User).filter(User.email == email).one().id
+
+
+def add_point_of_sale(db, name, owner):
+    db.add(PuntoVenta(Nombre=name, Direccion="Main St", user_id=owner))
+    db.commit()
+
+
+def names(client):
+    return [item["name"] for item in client.get("/api/v1/points_of_sale").json()["items"]]
+
+
+# Dos bases SQLite locales como réplicas; cada prueba escribe en ellas directamente lo que "replicó"
+@pytest.fixture
+def replica_dbs(client, tmp_path):
+    paths = [tmp_path / f"replica_{number}.db" for number in (1, 2)]
+    engines = [create_engine(f"sqlite:///{path}") for path in paths]
+    for sync_engine in engines:
+        Base.metadata.create_all(bind=sync_engine)
+    replicas.set_engines(create_async_engine(f"sqlite+aiosqlite:///{path}") for path in paths)
+    yield engines
+    for replica in replicas.engines:
+        asyncio.run(replica.dispose())
+    replicas.set_engines([])
+    for sync_engine in engines:
+        Base.metadata.drop_all(bind=sync_engine)
+        sync_engine.dispose()
+
+
+def test_reads_are_balanced_across_replicas(logged_client, user_data, replica_dbs):
+    owner = user_id(user_data["email"])
+    with SessionLocal() as db:
+        add_point_of_sale(db, "Primary", owner)
+    for number, sync_engine in enumerate(replica_dbs, 1):
+        with Session(sync_engine) as db:
+            add_point_of_sale(db, f"Replica {number}", owner)
+    # El registro y el login escribieron en el primario
+    logged_client.cookies.delete(PRIMARY_COOKIE)
+
+    seen = [names(logged_client) for _ in range(4)]
+    assert sorted(map(tuple, seen)) == [("Replica 1",), ("Replica 1",), ("Replica 2",), ("Replica 2",)]
+    assert seen[0] != seen[1]
+
+
+def test_reads_stick_to_primary_after_a_write(logged_client, replica_dbs):
+    logged_client.cookies.delete(PRIMARY_COOKIE)
+    assert names(logged_client) == []
+
+    response = logged_client.post("/api/v1/points_of_sale/batch",
+                                  json={"records": [{"nombre": "New", "direccion": "Main St"}]})
+    assert response.status_code == 200
+    assert PRIMARY_COOKIE in response.cookies
+    # Las réplicas todavía no tienen el registro: se lee del primario
+    assert names(logged_client) == ["New"]
+
+    # Pasada la ventana, vuelve a las réplicas
+    logged_client.cookies.delete(PRIMARY_COOKIE)
+    assert names(logged_client) == []
+
+
+def test_reads_do_not_mark_the_session(logged_client, replica_dbs):
+    logged_client.cookies.delete(PRIMARY_COOKIE)
+    response = logged_client.get("/api/v1/points_of_sale")
+    assert response.status_code == 200
+    assert PRIMARY_COOKIE not in response.cookies
+
+
+def test_unhealthy_replicas_are_skipped(logged_client, user_data, replica_dbs, tmp_path):
+    owner = user_id(user_data["email"])
+    with SessionLocal() as db:
+        add_point_of_sale(db, "Primary", owner)
+    with Session(replica_dbs[0]) as db:
+        add_point_of_sale(db, "Replica 1", owner)
+    unreachable = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replicas.set_engines([unreachable, replicas.engines[0]])
+    logged_client.cookies.delete(PRIMARY_COOKIE)
+
+    asyncio.run(replicas.check())
+    assert replicas.status() == [{"index": 0, "healthy": False}, {"index": 1, "healthy": True}]
+    assert [names(logged_client) for _ in range(3)] == [["Replica 1"]] * 3
+
+    # Sin réplicas sanas se lee del primario
+    replicas.healthy = [False, False]
+    assert names(logged_client) == ["Primary"]
+
+
+def test_imports_stick_to_primary(logged_client, replica_dbs):
+    logged_client.cookies.delete(PRIMARY_COOKIE)
+    crops = "id_crop,crop_type,area,planting_date,growing_state,needs\n1,Maize,10.5,2024-01-10,Seedling,Water\n"
+    response = logged_client.post("/import/crops", files={"file": ("crops.csv", crops, "text/csv")})
+    assert response.json()["inserted"] == 1
+    assert PRIMARY_COOKIE in response.cookies
+
+
+def test_mark_write_flags_the_current_request():
+    mark_write()
+    tracker = WriteTracker()
+    token = current_writes.set(tracker)
+    try:
+        mark_write()
+    finally:
+        current_writes.reset(token)
+    assert tracker.wrote
@@ -0,0 +1,98 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+import app.app as application
+from agriculture.user import config
+from app.serve import available_cpus, request_limit, worker_count
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_available_cpus_respects_container_quota(tmp_path):
+    cpu_max = tmp_path / "cpu.max"
+    cpus = len(os.sched_getaffinity(0))
+
+    cpu_max.write_text("max 100000\n")
+    assert available_cpus(cpu_max) == cpus
+    cpu_max.write_text("50000 100000\n")
+    assert available_cpus(cpu_max) == 1
+    assert available_cpus(tmp_path / "missing") == cpus
+
+
+def test_worker_count(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert worker_count() == 3
+    assert worker_count(5) == 5
+    monkeypatch.delenv("WEB_CONCURRENCY")
+    assert worker_count() == available_cpus()
+
+
+def test_request_limit():
+    assert request_limit(0, 100) is None
+    assert request_limit(10, 0) == 10
+    assert all(10 <= request_limit(10, 5) <= 15 for _ in range(50))
+
+
+# La compactación del libro y los pronósticos corren solo en el primer worker
+def test_singleton_jobs_run_only_in_the_first_worker(monkeypatch):
+    started = []
+
+    async def job():
+        started.append(True)
+
+    monkeypatch.setattr(application, "compact_periodically", job)
+    monkeypatch.setattr(application, "forecast_periodically", job)
+    for index, expected in ((1, 0), (0, 2)):
+        started.clear()
+        monkeypatch.setattr(config, "WORKER_INDEX", index)
+        with TestClient(application.app):
+            pass
+        assert len(started) == expected
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return httpx.get(url)
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise TimeoutError(url)
+
+
+# Dos workers que se reciclan cada dos solicitudes; SIGTERM los detiene a todos y el maestro sale con 0
+def test_workers_are_recycled_and_stopped_gracefully(tmp_path):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'serve.db'}",
+               STATIC_BUILD_DIR=str(tmp_path / "static_build"), SCHEMA_CHECK="off")
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "2",
+         "--max-requests", "2", "--max-requests-jitter", "0", "--graceful-timeout", "5"],
+        cwd=APP_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/about_us"
+        assert wait_until_up(url).status_code == 200
+        for _ in range(8):
+            assert httpx.get(url).status_code == 200
+            time.sleep(0.2)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        output, _ = process.communicate(timeout=30)
+
+    assert process.returncode == 0
+    assert output.count("Booting worker") > 2
+    assert "All workers stopped" in output
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import pytest
+
+from sqlalchemy import event
+
+from agriculture.user import session
+from agriculture.user.database import AsyncSessionLocal, async_engine
+from agriculture.user.session import (SESSION_COOKIE, InsecureSecretKey, RevocationList, TTLCache, secret_key,
+                                      user_cache)
+
+
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return statements, lambda: event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_profile_is_served_without_queries(logged_client):
+    statements, stop = count_queries()
+    try:
+        response = logged_client.get("/profile")
+    finally:
+        stop()
+    assert response.status_code == 200
+    assert b"johndoe@example.com" in response.content
+    assert statements == []
+
+
+def test_profile_reloads_user_after_cache_eviction(logged_client):
+    user_cache.clear()
+    response = logged_client.get("/profile")
+    assert b"johndoe@example.com" in response.content
+
+
+def test_forged_or_tampered_cookie_is_rejected(logged_client):
+    token = logged_client.cookies[SESSION_COOKIE]
+    for value in ("1", token[:-2] + "xx"):
+        logged_client.cookies.set(SESSION_COOKIE, value)
+        response = logged_client.get("/profile", follow_redirects=False)
+        assert response.status_code == 307
+        assert response.headers["location"] == "/login"
+
+
+def test_logout_revokes_token(logged_client):
+    token = logged_client.cookies[SESSION_COOKIE]
+    logged_client.get("/logout")
+    logged_client.cookies.set(SESSION_COOKIE, token)
+    response = logged_client.get("/profile", follow_redirects=False)
+    assert response.headers["location"] == "/login"
+
+
+# Otro worker (o uno reciclado, con la lista vacía) ve el logout después de sincronizar con la base
+def test_logout_is_shared_between_workers(logged_client, monkeypatch):
+    token = logged_client.cookies[SESSION_COOKIE]
+    logged_client.get("/logout")
+    other_worker = RevocationList()
+    monkeypatch.setattr(session, "revoked_tokens", other_worker)
+
+    logged_client.cookies.set(SESSION_COOKIE, token)
+    assert logged_client.get("/profile", follow_redirects=False).status_code == 200
+
+    async def sync():
+        async with AsyncSessionLocal() as db:
+            await other_worker.sync(db)
+        await async_engine.dispose()
+
+    asyncio.run(sync())
+    assert len(other_worker) == 1
+    response = logged_client.get("/profile", follow_redirects=False)
+    assert response.headers["location"] == "/login"
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+
+    expired = TTLCache(maxsize=2, ttl=-1)
+    expired.set(1, "a")
+    assert expired.get(1) is None
+
+
+def test_revocation_list_compaction():
+    revoked = RevocationList()
+    revoked.revoke("old", time.time() - 1)
+    revoked.revoke("new", time.time() + 60)
+    revoked.compact()
+    assert len(revoked) == 1
+    assert revoked.is_revoked("new")
+
+
+def test_secret_key_is_required_outside_development():
+    assert secret_key("development", "") == "dev-secret-key-change-me"
+    assert secret_key("production", "a-private-key") == "a-private-key"
+    for key in ("", "dev-secret-key-change-me"):
+        with pytest.raises(InsecureSecretKey):
+            secret_key("production", key)
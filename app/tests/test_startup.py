@@ -0,0 +1,90 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import text
+
+from agriculture.user import config
+from agriculture.user.database import async_engine
+from agriculture.user.startup import SchemaMismatch, check_schema, expected_heads, startup_checks, warm_pool
+
+
+def test_expected_heads_reads_alembic_scripts():
+    heads = expected_heads()
+    assert heads and len(heads) == 1
+    assert expected_heads("/nonexistent") is None
+
+
+def test_check_schema_compares_with_alembic_version(client):
+    with pytest.raises(SchemaMismatch):
+        asyncio.run(check_schema(async_engine))
+
+    head = next(iter(expected_heads()))
+
+    async def stamp():
+        async with async_engine.begin() as connection:
+            await connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+            await connection.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+
+    try:
+        asyncio.run(stamp())
+        assert asyncio.run(check_schema(async_engine)) == {head}
+    finally:
+        async def drop():
+            async with async_engine.begin() as connection:
+                await connection.execute(text("DROP TABLE alembic_version"))
+        asyncio.run(drop())
+        asyncio.run(async_engine.dispose())
+
+
+# Toda la cadena de migraciones corre también en SQLite, de ida y de vuelta
+def test_migrations_run_on_sqlite(tmp_path):
+    command = shutil.which("alembic", path=os.path.dirname(sys.executable)) or "alembic"
+    root = os.path.dirname(os.path.abspath(config.ALEMBIC_SCRIPT_LOCATION))
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'migrations.db'}")
+    for args in (["upgrade", "head"], ["downgrade", "base"], ["upgrade", "head"]):
+        result = subprocess.run([command, *args], cwd=root, env=env, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+
+def test_missing_alembic_scripts_stop_strict_startup(client, monkeypatch):
+    monkeypatch.setattr(config, "SCHEMA_CHECK", "warn")
+    assert asyncio.run(check_schema(async_engine, "/nonexistent")) is None
+
+    monkeypatch.setattr(config, "SCHEMA_CHECK", "strict")
+    monkeypatch.setattr(config, "ALEMBIC_SCRIPT_LOCATION", "/nonexistent")
+    state = {}
+    with pytest.raises(SchemaMismatch, match="Alembic scripts not found"):
+        asyncio.run(startup_checks(async_engine, state))
+    assert "Alembic scripts not found" in state["schema_error"]
+    asyncio.run(async_engine.dispose())
+
+
+def test_warm_pool_opens_connections_in_parallel():
+    async def warm():
+        await async_engine.dispose()
+        await warm_pool(async_engine, 3)
+        checked_in = async_engine.sync_engine.pool.checkedin()
+        await async_engine.dispose()
+        return checked_in
+
+    assert asyncio.run(warm()) == 3
+
+
+def test_startup_does_not_touch_the_database(client):
+    response = client.get("/internal/startup", headers={"X-Internal-Token": config.INTERNAL_TOKEN})
+    assert response.status_code == 200
+    assert response.json()["import_ms"] > 0
+    assert "warmup_ms" in response.json()
+
+
+# Sin el token, o sin INTERNAL_TOKEN configurado, los endpoints internos no existen
+def test_internal_endpoints_require_the_token(client, monkeypatch):
+    for path in ("/internal/startup", "/internal/pool"):
+        assert client.get(path).status_code == 404
+        assert client.get(path, headers={"X-Internal-Token": "wrong"}).status_code == 404
+    monkeypatch.setattr(config, "INTERNAL_TOKEN", "")
+    assert client.get("/internal/startup", headers={"X-Internal-Token": ""}).status_code == 404
@@ -0,0 +1,65 @@
+import asyncio
+import io
+
+from agriculture.user.database import AsyncSessionLocal, SessionLocal, async_engine
+from agriculture.user.models import ResumenRendimiento
+from agriculture.user.summaries import rebuild
+
+
+def add_crop(client, crop_id, crop_type="Maize"):
+    client.post("/crop_detail", data={"id_crop": crop_id, "crop_type": crop_type, "area": 10,
+                                      "planting_date": "2024-02-01", "growing_state": "Ripe", "needs": "Water"})
+
+
+def add_harvest(client, crop_id, harvest_date, quantity, area):
+    client.post(f"/harvest_detail/{crop_id}", data={"harvest_date": harvest_date, "quantity": quantity, "area": area},
+                follow_redirects=False)
+
+
+def summary_rows():
+    with SessionLocal() as db:
+        return sorted((row.Tipo, row.Anio, row.Mes, row.Cantidad_total, row.Area_total, row.Cosechas)
+                      for row in db.query(ResumenRendimiento).filter(ResumenRendimiento.Cosechas > 0))
+
+
+def rebuilt_rows():
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await rebuild(db)
+            await db.commit()
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    return summary_rows()
+
+
+def test_summaries_follow_harvest_changes(logged_client):
+    add_crop(logged_client, 1)
+    add_crop(logged_client, 2, "Rice")
+    add_harvest(logged_client, 1, "2024-03-10", 300, 10)
+    add_harvest(logged_client, 2, "2024-08-01", 100, 4)
+    logged_client.post("/harvest_update/1", data={"harvest_date": "2024-04-15", "quantity": 350})
+    logged_client.post("/import/harvests", files={"file": ("h.csv", io.BytesIO(
+        b"id_harvest,id_crop,harvest_date,quantity,area\n5,2,2024-08-20,60,2\n"), "text/csv")})
+
+    incremental = summary_rows()
+    assert incremental == [("Maize", 2024, 4, 350, 10, 1), ("Rice", 2024, 8, 160, 6, 2)]
+    assert rebuilt_rows() == incremental
+
+    dashboard = logged_client.get("/yield_dashboard").json()
+    assert {crop["crop_type"]: crop["yield_per_area"] for crop in dashboard["crops"]} == {
+        "Maize": 35, "Rice": round(160 / 6, 4)}
+    assert [(season["crop_type"], season["season"]) for season in dashboard["seasons"]] == [
+        ("Maize", "A"), ("Rice", "B")]
+
+
+def test_summaries_follow_crop_type_change_and_delete(logged_client):
+    add_crop(logged_client, 1)
+    add_harvest(logged_client, 1, "2024-03-10", 300, 10)
+    logged_client.post("/crop_update?id_crop=1", data={"crop_type": "Sorghum", "area": 10,
+                                                       "planting_date": "2024-02-01", "growing_state": "Ripe",
+                                                       "needs": "Water"})
+    assert summary_rows() == [("Sorghum", 2024, 3, 300, 10, 1)]
+
+    logged_client.get("/crop_delete/1")
+    assert summary_rows() == []